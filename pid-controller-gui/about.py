@@ -6,7 +6,7 @@ ABOUT_TEXT
     HTML-formatted 'about' text
 
 SYS_TEXT
-    HTML-formatted 'system' text
+    HTML-formatted 'system' text template (filled in when the window is created as querying the platform is slow)
 
 
 AboutWindow
@@ -16,8 +16,7 @@ AboutWindow
 import platform
 import sys
 
-from PyQt5.Qt import PYQT_VERSION_STR
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, PYQT_VERSION_STR
 from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QTabWidget, QLabel, QTextBrowser, QPushButton, QStyle
 from PyQt5.QtGui import QIcon, QPixmap
 
@@ -48,23 +47,23 @@ ABOUT_TEXT = """<!DOCTYPE html>
 
 
 
-SYS_TEXT = f"""<!DOCTYPE html>
+SYS_TEXT = """<!DOCTYPE html>
 <html>
 <body>
 
 <h2>Python</h2>
 <ul>
-  <li>{sys.version}</li>
+  <li>{python}</li>
 </ul>
 
 <h2>Platform</h2>
 <ul>
-  <li>{platform.platform(aliased=True)}</li>
+  <li>{platform}</li>
 </ul>
 
 <h2>PyQt</h2>
 <ul>
-  <li>{PYQT_VERSION_STR}</li>
+  <li>{pyqt}</li>
 </ul>
 
 <h2>PyQtGraph</h2>
@@ -153,7 +152,8 @@ class AboutWindow(QTabWidget):
         self.sysTab.setLayout(layout)
 
         sysTextBrowser = QTextBrowser()
-        sysTextBrowser.setHtml(SYS_TEXT)
+        sysTextBrowser.setHtml(SYS_TEXT.format(python=sys.version, platform=platform.platform(aliased=True),
+                                               pyqt=PYQT_VERSION_STR))
         sysTextBrowser.setOpenExternalLinks(True)
 
         aboutQtButton = QPushButton(QIcon(self.style().standardIcon(QStyle.SP_TitleBarMenuButton)), 'About QT')
@@ -0,0 +1,66 @@
+"""
+benchmarks - measurements of the remotecontroller messaging hot paths against the local simulated controller (see
+simulator.py). Run from the pid-controller-gui directory:
+
+    $ python -m benchmarks [scenario ...] [--quick] [--output results.json]
+
+Results are printed (or written) as JSON to track regressions between versions
+
+
+module scenarios
+    benchmark scenarios and the harness running the simulator in the separate process
+
+function run
+    execute the given scenarios and collect results along with the environment description
+"""
+
+import datetime
+import platform
+import subprocess
+import sys
+
+# local imports
+from .scenarios import SCENARIOS
+
+
+
+def _git_revision() -> str:
+    """
+    :return: current git commit hash or None if it cannot be determined
+    """
+
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names: list=None, **options) -> dict:
+    """
+    Execute scenarios
+
+    :param names: [optional] names of scenarios to run (all from SCENARIOS by default)
+    :param options: [optional] keyword arguments passed to every scenario (e.g. 'duration', 'backends')
+    :return: dictionary with 'environment' and 'scenarios' keys
+    """
+
+    if names is None:
+        names = list(SCENARIOS.keys())
+
+    report = {
+        'environment': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'revision': _git_revision(),
+            'python': sys.version,
+            'platform': platform.platform(),
+            'options': options
+        },
+        'scenarios': {}
+    }
+
+    for name in names:
+        print(f"running '{name}'...", file=sys.stderr)
+        report['scenarios'][name] = SCENARIOS[name](**options)
+
+    return report
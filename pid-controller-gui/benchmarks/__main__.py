@@ -0,0 +1,38 @@
+"""
+__main__.py - command line entry point of the benchmarks package (python -m benchmarks --help)
+"""
+
+import argparse
+import json
+import sys
+
+# local imports
+import remotecontroller
+from . import run
+from .scenarios import SCENARIOS
+
+
+
+parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                 description="Benchmarks of the remotecontroller messaging hot paths")
+parser.add_argument('scenarios', nargs='*', choices=[[]] + list(SCENARIOS.keys()), metavar='scenario',
+                    help=f"scenarios to run (default: all of {', '.join(SCENARIOS.keys())})")
+parser.add_argument('--backends', nargs='+', choices=remotecontroller.LISTENER_BACKENDS,
+                    default=list(remotecontroller.LISTENER_BACKENDS), help="listener backends to measure")
+parser.add_argument('--duration', type=float, default=2.0, help="duration of streaming scenarios in seconds")
+parser.add_argument('--quick', action='store_true', help="fewer iterations and shorter streaming (smoke run)")
+parser.add_argument('--output', help="write JSON to the file instead of the standard output")
+args = parser.parse_args()
+
+options = {'backends': tuple(args.backends), 'duration': args.duration}
+if args.quick:
+    options.update(duration=0.5, number=10000, requests=200, repeat=3)
+
+report = run(args.scenarios or None, **options)
+
+if args.output is None:
+    json.dump(report, sys.stdout, indent=2)
+    print()
+else:
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
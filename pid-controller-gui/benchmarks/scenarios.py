@@ -0,0 +1,420 @@
+"""
+scenarios.py - benchmark scenarios of the remotecontroller messaging hot paths. Every scenario is a function taking
+keyword options and returning a JSON-serializable dictionary
+
+
+const BENCHMARK_OVERFLOW_THRESHOLD
+const BENCHMARK_OVERFLOW_CHECK_PERIOD
+    overflow criterion of the graphs (see graphs.CustomGraphicsLayoutWidget._overflowCheck()) and how often it is
+    evaluated (in seconds)
+const BENCHMARK_GRAPHS_NUM_POINTS
+const BENCHMARK_GRAPHS_INTERVAL
+    parameters of the emulated graphs' consumer loop (same as the CustomGraphicsLayoutWidget defaults)
+const BENCHMARK_STREAM_RATES
+    ladder of stream rates (frames per second) tried by the stream_rate scenario
+
+class SimulatorProcess
+    simulator.Simulator running in the separate process so it does not affect measurements
+
+function percentiles
+    summary statistics of a series of samples
+
+function codec
+    cost of building requests and parsing responses (no I/O)
+function rtt
+    request round trip time percentiles for every listener backend
+function stream_rate
+    maximum sustained stream rate before the graphs' overflow criterion trips
+function cpu
+    CPU time spent per 1000 received stream samples
+function startup
+    time to construct (including the connection check, and without it as the GUI does) and to close the
+    RemoteController
+function graphs
+    duration of the graphs' update routine (optional, requires PyQt5 and pyqtgraph)
+
+dict SCENARIOS
+    all scenarios by name in the order of execution
+"""
+
+import multiprocessing
+import os
+import statistics
+import time
+import timeit
+
+try:
+    import resource
+except ImportError:  # not available on Windows, CPU time of listener processes is not accounted then
+    resource = None
+
+# local imports
+import remotecontroller
+import simulator
+
+
+
+BENCHMARK_OVERFLOW_THRESHOLD = 50  # graphs.STREAM_PIPE_OVERFLOW_NUM_POINTS_THRESHOLD (graphs module requires Qt)
+
+#
+# timeouts in seconds
+#
+BENCHMARK_OVERFLOW_CHECK_PERIOD = 0.5
+
+BENCHMARK_GRAPHS_NUM_POINTS = 200
+BENCHMARK_GRAPHS_INTERVAL = 0.017
+
+BENCHMARK_STREAM_RATES = (100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000)
+
+
+
+def _serve(conn: multiprocessing.connection.Connection, rate: float) -> None:
+    """
+    Target of the SimulatorProcess
+
+    :param conn: pipe end to report the address and stats through and to receive the stop command from
+    :param rate: stream rate in frames per second
+    :return: None
+    """
+
+    endpoint = simulator.SimulatedController(rate=rate)
+    with simulator.Simulator([endpoint]):
+        conn.send(endpoint.address)
+        conn.recv()  # wait for the stop
+    conn.send(endpoint.stats)
+
+
+
+class SimulatorProcess:
+    """
+    Single simulated controller served from the separate process (the benchmarked process spends its CPU time on the
+    client side only). 'address' is available after entering the context and 'stats' after exiting it.
+
+    Usage example:
+
+        with SimulatorProcess(rate=1000) as sim:
+            conn = remotecontroller.RemoteController(*sim.address)
+            ...
+
+    """
+
+    def __init__(self, rate: float=50.0):
+        self.rate = rate
+        self.address = None
+        self.stats = None
+        self._conn = None
+        self._process = None
+
+    def __enter__(self):
+        self._conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(target=_serve, args=(child_conn, self.rate), daemon=True)
+        self._process.start()
+        self.address = self._conn.recv()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._conn.send(None)
+        self.stats = self._conn.recv()
+        self._process.join()
+        self._conn.close()
+
+
+
+def percentiles(samples: list, scale: float=1.0) -> dict:
+    """
+    Summary statistics of the series
+
+    :param samples: list of numbers
+    :param scale: [optional] multiplier applied to all results (e.g. 1e6 to get microseconds from seconds)
+    :return: dictionary with 'count', 'mean', 'min', 'p50', 'p90', 'p99' and 'max' keys
+    """
+
+    ordered = sorted(samples)
+
+    def pick(fraction):
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)] * scale
+
+    return {
+        'count': len(ordered),
+        'mean': statistics.mean(ordered) * scale,
+        'min': ordered[0] * scale,
+        'p50': pick(0.5),
+        'p90': pick(0.9),
+        'p99': pick(0.99),
+        'max': ordered[-1] * scale
+    }
+
+
+def _cpu_time() -> float:
+    """
+    :return: CPU time (user + system) of this process and its already joined children in seconds
+    """
+
+    total = time.process_time()
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        total += children.ru_utime + children.ru_stime
+    return total
+
+
+def _consume(buffer: remotecontroller.StreamBuffer) -> int:
+    """
+    Do what graphs' update routine does with the stream buffer: take up to BENCHMARK_GRAPHS_NUM_POINTS frames and give
+    the place back
+
+    :param buffer: StreamBuffer instance
+    :return: number of consumed frames
+    """
+
+    frames = buffer.peek(max_frames=BENCHMARK_GRAPHS_NUM_POINTS)
+    if frames is None:
+        return 0
+    num = len(frames)
+    frames.release()
+    buffer.consume(num)
+    return num
+
+
+
+def codec(number: int=100000, **options) -> dict:
+    """
+    Cost of the pure-CPU parts of every request: building the request and parsing the response (both the low-level
+    functions and RemoteController' checking wrappers) and batch parsing of stream messages
+
+    :param number: [optional] number of calls of each function
+    :return: nanoseconds per call (per message for the batch parsing)
+    """
+
+    response = bytes([remotecontroller.var_cmd['kP'] << 3]) + bytes(8)
+    parsed = remotecontroller._parse_response(response)
+    batch_size = remotecontroller.RECEIVE_BATCH_SIZE
+
+    timers = {
+        '_make_request': lambda: remotecontroller._make_request('write', 'setpoint', 1.0),
+        'RemoteController._make_request': lambda: remotecontroller.RemoteController._make_request('read', 'kP'),
+        '_parse_response': lambda: remotecontroller._parse_response(response),
+        'RemoteController._parse_response': lambda: remotecontroller.RemoteController._parse_response('read', 'kP',
+                                                                                                      parsed)
+    }
+    results = {name: timeit.timeit(function, number=number) / number * 1e9 for name, function in timers.items()}
+
+    batches = max(number // batch_size, 1)
+    for channels in (remotecontroller.STREAM_CHANNELS_DEFAULT, remotecontroller.STREAM_MAX_CHANNELS):
+        slot_size = remotecontroller._batch_struct(channels).size
+        batch = memoryview(bytes([remotecontroller.stream_prefix]) * batch_size * slot_size)
+        results[f'_parse_responses (per message, {channels} channels)'] = timeit.timeit(
+            lambda: remotecontroller._parse_responses(batch, channels), number=batches) / (batches * batch_size) * 1e9
+
+    return {'unit': 'ns', 'results': results}
+
+
+def rtt(requests: int=2000, backends: tuple=remotecontroller.LISTENER_BACKENDS, **options) -> dict:
+    """
+    Round trip time of read() requests bypassing the cache
+
+    :param requests: [optional] number of requests per backend
+    :param backends: [optional] listener backends to measure
+    :return: percentiles in microseconds per backend
+    """
+
+    results = {}
+    with SimulatorProcess() as sim:
+        for backend in backends:
+            conn = remotecontroller.RemoteController(*sim.address, listener=backend)
+            samples = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                conn.read('setpoint', max_age=0)
+                samples.append(time.perf_counter() - start)
+            conn.close()
+            results[backend] = percentiles(samples, scale=1e6)
+
+    return {'unit': 'us', 'results': results}
+
+
+def stream_rate(duration: float=2.0, rates: tuple=BENCHMARK_STREAM_RATES,
+                backends: tuple=remotecontroller.LISTENER_BACKENDS, **options) -> dict:
+    """
+    Find the maximum stream rate the client sustains. The graphs' consumer loop is emulated (BENCHMARK_GRAPHS_NUM_POINTS
+    frames at most every BENCHMARK_GRAPHS_INTERVAL) and the same criterion as graphs' _overflowCheck() is evaluated:
+    the listener's forwarded frames counter is ahead of the consumed frames by more than BENCHMARK_OVERFLOW_THRESHOLD.
+    Rates are tried in ascending order until the first overflow
+
+    :param duration: [optional] time to hold every rate in seconds
+    :param rates: [optional] ladder of stream rates (frames per second)
+    :param backends: [optional] listener backends to measure
+    :return: maximum sustained rate and per-rate details (listener counters at the end of the run) per backend
+    """
+
+    results = {}
+    for backend in backends:
+        details = []
+        max_rate = 0
+        for rate in rates:
+            with SimulatorProcess(rate=rate) as sim:
+                conn = remotecontroller.RemoteController(*sim.address, listener=backend)
+                status = conn.listener_status
+
+                conn.stream.start()
+
+                consumed = 0
+                max_decimation = 1
+                overflow = False
+                start = time.monotonic()
+                next_check = start + BENCHMARK_OVERFLOW_CHECK_PERIOD
+                while True:
+                    consumed += _consume(conn.stream.buffer)
+                    now = time.monotonic()
+                    is_last = now - start >= duration
+                    if now >= next_check or is_last:
+                        overflow |= status.forwarded - consumed > BENCHMARK_OVERFLOW_THRESHOLD
+                        max_decimation = max(max_decimation, status.decimation)
+                        next_check += BENCHMARK_OVERFLOW_CHECK_PERIOD
+                    if is_last:
+                        break
+                    time.sleep(BENCHMARK_GRAPHS_INTERVAL)
+
+                counters = status.counters()
+                conn.stream.stop()
+                conn.close()
+
+            details.append({
+                'rate': rate,
+                'sent': sim.stats['sent'],
+                'received': counters['received'],
+                'forwarded': counters['forwarded'],
+                'decimated': counters['decimated'],
+                'dropped': counters['dropped'],
+                'max_backlog': counters['max_backlog'],
+                'max_decimation': max_decimation,
+                'consumed': consumed,
+                'overflow': overflow
+            })
+            if overflow:
+                break
+            max_rate = rate
+
+        results[backend] = {'max_rate': max_rate, 'details': details}
+
+    return {'unit': 'frames/s', 'results': results}
+
+
+def cpu(duration: float=2.0, rate: float=5000, backends: tuple=remotecontroller.LISTENER_BACKENDS, **options) -> dict:
+    """
+    CPU time of the client (main process and the listener process if any) spent per 1000 received stream samples. The
+    stream buffer is drained as fast as possible so the listener is the only significant consumer
+
+    :param duration: [optional] streaming time in seconds
+    :param rate: [optional] stream rate in frames per second
+    :param backends: [optional] listener backends to measure
+    :return: CPU milliseconds per 1000 samples per backend
+    """
+
+    results = {}
+    for backend in backends:
+        with SimulatorProcess(rate=rate) as sim:
+            cpu_start = _cpu_time()
+
+            conn = remotecontroller.RemoteController(*sim.address, listener=backend)
+            conn.stream.start()
+
+            start = time.monotonic()
+            while time.monotonic() - start < duration:
+                time.sleep(BENCHMARK_GRAPHS_INTERVAL)
+                conn.stream.buffer.flush()
+
+            conn.stream.stop()
+            received = conn.listener_status.received
+            conn.close()  # the listener process (if any) is joined here so its usage is accounted
+
+            cpu_time = _cpu_time() - cpu_start
+
+        results[backend] = {
+            'received': received,
+            'cpu_s': cpu_time,
+            'cpu_ms_per_1k': cpu_time / received * 1e6 if received else None,
+            'children_accounted': resource is not None
+        }
+
+    return {'unit': 'ms', 'rate': rate, 'results': results}
+
+
+def startup(repeat: int=10, backends: tuple=remotecontroller.LISTENER_BACKENDS, **options) -> dict:
+    """
+    Time to construct the RemoteController (it spawns the listener and checks the connection) and to close it. The
+    construction without the connection check ('deferred', the check is then performed by connect()) is the time the
+    GUI waits for before showing the main window
+
+    :param repeat: [optional] number of measurements per backend
+    :param backends: [optional] listener backends to measure
+    :return: construction (full and deferred) and closing time percentiles in milliseconds per backend
+    """
+
+    results = {}
+    with SimulatorProcess() as sim:
+        for backend in backends:
+            construct, deferred, close = [], [], []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                conn = remotecontroller.RemoteController(*sim.address, listener=backend, connect=False)
+                deferred.append(time.perf_counter() - start)
+                conn.connect()
+                construct.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                conn.close()
+                close.append(time.perf_counter() - start)
+            results[backend] = {
+                'construct': percentiles(construct, scale=1e3),
+                'deferred': percentiles(deferred, scale=1e3),
+                'close': percentiles(close, scale=1e3)
+            }
+
+    return {'unit': 'ms', 'results': results}
+
+
+def graphs(repeat: int=500, **options) -> dict:
+    """
+    Duration of the graphs' update routine with a full portion of new points every time. Skipped if Qt is not
+    available
+
+    :param repeat: [optional] number of updates
+    :return: update duration percentiles in microseconds
+    """
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')  # no need to show anything
+    try:
+        from PyQt5.QtWidgets import QApplication
+        import graphs as graphs_module
+    except ImportError as e:
+        return {'skipped': str(e)}
+
+    app = QApplication.instance() or QApplication([])
+
+    buffer = remotecontroller.StreamBuffer()
+    control_pipe, _ = multiprocessing.Pipe()
+    widget = graphs_module.CustomGraphicsLayoutWidget(controlPipe=control_pipe, streamBuffer=buffer)
+
+    points = [(float(i), -float(i)) for i in range(BENCHMARK_GRAPHS_NUM_POINTS)]
+    samples = []
+    for _ in range(repeat):
+        buffer.push_many(points)
+        start = time.perf_counter()
+        widget._update()
+        samples.append(time.perf_counter() - start)
+    app.processEvents()
+
+    widget.deleteLater()
+    buffer.close()
+
+    return {'unit': 'us', 'points_per_update': BENCHMARK_GRAPHS_NUM_POINTS, 'results': percentiles(samples, scale=1e6)}
+
+
+
+SCENARIOS = {
+    'codec': codec,
+    'rtt': rtt,
+    'stream_rate': stream_rate,
+    'cpu': cpu,
+    'startup': startup,
+    'graphs': graphs
+}
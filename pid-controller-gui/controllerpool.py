@@ -0,0 +1,219 @@
+"""
+controllerpool.py - multiplexing of many remote PID controllers over a single UDP socket and a single listening thread
+
+
+class _PoolEndpoint
+    RemoteController' transport sending over the shared socket and receiving messages routed by the pool
+
+class ControllerPool
+    set of RemoteController's sharing one socket and one listening thread. Incoming messages are routed by their
+    source address
+"""
+
+import socket
+import threading
+import multiprocessing
+import multiprocessing.connection
+
+import remotecontroller
+
+
+
+class _PoolEndpoint(remotecontroller.InlineTransport):
+    """
+    Transport of the single pool' member. It does not own any system resources: requests are sent over the shared
+    socket and responses are delivered by the pool' listening thread
+    """
+
+    def __init__(self, sock: socket.socket, address: tuple):
+        """
+        _PoolEndpoint constructor
+
+        :param sock: shared socket of the pool
+        :param address: (IP-address, UDP port) tuple of the controller
+        """
+
+        super(_PoolEndpoint, self).__init__()
+        self.sock = sock
+        self.address = address
+
+    def send(self, message: bytes) -> None:
+        self.sock.sendto(message, self.address)
+
+
+
+class ControllerPool:
+    """
+    Manager of many RemoteController's in a single process. Instead of a socket, a listening process and pipes per
+    controller, all of them share one UDP socket and one listening thread waking up only on incoming data. Responses
+    and stream messages are routed to the corresponding controller by the source address and are parsed in batches
+    right in the listening thread. Every controller still has its own stream buffer and cache.
+
+    Usage example:
+
+        with ControllerPool() as pool:
+            for port in range(1200, 1300):
+                pool.add('127.0.0.1', port)
+            for address, conn in pool.items():
+                print(address, conn.read('setpoint'))
+
+    """
+
+    def __init__(self, bind_address: tuple=('0.0.0.0', 0)):
+        """
+        ControllerPool constructor. Starts the listening thread
+
+        :param bind_address: [optional] local (IP-address, UDP port) tuple to bind the shared socket to (any port by
+        default)
+        """
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(bind_address)
+        self.sock.settimeout(0)  # explicitly set the non-blocking mode
+
+        self._endpoints = {}  # (IP-address, UDP port): _PoolEndpoint
+        self._controllers = {}  # (IP-address, UDP port): RemoteController
+
+        # preallocated receive buffer (a little bigger than the longest message so controllers detect truncated ones)
+        self._buffer = bytearray(max(remotecontroller.REMOTECONTROLLER_MSG_SIZE,
+                                     remotecontroller.stream_message_size(remotecontroller.STREAM_MAX_CHANNELS)) + 1)
+
+        self._control_pipe_thread, self._control_pipe_main = multiprocessing.Pipe(duplex=False)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self._controllers)
+
+    def __iter__(self):
+        return iter(list(self._controllers.values()))
+
+    def __getitem__(self, address: tuple) -> remotecontroller.RemoteController:
+        return self._controllers[self._resolve(address)]
+
+
+    @staticmethod
+    def _resolve(address: tuple) -> tuple:
+        """
+        Bring the address to the form reported by recvfrom() so it can be used as a routing key
+
+        :param address: (host, UDP port) tuple
+        :return: (IP-address, UDP port) tuple
+        """
+
+        return socket.gethostbyname(address[0]), address[1]
+
+
+    def items(self) -> list:
+        """
+        :return: list of ((IP-address, UDP port), RemoteController) tuples
+        """
+
+        return list(self._controllers.items())
+
+
+    def add(self, ip_addr: str, udp_port: int, **kwargs) -> remotecontroller.RemoteController:
+        """
+        Create the RemoteController communicating through the pool. Like the standalone one, it checks the connection
+        first and falls into the offline mode if there is no response
+
+        :param ip_addr: string representing IP-address of the controller' network interface
+        :param udp_port: integer representing UDP port of the controller' network interface
+        :param kwargs: [optional] other RemoteController arguments (e.g. 'conn_lost_signal', 'cache_ttl')
+        :return: RemoteController instance
+        """
+
+        address = self._resolve((ip_addr, udp_port))
+        if address in self._endpoints:
+            raise ValueError(f"Controller {address} is already in the pool")
+
+        # route should exist before the RemoteController construction as it checks the connection right away
+        self._endpoints[address] = _PoolEndpoint(self.sock, address)
+        try:
+            controller = remotecontroller.RemoteController(transport=self._endpoints[address], **kwargs)
+        except Exception:
+            del self._endpoints[address]
+            raise
+
+        self._controllers[address] = controller
+        return controller
+
+
+    def remove(self, controller: remotecontroller.RemoteController) -> None:
+        """
+        Close the controller and stop routing its messages
+
+        :param controller: RemoteController instance previously returned by add()
+        :return: None
+        """
+
+        address = controller.transport.address
+        controller.close()
+        del self._controllers[address]
+        del self._endpoints[address]
+
+
+    def _receive(self) -> None:
+        """
+        Drain pending datagrams (up to RECEIVE_BATCH_SIZE), group them by the source and deliver each group at once so
+        every controller parses its messages in a single batch. Datagrams from unknown sources are dropped
+
+        :return: None
+        """
+
+        batches = {}
+        for _ in range(remotecontroller.RECEIVE_BATCH_SIZE):
+            try:
+                nbytes, address = self.sock.recvfrom_into(self._buffer)
+            except BlockingIOError:  # no more data
+                break
+            except ConnectionResetError:  # meet on Windows when one of controllers is unreachable
+                continue
+            endpoint = self._endpoints.get(address)
+            if endpoint is not None:
+                batches.setdefault(endpoint, []).append(bytes(self._buffer[:nbytes]))
+
+        for endpoint, messages in batches.items():
+            endpoint.deliver(*messages)
+
+
+    def _run(self) -> None:
+        """
+        Listening thread routine. Waits on both the socket and the control pipe so consumes no CPU time when all links
+        are idle
+
+        :return: None
+        """
+
+        while True:
+            ready = multiprocessing.connection.wait([self.sock, self._control_pipe_thread])
+            if self._control_pipe_thread in ready:  # the only command is to exit
+                return
+            self._receive()
+
+
+    def close(self) -> None:
+        """
+        Close all controllers, stop the listening thread and release the socket
+
+        :return: None
+        """
+
+        for controller in self._controllers.values():
+            controller.close()
+
+        if self._thread.is_alive():
+            self._control_pipe_main.send(remotecontroller.InputThreadCommand.EXIT)
+            self._thread.join(timeout=remotecontroller.INPUT_THREAD_EXIT_TIMEOUT)
+
+        self._control_pipe_main.close()
+        self._control_pipe_thread.close()
+
+        self.sock.close()
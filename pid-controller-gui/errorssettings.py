@@ -43,6 +43,8 @@ class ErrorsSettingsWindow(QWidget):
         super(ErrorsSettingsWindow, self).__init__(parent)
 
         self.app = app
+        self._pending = 0  # number of requests in progress
+        self.currentIerrText = "Current I error: <i>reading...</i>"
 
         self.setWindowTitle("PID errors settings")
         self.setWindowIcon(QIcon(util.resource_path('../img/set_errors.png')))
@@ -61,6 +63,7 @@ class ErrorsSettingsWindow(QWidget):
                 'max': QLineEdit()
             }
         }
+        self.groupBoxes = {}
 
 
         # we have 2 similar parameters but for integral error also declare reset button with the value tooltip
@@ -78,12 +81,13 @@ class ErrorsSettingsWindow(QWidget):
             hBox.addWidget(setButton)
 
             groupBox = QGroupBox(name)
+            self.groupBoxes[key] = groupBox
 
             if key == 'err_I_limits':
                 self.resetButton = QPushButton(QIcon(self.style().standardIcon(QStyle.SP_DialogCancelButton)),
                                                "Reset I error")
                 self.resetButton.clicked.connect(self.resetIerr)
-                self.event(QEvent(QEvent.ToolTip))
+                self.resetButton.setToolTip(self.currentIerrText)
 
                 hBox2 = QHBoxLayout()
                 hBox2.addWidget(self.resetButton)
@@ -106,19 +110,31 @@ class ErrorsSettingsWindow(QWidget):
 
     def event(self, event: QEvent) -> bool:
         """
-        Overridden method is used to catch QEvent.ToolTip to display current value
+        Overridden method is used to catch QEvent.ToolTip to refresh the current value. The request is made in the
+        background so the tooltip shows the last known value and the fresh one is displayed at the next hover
 
         :param event: QEvent instance
         :return: bool
         """
 
         if event.type() == QEvent.ToolTip:
-            self.resetButton.setToolTip(f"Current I error: " +
-                                        self.app.settings['pid']['valueFormat'].format(self.app.conn.read('err_I')))
+            self.app.ioExecutor.submit(self.app.conn.read, 'err_I', onResult=self.displayIerr)
 
         return super(ErrorsSettingsWindow, self).event(event)
 
 
+    def displayIerr(self, value: float) -> None:
+        """
+        Put the current I error into the reset button' tooltip
+
+        :param value: number to display
+        :return: None
+        """
+
+        self.currentIerrText = "Current I error: " + self.app.settings['pid']['valueFormat'].format(value)
+        self.resetButton.setToolTip(self.currentIerrText)
+
+
     def show(self):
         """
         Overridden method to update displaying widgets before showing the window itself
@@ -142,18 +158,80 @@ class ErrorsSettingsWindow(QWidget):
         self.statusBar.removeWidget(widget)
 
 
+    def setPending(self, pending: bool) -> None:
+        """
+        Reflect the request in progress by disabling controls. Calls are counted so the state is left only after the
+        last of overlapping requests is done
+
+        :param pending: True when the request is started, False when it is done
+        :return: None
+        """
+
+        self._pending += 1 if pending else -1
+        for groupBox in self.groupBoxes.values():
+            groupBox.setEnabled(self._pending == 0)
+
+
+    def _request(self, function, *args, onResult=None) -> None:
+        """
+        Perform the RemoteController request in the background keeping controls disabled till it is done
+
+        :param function: callable to run in the app' IOExecutor
+        :param args: positional arguments for the function
+        :param onResult: [optional] callable accepting the returned value
+        :return: None
+        """
+
+        def onDone(value):
+            self.setPending(False)
+            if onResult is not None:
+                onResult(value)
+
+        def onError(exception):
+            self.setPending(False)
+            print(f"Errors settings request failed: {exception}")
+
+        self.setPending(True)
+        self.app.ioExecutor.submit(function, *args, onResult=onDone, onError=onError)
+
+
     def updateDisplayingValues(self, *what) -> None:
         """
-        Refresh one or more widgets displaying values
+        Refresh one or more widgets displaying values (all values are read at once)
 
         :param what: strings representing values names that need to be updated
         :return: None
         """
 
-        for item in what:
-            valMin, valMax = self.app.conn.read(item)
-            self.lineEdits[item]['min'].setText(self.app.settings['pid']['valueFormat'].format(valMin))
-            self.lineEdits[item]['max'].setText(self.app.settings['pid']['valueFormat'].format(valMax))
+        self._request(self.app.conn.read_many, what, onResult=self.displayValues)
+
+
+    def showStatus(self, text: str) -> None:
+        """
+        Display the message in the status bar for STATUSBAR_MSG_TIMEOUT
+
+        :param text: message to display
+        :return: None
+        """
+
+        label = QLabel(text)
+        self.statusBar.addWidget(label)
+        QTimer().singleShot(STATUSBAR_MSG_TIMEOUT, functools.partial(self.removeStatusBarWidget, label))
+
+
+    def displayValues(self, values: dict) -> None:
+        """
+        Show the given values (e.g. read together with others) without own requests to the RemoteController
+
+        :param values: dictionary of values names and (min, max) pairs. Items not related to this window are ignored
+        :return: None
+        """
+
+        for item, lineEdits in self.lineEdits.items():
+            if item in values:
+                valMin, valMax = values[item]
+                lineEdits['min'].setText(self.app.settings['pid']['valueFormat'].format(valMin))
+                lineEdits['max'].setText(self.app.settings['pid']['valueFormat'].format(valMax))
 
 
     def setErrLimits(self, what: str) -> None:
@@ -172,13 +250,11 @@ class ErrorsSettingsWindow(QWidget):
             pass
         else:
             if valMax < valMin:
-                resultLabel = QLabel("<font color='red'>Upper limit value is less than lower</font>")
+                self.showStatus("<font color='red'>Upper limit value is less than lower</font>")
             else:
-                self.app.conn.write(what, valMin, valMax)
-                resultLabel = QLabel('Success')
-            self.statusBar.addWidget(resultLabel)
-            QTimer().singleShot(STATUSBAR_MSG_TIMEOUT, functools.partial(self.removeStatusBarWidget, resultLabel))
+                self._request(self.app.conn.write, what, valMin, valMax, onResult=lambda _: self.showStatus('Success'))
 
+        # queued after the write so the written values are displayed
         self.updateDisplayingValues(what)
 
 
@@ -189,9 +265,21 @@ class ErrorsSettingsWindow(QWidget):
         :return: None
         """
 
-        if self.app.conn.reset_i_err() == remotecontroller.result['ok']:
-            statusLabel = QLabel("I error has been reset")
+        self.resetButton.setEnabled(False)
+        self.app.ioExecutor.submit(self.app.conn.reset_i_err, onResult=self.resetIerrDone,
+                                   onError=lambda _: self.resetIerrDone(remotecontroller.result['error']))
+
+
+    def resetIerrDone(self, status: int) -> None:
+        """
+        Display the outcome of the I error reset
+
+        :param status: result['error'] or result['ok'] (int)
+        :return: None
+        """
+
+        self.resetButton.setEnabled(True)
+        if status == remotecontroller.result['ok']:
+            self.showStatus("I error has been reset")
         else:
-            statusLabel = QLabel("<font color='red'>I error reset failed</font>")
-        self.statusBar.addWidget(statusLabel)
-        QTimer().singleShot(STATUSBAR_MSG_TIMEOUT, functools.partial(self.removeStatusBarWidget, statusLabel))
+            self.showStatus("<font color='red'>I error reset failed</font>")
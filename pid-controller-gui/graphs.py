@@ -12,19 +12,31 @@ STREAM_PIPE_OVERFLOW_CHECK_TIME_PERIOD_MS
 STREAM_PIPE_OVERFLOW_WARNING_SIGN_DURATION
     time for which an overflow warning sign will be displayed
 
+STATUS_LABELS_UPDATE_PERIOD_MS
+    period of refreshing the inter-arrival statistics and the decimation labels in milliseconds
+
+ENVELOPE_DEFAULT_COLUMNS
+    number of pixel columns assumed while the plot is not laid out yet
+ENVELOPE_RESCALE_RATIO
+    how much the displayed time span may change before the envelope is rebuilt with a new bucket width
+
+
+_Envelope
+    min/max-per-column envelope of the plotted window updated incrementally
 
 CustomGraphicsLayoutWidget
     PyQtGraph fast widget to display live plots
 """
 
 import multiprocessing.connection
+import time
 
 import numpy as np
 
 import pyqtgraph
 
 from PyQt5.QtCore import QTimer
-from PyQt5.QtWidgets import QVBoxLayout
+from PyQt5.QtWidgets import QVBoxLayout, QLabel
 
 # local imports
 import remotecontroller
@@ -32,8 +44,107 @@ import remotecontroller
 
 
 STREAM_PIPE_OVERFLOW_NUM_POINTS_THRESHOLD = 50
-STREAM_PIPE_OVERFLOW_CHECK_TIME_PERIOD_MS = 10000
+STREAM_PIPE_OVERFLOW_CHECK_TIME_PERIOD_MS = 1000
 STREAM_PIPE_OVERFLOW_WARNING_SIGN_DURATION = 5000
+STATUS_LABELS_UPDATE_PERIOD_MS = 1000
+
+ENVELOPE_DEFAULT_COLUMNS = 1000
+ENVELOPE_RESCALE_RATIO = 2.0
+
+
+
+class _Envelope:
+    """
+    Min/max envelope of a window of points. The time axis is divided into buckets of the fixed width (one bucket per
+    pixel column) aligned to the absolute time so new points are merged into the existing buckets and old buckets are
+    cut off without revisiting points. Rendering the envelope costs 2 points per column regardless of how many points
+    the window holds and no spike is lost
+    """
+
+    def __init__(self, channels: int):
+        self.channels = channels
+        self.bucketWidth = None
+        self._clear()  # 'keys' are bucket indexes (time // bucketWidth), 'mins' and 'maxs' are their values
+
+    def reset(self, bucketWidth: float, timestamps: np.ndarray, data: np.ndarray) -> None:
+        """
+        Rebuild the envelope with the new bucket width
+
+        :param bucketWidth: bucket (pixel column) width in seconds
+        :param timestamps: times of points in ascending order
+        :param data: points shaped as (n, channels)
+        :return: None
+        """
+
+        order = np.argsort(timestamps, kind='stable')  # the window may be out of order after a jump of the clock
+
+        self.bucketWidth = bucketWidth
+        self._clear()
+        self.append(timestamps[order], data[order])
+
+    def _clear(self) -> None:
+        self.keys = np.empty(0, dtype=np.int64)
+        self.mins = np.empty((0, self.channels))
+        self.maxs = np.empty((0, self.channels))
+
+    def append(self, timestamps: np.ndarray, data: np.ndarray) -> None:
+        """
+        Merge new points (not older than previous ones) into the envelope
+
+        :param timestamps: times of points in ascending order
+        :param data: points shaped as (n, channels)
+        :return: None
+        """
+
+        if not len(timestamps):
+            return
+
+        keys = np.floor_divide(timestamps, self.bucketWidth).astype(np.int64)
+        starts = np.flatnonzero(np.diff(keys, prepend=keys[0] - 1))  # first point of every bucket
+        keys = keys[starts]
+        mins = np.minimum.reduceat(data, starts, axis=0)
+        maxs = np.maximum.reduceat(data, starts, axis=0)
+
+        if len(self.keys) and keys[0] < self.keys[-1]:  # time has gone backwards (e.g. replay seek), start over
+            self._clear()
+
+        # the first new bucket may continue the last existing one
+        if len(self.keys) and keys[0] == self.keys[-1]:
+            self.mins[-1] = np.minimum(self.mins[-1], mins[0])
+            self.maxs[-1] = np.maximum(self.maxs[-1], maxs[0])
+            keys, mins, maxs = keys[1:], mins[1:], maxs[1:]
+
+        self.keys = np.concatenate((self.keys, keys))
+        self.mins = np.concatenate((self.mins, mins))
+        self.maxs = np.concatenate((self.maxs, maxs))
+
+    def trim(self, oldest: float) -> None:
+        """
+        Drop buckets lying entirely before the given time
+
+        :param oldest: time of the oldest point of the window
+        :return: None
+        """
+
+        start = np.searchsorted(self.keys, np.floor_divide(oldest, self.bucketWidth))
+        if start:
+            self.keys = self.keys[start:]
+            self.mins = self.mins[start:]
+            self.maxs = self.maxs[start:]
+
+    def render(self) -> tuple:
+        """
+        Curves' data: minimum and maximum of every bucket placed at the bucket middle so the line draws a vertical
+        stroke per column
+
+        :return: (times array, (2*buckets, channels) values array)
+        """
+
+        times = np.repeat((self.keys + 0.5) * self.bucketWidth, 2)
+        values = np.empty((2*len(self.keys), self.channels))
+        values[0::2] = self.mins
+        values[1::2] = self.maxs
+        return times, values
 
 
 
@@ -73,8 +184,10 @@ class CustomGraphicsLayoutWidget(pyqtgraph.GraphicsLayoutWidget):
             self, names: tuple=("Process Variable", "Controller Output"), numPoints: int=200, interval: int=17,
             ranges: tuple=((-2.0, 2.0), (-2.0, 2.0)), units: tuple=('Monkeys', 'Parrots'),
             controlPipe: multiprocessing.connection.Connection=None,
-            streamPipeRX: multiprocessing.connection.Connection=None,
+            streamBuffer: remotecontroller.StreamBuffer=None,
             theme: str='dark',
+            clock=time.time,
+            listenerStatus=None
     ):
         """
         Graphs' constructor. Lengths of tuple arguments should be equal and each item in them should respectively match
@@ -86,12 +199,18 @@ class CustomGraphicsLayoutWidget(pyqtgraph.GraphicsLayoutWidget):
         :param ranges: tuple of tuples with (min,max) values of each plot respectively
         :param units: tuple of strings representing measurement unit of each plot
         :param controlPipe: multiprocessing.Connection instance to communicate with a stream source
-        :param streamPipeRX: multiprocessing.Connection instance from where new points should arrive
+        :param streamBuffer: remotecontroller.StreamBuffer instance from where new points should arrive
         :param theme: string representing visual appearance of the widget ('light' or 'dark')
+        :param clock: function returning the current time in the same base as stream buffer' timestamps (time.time() of
+        the live stream, recording time for the replay)
+        :param listenerStatus: [optional] object with 'forwarded' and 'decimation' attributes published by the stream
+        source (e.g. RemoteController.listener_status). Overflow checks and the decimation display read it directly,
+        without 'controlPipe' round trips
         """
 
-        # lengths of tuple arguments should be equal
+        # lengths of tuple arguments should be equal and match the stream layout
         assert len(names) == len(ranges) == len(units)
+        assert streamBuffer is None or streamBuffer.channels == len(names)
 
         # need to set a theme before any other pyqtgraph operations
         if theme != 'dark':
@@ -110,11 +229,20 @@ class CustomGraphicsLayoutWidget(pyqtgraph.GraphicsLayoutWidget):
         self.ranges = list(ranges)
 
         # X (time) axis is "starting" at the right border (current time) and goes to the past to the left (negative
-        # time). It remains the same for an entire Graphs lifetime
+        # time). Points are placed by their actual receive times (taken from the stream buffer) so jitter and lost
+        # packets are visible. 'timeAxes' is the initial uniform placement used until real points arrive
         self.timeAxes = np.linspace(-numPoints * interval, 0, numPoints)
+        self.clock = clock
+
+        # plotted window is kept in ring arrays ('_head' is the position of the oldest point) and is rendered either as
+        # is or, when it has more points than the plot has pixel columns, as the min/max envelope
+        self.timestamps = self.clock() + self.timeAxes * 0.001
+        self.data = np.zeros((numPoints, len(names)))
+        self._head = 0
+        self._envelope = _Envelope(len(names))
 
 
-        if controlPipe is not None and streamPipeRX is not None:
+        if controlPipe is not None and streamBuffer is not None:
             self._isOfflineMode = False
 
             self.controlPipe = controlPipe
@@ -122,7 +250,9 @@ class CustomGraphicsLayoutWidget(pyqtgraph.GraphicsLayoutWidget):
             self.overflowCheckTimer = QTimer()
             self.overflowCheckTimer.timeout.connect(self._overflowCheck)
 
-            self.streamPipeRX = streamPipeRX
+            self.streamBuffer = streamBuffer
+            self.listenerStatus = listenerStatus
+            self._forwardedBaseline = 0
         else:
             self._isOfflineMode = True
 
@@ -161,6 +291,16 @@ class CustomGraphicsLayoutWidget(pyqtgraph.GraphicsLayoutWidget):
         self.warningSignRemoveTimer.setInterval(STREAM_PIPE_OVERFLOW_WARNING_SIGN_DURATION)
         self.warningSignRemoveTimer.timeout.connect(self._removeWarningSign)
 
+        # statistics of intervals between receive times of plotted points and the current decimation of the stream
+        self.interArrivalLabel = QLabel()
+        self.interArrivalLabel.setToolTip("Intervals between arrivals of plotted points: mean ± standard deviation, "
+                                          "maximum and number of gaps (intervals longer than twice the mean)")
+        self.decimationLabel = QLabel()
+        self.decimationLabel.setToolTip("When plotting falls behind the stream, the stream is thinned out keeping "
+                                        "minimum and maximum values (decimation) instead of dropping points")
+        self.statusLabelsTimer = QTimer()
+        self.statusLabelsTimer.timeout.connect(self._updateStatusLabels)
+
 
     @property
     def isRun(self) -> bool:
@@ -187,31 +327,34 @@ class CustomGraphicsLayoutWidget(pyqtgraph.GraphicsLayoutWidget):
         """
 
         self.graphs[0].removeItem(self._warningSign)
+        self._warningSign = None
 
 
     def _overflowCheck(self) -> None:
         """
-        Procedure to check the stream pipe overflow. When a rate of incoming stream socket packets is faster than an
-        update time period of this graphs (i.e. pipe' readings) an internal buffer of the pipe entity will grow. We
-        responsible for the detection of such situations because quite soon after this the entire connection tends to
-        be an unresponsive
+        Procedure to check the stream buffer overflow. When a rate of incoming stream socket packets is faster than we
+        are able to plot them the stream buffer grows. The listener responds by the adaptive decimation (see
+        remotecontroller.STREAM_DECIMATION_MODES) so the stream is never stopped, we only notify a user that not every
+        point is plotted
 
         :return: None
         """
 
-        # request to read a points (messages) counter
-        self.controlPipe.send(remotecontroller.InputThreadCommand.MSG_CNT_GET)
-        if self.controlPipe.poll(timeout=0.1):  # wait for it ...
+        if self.listenerStatus is not None:
+            # counters published by the stream source in the shared memory, no round trip
+            input_thread_points_cnt = self.listenerStatus.forwarded - self._forwardedBaseline
+        else:
+            # request to read a points (messages) counter
+            self.controlPipe.send(remotecontroller.InputThreadCommand.MSG_CNT_GET)
+            if not self.controlPipe.poll(timeout=0.1):  # wait for it ...
+                return
             input_thread_points_cnt = self.controlPipe.recv()  # ... and read it
 
-            print(f'sock: {input_thread_points_cnt}, plot: {self.pointsCnt}')
-
-            # compare the local points counter with gotten one (overflow condition)
-            if input_thread_points_cnt - self.pointsCnt > STREAM_PIPE_OVERFLOW_NUM_POINTS_THRESHOLD:
-                self.stop()  # stop incoming stream and flush the pipe
+        # compare the local points counter with gotten one (overflow condition)
+        if input_thread_points_cnt - self.pointsCnt > STREAM_PIPE_OVERFLOW_NUM_POINTS_THRESHOLD:
+            if self._warningSign is None:
                 self._addWarningSign()  # notify a user
-                self.warningSignRemoveTimer.start()
-                self.start()  # restart the stream
+            self.warningSignRemoveTimer.start()
 
 
     def start(self) -> None:
@@ -222,12 +365,19 @@ class CustomGraphicsLayoutWidget(pyqtgraph.GraphicsLayoutWidget):
         """
 
         # reset data cause it has changed during the pause time
+        self.timestamps = self.clock() + self.timeAxes * 0.001
+        self.data[:] = 0.0
+        self._head = 0
+        self._envelope.bucketWidth = None
         for graph in self.graphs:
             graph.curves[0].setData(self.timeAxes, np.zeros(self.nPoints))
 
         self.updateTimer.start(self.interval)
+        self.statusLabelsTimer.start(STATUS_LABELS_UPDATE_PERIOD_MS)
 
         if not self._isOfflineMode:
+            if self.listenerStatus is not None:
+                self._forwardedBaseline = self.listenerStatus.forwarded  # counters are never reset
             self.overflowCheckTimer.start(STREAM_PIPE_OVERFLOW_CHECK_TIME_PERIOD_MS)
             self.controlPipe.send(remotecontroller.InputThreadCommand.STREAM_ACCEPT)  # send command to allow stream
 
@@ -242,18 +392,15 @@ class CustomGraphicsLayoutWidget(pyqtgraph.GraphicsLayoutWidget):
         """
 
         self.updateTimer.stop()
+        self.statusLabelsTimer.stop()
 
         if not self._isOfflineMode:
             self.overflowCheckTimer.stop()
             self.controlPipe.send(remotecontroller.InputThreadCommand.STREAM_REJECT)
             self.controlPipe.send(remotecontroller.InputThreadCommand.MSG_CNT_RST)  # reset remote counter
 
-            # flush the stream pipe
-            while True:
-                if self.streamPipeRX.poll():
-                    self.streamPipeRX.recv()
-                else:
-                    break
+            # flush the stream buffer
+            self.streamBuffer.flush()
 
         self.pointsCnt = 0  # reset local counter
         self._isRun = False
@@ -272,33 +419,128 @@ class CustomGraphicsLayoutWidget(pyqtgraph.GraphicsLayoutWidget):
             self.start()
 
 
+    def interArrivalStats(self) -> dict:
+        """
+        Statistics of intervals between receive times of currently plotted points (see
+        remotecontroller.interarrival_stats())
+
+        :return: dictionary or None if there are not enough points yet
+        """
+
+        timestamps = np.roll(self.timestamps, -self._head)  # chronological order
+        return remotecontroller.interarrival_stats(timestamps[-min(self.pointsCnt, self.nPoints):].tolist())
+
+
+    def _updateStatusLabels(self) -> None:
+        """
+        Refresh the inter-arrival statistics and the decimation labels
+
+        :return: None
+        """
+
+        decimation = 1
+        if not self._isOfflineMode and self.listenerStatus is not None:
+            decimation = self.listenerStatus.decimation or 1  # zero until the listener has started
+        self.decimationLabel.setText("Full rate" if decimation == 1 else
+                                     f"<font color='red'>Decimation 1:{decimation}</font>")
+
+        stats = self.interArrivalStats()
+        if stats is None:
+            self.interArrivalLabel.setText("Inter-arrival: n/a")
+        else:
+            self.interArrivalLabel.setText(f"Inter-arrival: {stats['mean']*1e3:.2f} ± {stats['stdev']*1e3:.2f} ms, "
+                                           f"max {stats['max']*1e3:.2f} ms, gaps {stats['gaps']}")
+
+
+    def _renderEnvelope(self, columns: int, timestamps: np.ndarray, points: np.ndarray) -> tuple:
+        """
+        Bring the envelope up to date with the new points and render it. The envelope is rebuilt from the whole window
+        only when the bucket width does not correspond to the displayed time span anymore (by ENVELOPE_RESCALE_RATIO),
+        e.g. the stream rate or the plot width has changed
+
+        :param columns: number of pixel columns of the plot
+        :param timestamps: times of the new points
+        :param points: new points shaped as (n, channels)
+        :return: (times array, (2*buckets, channels) values array)
+        """
+
+        oldest = self.timestamps[self._head]
+        span = max(self.timestamps[self._head - 1] - oldest, 1e-9)
+        bucketWidth = span / columns
+
+        envelope = self._envelope
+        if envelope.bucketWidth is None or not \
+                1/ENVELOPE_RESCALE_RATIO <= bucketWidth / envelope.bucketWidth <= ENVELOPE_RESCALE_RATIO:
+            envelope.reset(bucketWidth, np.roll(self.timestamps, -self._head), np.roll(self.data, -self._head, axis=0))
+        else:
+            envelope.append(timestamps, points)
+            envelope.trim(oldest)
+
+        return envelope.render()
+
+
     def _update(self) -> None:
         """
-        Routine to get a new data and plot it (i.e. redraw graphs)
+        Routine to get a new data and plot it (i.e. redraw graphs). All points accumulated in the stream buffer since
+        the last call are plotted at once at their receive times. Graphs keep moving to the left even if nothing arrives
 
         :return: None
         """
 
+        frames = None
+        now = self.clock()
+
         # use fake (random) numbers in offline mode
         if self._isOfflineMode:
-            self.lastPoint = -0.5 + np.random.random(len(self.lastPoint))
+            points = -0.5 + np.random.random((1, len(self.lastPoint)))
+            timestamps = np.array([now])
             self.pointsCnt += 1
         else:
             try:
-                if self.streamPipeRX.poll():
-                    point = self.streamPipeRX.recv()
-                    self.lastPoint = point
-                    self.pointsCnt += 1
-            except OSError:  # may occur during an exit mess
+                frames = self.streamBuffer.peek(max_frames=self.nPoints)
+            except (ValueError, TypeError):  # may occur during an exit mess (buffer has been already closed)
                 pass
 
-        # shift points array on 1 position to free up the place for a new point
-        for point, graph, averageLabel in zip(self.lastPoint, self.graphs, self.averageLabels):
-            data = np.roll(graph.curves[0].getData()[1], -1)
-            data[-1] = point
-            graph.curves[0].setData(self.timeAxes, data)
-            averageLabel.setValue(point)
+            if frames is not None:
+                points = np.asarray(frames)  # zero-copy view of the shared memory
+                if self.streamBuffer.timestamps:
+                    frameTimestamps = self.streamBuffer.peek_timestamps(len(frames))
+                    timestamps = np.array(frameTimestamps)
+                    frameTimestamps.release()
+                else:
+                    timestamps = np.full(len(points), now)
+                self.pointsCnt += len(points)
+            else:
+                points = np.empty((0, len(self.lastPoint)))
+                timestamps = np.empty(0)
+
+        if len(points):
+            self.lastPoint = points[-1].copy()
+            for column, averageLabel in zip(points.T, self.averageLabels):
+                averageLabel.setValue(column.mean())
+
+            # write new points over the oldest ones
+            positions = (self._head + np.arange(len(points))) % self.nPoints
+            self.data[positions] = points
+            self.timestamps[positions] = timestamps
+            self._head = (self._head + len(points)) % self.nPoints
+
+        columns = int(self.graphs[0].getViewBox().width()) or ENVELOPE_DEFAULT_COLUMNS
+        if self.nPoints > 2*columns:
+            times, data = self._renderEnvelope(columns, timestamps, points)
+        else:
+            times = np.roll(self.timestamps, -self._head)
+            data = np.roll(self.data, -self._head, axis=0)
+
+        timeAxes = (times - now) * 1000  # milliseconds to the past
+        for column, graph in zip(data.T, self.graphs):
+            graph.curves[0].setData(timeAxes, column)
 
+        # all points have been copied into the graphs so give the place back to the producer
+        if frames is not None:
+            del points, column
+            self.streamBuffer.consume(len(frames))
+            frames.release()
 
 
 if __name__ == '__main__':
@@ -319,6 +561,8 @@ if __name__ == '__main__':
     layout.addWidget(graphs)
     for label in graphs.averageLabels:
         layout.addWidget(label)
+    layout.addWidget(graphs.interArrivalLabel)
+    layout.addWidget(graphs.decimationLabel)
 
     window.show()
     sys.exit(app.exec_())
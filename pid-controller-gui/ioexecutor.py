@@ -0,0 +1,186 @@
+"""
+ioexecutor.py - running RemoteController requests outside of the Qt main thread
+
+
+IO_EXECUTOR_EXIT_TIMEOUT
+    time to wait for the worker thread to complete the current call on shutdown (in milliseconds)
+
+IOCall
+    single submitted call: function, arguments, callbacks and the outcome
+
+IOExecutor
+    QObject running submitted calls one by one in the dedicated QThread and delivering outcomes to the main thread
+"""
+
+import traceback
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+
+
+#
+# timeouts in milliseconds
+#
+IO_EXECUTOR_EXIT_TIMEOUT = 10000
+
+
+
+class IOCall:
+    """
+    Single call submitted to the IOExecutor. Either 'result' or 'exception' is set after the call is done
+    """
+
+    def __init__(self, function, args: tuple, onResult=None, onError=None):
+        """
+        IOCall constructor
+
+        :param function: callable to run in the worker thread
+        :param args: positional arguments for the function
+        :param onResult: [optional] callable accepting the returned value, invoked in the main thread
+        :param onError: [optional] callable accepting the raised exception, invoked in the main thread
+        """
+
+        self.function = function
+        self.args = args
+        self.onResult = onResult
+        self.onError = onError
+
+        self.result = None
+        self.exception = None
+
+
+    def run(self) -> None:
+        """
+        Invoke the function and store its outcome (called in the worker thread)
+
+        :return: None
+        """
+
+        try:
+            self.result = self.function(*self.args)
+        except Exception as e:
+            self.exception = e
+
+
+
+class _IOWorker(QObject):
+    """
+    Lives in the worker thread and runs calls in the order of their arrival
+    """
+
+    done = pyqtSignal(object)
+
+    @pyqtSlot(object)
+    def run(self, call: IOCall) -> None:
+        call.run()
+        self.done.emit(call)
+
+
+
+class IOExecutor(QObject):
+    """
+    Runs blocking RemoteController requests in the dedicated QThread so waiting for the controller' responses never
+    freezes the GUI (and live graphs in particular). There is exactly one worker thread: RemoteController is not
+    thread-safe and its requests are not interleaved anyway, so calls are serialized in the order of submitting.
+    Callbacks are invoked in the main thread (the thread the executor has been created in) and can safely touch
+    widgets. Functions themselves must not touch widgets.
+
+    Usage example:
+
+        executor = IOExecutor()
+        executor.submit(conn.read, 'setpoint', onResult=lambda value: label.setText(str(value)))
+        ...
+        executor.shutdown()
+
+    """
+
+    # number of calls submitted but not yet delivered (e.g. to display the 'busy' indicator)
+    pendingChanged = pyqtSignal(int)
+
+    _submitted = pyqtSignal(object)
+
+
+    def __init__(self, parent=None):
+        """
+        IOExecutor constructor. Starts the worker thread
+
+        :param parent: [optional] parent class
+        """
+
+        super(IOExecutor, self).__init__(parent)
+
+        self._pending = 0
+
+        self._thread = QThread()
+        self._worker = _IOWorker()
+        self._worker.moveToThread(self._thread)
+
+        # both connections are queued as the worker and the executor live in different threads
+        self._submitted.connect(self._worker.run)
+        self._worker.done.connect(self._deliver)
+
+        self._thread.start()
+
+
+    @property
+    def pending(self) -> int:
+        """number of calls submitted but not yet delivered"""
+        return self._pending
+
+
+    def submit(self, function, *args, onResult=None, onError=None) -> IOCall:
+        """
+        Schedule the call in the worker thread
+
+        :param function: callable to run, e.g. bound RemoteController method
+        :param args: positional arguments for the function
+        :param onResult: [optional] callable accepting the returned value, invoked in the main thread
+        :param onError: [optional] callable accepting the raised exception, invoked in the main thread. The traceback
+        is printed if not specified
+        :return: IOCall instance
+        """
+
+        call = IOCall(function, args, onResult=onResult, onError=onError)
+
+        self._pending += 1
+        self.pendingChanged.emit(self._pending)
+        self._submitted.emit(call)
+
+        return call
+
+
+    @pyqtSlot(object)
+    def _deliver(self, call: IOCall) -> None:
+        """
+        Invoke callbacks of the done call (in the main thread)
+
+        :param call: IOCall instance
+        :return: None
+        """
+
+        self._pending -= 1
+        self.pendingChanged.emit(self._pending)
+
+        if call.exception is not None:
+            if call.onError is not None:
+                call.onError(call.exception)
+            else:
+                traceback.print_exception(type(call.exception), call.exception, call.exception.__traceback__)
+        elif call.onResult is not None:
+            call.onResult(call.result)
+
+
+    def shutdown(self) -> None:
+        """
+        Stop the worker thread. The call in progress is waited for, calls not started yet are discarded and callbacks
+        are not invoked anymore
+
+        :return: None
+        """
+
+        if not self._thread.isRunning():
+            return
+
+        self._worker.done.disconnect(self._deliver)
+        self._thread.quit()
+        self._thread.wait(IO_EXECUTOR_EXIT_TIMEOUT)
@@ -2,6 +2,15 @@
 main.py - Main script
 
 
+STARTUP_PHASES
+    startup phases timed by MainApplication and their descriptions
+
+STARTUP_MESSAGE_TIMEOUT
+    time for which the statusbar' startup message is displaying
+
+SNAPSHOTS_LIST_LIMIT
+    number of the most recent stored snapshots offered for restoring
+
 MainApplication
     customized QApplication which encapsulates settings, controller remote connection
 
@@ -10,25 +19,60 @@ MainWindow
 
 CentralWidget
     remaining UI elements such as PID values GroupBox'es, live graphs
+
+Command line arguments:
+    --replay PATH      display the recording instead of the live stream (see replay.py)
+    --speed N          initial replay speed (0 is as fast as possible)
+    --profile-startup  print durations of startup phases and exit once the startup is complete
+
+Heavy modules (pyqtgraph and numpy through graphs.py and replay.py, qdarkstyle) and modules of secondary windows
+(about.py, errorssettings.py) are imported on first use
 """
 
+import time
+_IMPORTS_BEGIN = time.perf_counter()  # imports of this module are the first startup phase
+
+import argparse
 import multiprocessing
+import os
 import sys
 
-from PyQt5.QtCore import Qt, QCoreApplication, QTimer, pyqtSlot, pyqtSignal
-from PyQt5.QtWidgets import QApplication, QWidget, QMainWindow, QGridLayout, QHBoxLayout, QLabel, QAction
+from PyQt5.QtCore import Qt, QCoreApplication, QTimer, QStandardPaths, pyqtSlot, pyqtSignal
+from PyQt5.QtWidgets import QApplication, QWidget, QMainWindow, QGridLayout, QHBoxLayout, QLabel, QAction, QComboBox,\
+                            QSlider
 from PyQt5.QtGui import QIcon
 
-import qdarkstyle
-
 # local imports
 import util
 import remotecontroller
+import ioexecutor
 import miscgraphics
-import graphs
 import settings
-import errorssettings
-import about
+import snapshotstore
+
+_IMPORTS_END = time.perf_counter()
+
+
+
+#
+# startup phases in the order of completion: the window is shown first, the connection check and the values reading are
+# performed in the background
+#
+STARTUP_PHASES = {
+    'window': "main window shown",
+    'connection': "connection checked",
+    'values': "controller values received"
+}
+
+#
+# timeouts in milliseconds
+#
+STARTUP_MESSAGE_TIMEOUT = 5000
+
+#
+# snapshots of the controller (see snapshotstore.py) listed in the toolbar, the most recent first
+#
+SNAPSHOTS_LIST_LIMIT = 20
 
 
 
@@ -51,58 +95,110 @@ class CentralWidget(QWidget):
 
         self.app = app
 
-        grid = QGridLayout()
-        self.setLayout(grid)
+        self.grid = QGridLayout()
+        self.setLayout(self.grid)
 
 
+        # values arrive with the startup snapshot (see MainApplication.snapshotDone()) so no own requests are made
         self.contValGroupBoxes = [
-            miscgraphics.ValueGroupBox('setpoint', float_fmt=app.settings['pid']['valueFormat'], conn=app.conn),
-            miscgraphics.ValueGroupBox('kP', float_fmt=app.settings['pid']['valueFormat'], conn=app.conn),
-            miscgraphics.ValueGroupBox('kI', float_fmt=app.settings['pid']['valueFormat'], conn=app.conn),
-            miscgraphics.ValueGroupBox('kD', float_fmt=app.settings['pid']['valueFormat'], conn=app.conn)
+            miscgraphics.ValueGroupBox(label, float_fmt=app.settings['pid']['valueFormat'], conn=app.conn,
+                                       executor=app.ioExecutor, refresh=False)
+            for label in ('setpoint', 'kP', 'kI', 'kD')
         ]
 
         for groupBox, yPosition in zip(self.contValGroupBoxes, [0,3,6,9]):
-            grid.addWidget(groupBox, yPosition, 0, 3, 2)
-
-
-        self.graphs = graphs.CustomGraphicsLayoutWidget(
-            names=(app.settings['pid']['processVariable']['name'],
-                   app.settings['pid']['controllerOutput']['name']),
-            numPoints=app.settings['graphs']['numberOfPoints'],
-            interval=app.settings['graphs']['updateInterval'],
-            ranges=((app.settings['pid']['processVariable']['limits']['min'],
-                     app.settings['pid']['processVariable']['limits']['max']),
-                    (app.settings['pid']['controllerOutput']['limits']['min'],
-                     app.settings['pid']['controllerOutput']['limits']['max'])),
-            units=(app.settings['pid']['processVariable']['unit'],
-                   app.settings['pid']['controllerOutput']['unit']),
-            controlPipe=None if app.isOfflineMode else app.conn.input_thread_control_pipe_main,
-            streamPipeRX=None if app.isOfflineMode else app.conn.stream.pipe_rx,
-            theme=app.settings['appearance']['theme'],
-        )
-
-        for averageLabel, name, yPosition in zip(self.graphs.averageLabels, self.graphs.names, [12,13]):
+            groupBox.setPending(True)
+            self.grid.addWidget(groupBox, yPosition, 0, 3, 2)
+
+
+        # graphs depend on the stream layout which is known only after the connection check (see createGraphs()) so
+        # they are substituted by the placeholder till then
+        self.graphs = None
+        self.graphsPlaceholder = QLabel("Connecting to the controller...")
+        self.grid.addWidget(self.graphsPlaceholder, 0, 2, 12, 6, alignment=Qt.AlignCenter)
+
+
+    def createGraphs(self) -> None:
+        """
+        Create live graphs (one plot per channel of the stream layout negotiated with the controller or of the
+        recording) and put them in place of the placeholder
+
+        :return: None
+        """
+
+        app = self.app
+        grid = self.grid
+
+        grid.removeWidget(self.graphsPlaceholder)
+        self.graphsPlaceholder.deleteLater()
+
+        with app.profiler.phase("import graphs"):
+            import graphs  # brings pyqtgraph and numpy
+
+        channels = app.settings.streamChannels(app.streamSource.buffer.channels)
+        with app.profiler.phase("graphs"):
+            self.graphs = graphs.CustomGraphicsLayoutWidget(
+                names=[channel['name'] for channel in channels],
+                numPoints=app.settings['graphs']['numberOfPoints'],
+                interval=app.settings['graphs']['updateInterval'],
+                ranges=[(channel['limits']['min'], channel['limits']['max']) for channel in channels],
+                units=[channel['unit'] for channel in channels],
+                controlPipe=app.streamControlPipe,
+                streamBuffer=None if app.streamControlPipe is None else app.streamSource.buffer,
+                theme=app.settings['appearance']['theme'],
+                clock=time.time if app.replay is None else lambda: app.replay.position,
+                listenerStatus=app.conn.listener_status if app.replay is None else app.replay.status
+            )
+
+        yPosition = 12
+        for averageLabel, name in zip(self.graphs.averageLabels, self.graphs.names):
             hBox = QHBoxLayout()
             hBox.addWidget(QLabel(name))
             hBox.addWidget(averageLabel, alignment=Qt.AlignLeft)
             grid.addLayout(hBox, yPosition, 0, 1, 2)
+            yPosition += 1
+        grid.addWidget(self.graphs.interArrivalLabel, yPosition, 0, 1, 2)
+        grid.addWidget(self.graphs.decimationLabel, yPosition + 1, 0, 1, 2)
 
-        grid.addWidget(self.graphs, 0, 2, 14, 6)
+        grid.addWidget(self.graphs, 0, 2, yPosition + 2, 6)
 
 
     def updateDisplayingValues(self) -> None:
         """
         Retrieve all controller parameters and update corresponding GUI elements. Useful to apply after connection's
-        breaks. This does not affect values saved during the app launch (RemoteController.save_current_values())
+        breaks. This does not affect values saved during the app launch (RemoteController.save_current_values()). All
+        values are read at once in a pipelined manner in the background (see ioexecutor.py), widgets stay in the
+        pending state till then
+
+        :return: None
+        """
+
+        for groupBox in self.contValGroupBoxes:
+            groupBox.setPending(True)
+
+        self.app.ioExecutor.submit(self.app.conn.read_many,
+                                   [groupBox.label for groupBox in self.contValGroupBoxes] +
+                                   ['err_P_limits', 'err_I_limits'],
+                                   onResult=self.displayValues,
+                                   onError=lambda exception: self.displayValues(None))
 
+
+    def displayValues(self, values: dict) -> None:
+        """
+        Show values read by updateDisplayingValues() or taken with the startup snapshot and leave the pending state
+
+        :param values: dictionary of values names and values (None if the request has failed)
         :return: None
         """
 
         for groupBox in self.contValGroupBoxes:
-            groupBox.refreshVal()
+            groupBox.setPending(False)
+            if values is not None:
+                groupBox.displayVal(values[groupBox.label])
 
-        self.app.mainWindow.errorsSettingsWindow.updateDisplayingValues('err_P_limits', 'err_I_limits')
+        # the window reads values by itself when it is shown for the first time
+        if values is not None and self.app.mainWindow.errorsSettingsWindow is not None:
+            self.app.mainWindow.errorsSettingsWindow.displayValues(values)
 
 
 
@@ -124,6 +220,11 @@ class MainWindow(QMainWindow):
 
         self.app = app
 
+        # secondary windows are created on first use (see show*Window() methods)
+        self.aboutWindow = None
+        self.settingsWindow = None
+        self.errorsSettingsWindow = None
+
         self.setWindowTitle(QCoreApplication.applicationName())
         self.setWindowIcon(QIcon(util.resource_path('../img/icon.png')))
 
@@ -139,14 +240,12 @@ class MainWindow(QMainWindow):
         aboutAction = QAction(QIcon(util.resource_path('../img/info.png')), 'About', self)  # see about.py
         aboutAction.setShortcut('Ctrl+I')
         aboutAction.setStatusTip("[Ctrl+I] Application Info & About")
-        self.aboutWindow = about.AboutWindow()
-        aboutAction.triggered.connect(self.aboutWindow.show)
+        aboutAction.triggered.connect(self.showAboutWindow)
 
         settingsAction = QAction(QIcon(util.resource_path('../img/settings.png')), 'Settings', self)  # see settings.py
         settingsAction.setShortcut('Ctrl+P')
         settingsAction.setStatusTip("[Ctrl+P] Application Settings")
-        self.settingsWindow = settings.SettingsWindow(app=app)
-        settingsAction.triggered.connect(self.settingsWindow.show)
+        settingsAction.triggered.connect(self.showSettingsWindow)
 
         appToolbar = self.addToolBar('app')  # internal name
         appToolbar.setToolButtonStyle(Qt.ToolButtonTextBesideIcon)
@@ -161,23 +260,30 @@ class MainWindow(QMainWindow):
         errorsSettingsAction = QAction(QIcon(util.resource_path('../img/set_errors.png')), 'Errors limits', self)
         errorsSettingsAction.setShortcut('E')
         errorsSettingsAction.setStatusTip("[E] Set values of errors limits")
-        self.errorsSettingsWindow = errorssettings.ErrorsSettingsWindow(app=app)
-        errorsSettingsAction.triggered.connect(self.errorsSettingsWindow.show)
+        errorsSettingsAction.triggered.connect(self.showErrorsSettingsWindow)
 
         restoreValuesAction = QAction(QIcon(util.resource_path('../img/restore.png')), 'Restore controller', self)
         restoreValuesAction.setShortcut('R')
-        restoreValuesAction.setStatusTip("[R] Restore all controller parameters to values at the program start time")
+        restoreValuesAction.setStatusTip("[R] Restore all controller parameters to values of the selected snapshot")
         restoreValuesAction.triggered.connect(self.restoreContValues)
+        restoreValuesAction.setEnabled(False)  # till the startup snapshot is taken
+        self.restoreValuesAction = restoreValuesAction
+
+        # snapshots are taken at every program start and kept in the store (see MainApplication.snapshotDone())
+        self.snapshotsComboBox = QComboBox()
+        self.snapshotsComboBox.setStatusTip("Snapshot to restore (taken at the program start time)")
 
         saveToEEPROMAction = QAction(QIcon(util.resource_path('../img/eeprom.png')), 'Save to EEPROM', self)
         saveToEEPROMAction.setShortcut('S')
         saveToEEPROMAction.setStatusTip("[S] Save current controller configuration to EEPROM")
         saveToEEPROMAction.triggered.connect(self.saveToEEPROM)
+        self.saveToEEPROMAction = saveToEEPROMAction
 
         contToolbar = self.addToolBar('controller')  # internal name
         contToolbar.setToolButtonStyle(Qt.ToolButtonTextBesideIcon)
         contToolbar.addAction(errorsSettingsAction)
         contToolbar.addAction(restoreValuesAction)
+        contToolbar.addWidget(self.snapshotsComboBox)
         contToolbar.addAction(saveToEEPROMAction)
 
         #
@@ -187,6 +293,8 @@ class MainWindow(QMainWindow):
         playpauseAction.setShortcut('P')
         playpauseAction.setStatusTip("[P] Play/pause graphs")
         playpauseAction.triggered.connect(self.playpauseGraphs)
+        playpauseAction.setEnabled(False)  # till graphs are created
+        self.playpauseAction = playpauseAction
 
         graphsToolbar = self.addToolBar('graphs')  # internal name
         graphsToolbar.setToolButtonStyle(Qt.ToolButtonTextBesideIcon)
@@ -196,6 +304,29 @@ class MainWindow(QMainWindow):
         self.playpauseButton.setChecked(True)
         self.graphsWereRun = False
 
+        # replay controls: playback speed and position (also allows to seek)
+        if self.app.replay is not None:
+            import replay
+
+            self.replaySpeedComboBox = QComboBox()
+            self.replaySpeedComboBox.setStatusTip("Replay speed")
+            for speed in replay.REPLAY_SPEEDS:
+                self.replaySpeedComboBox.addItem("Max" if speed is None else f"{speed:g}x", speed)
+            self.replaySpeedComboBox.setCurrentIndex(max(self.replaySpeedComboBox.findData(self.app.replay.speed), 0))
+            self.replaySpeedComboBox.currentIndexChanged.connect(self.setReplaySpeed)
+            graphsToolbar.addWidget(self.replaySpeedComboBox)
+
+            self.replayPositionSlider = QSlider(Qt.Horizontal)
+            self.replayPositionSlider.setRange(0, 1000)
+            self.replayPositionSlider.setMinimumWidth(200)
+            self.replayPositionSlider.setStatusTip("Replay position")
+            self.replayPositionSlider.sliderReleased.connect(self.seekReplay)
+            graphsToolbar.addWidget(self.replayPositionSlider)
+
+            self.replayPositionTimer = QTimer()
+            self.replayPositionTimer.timeout.connect(self.updateReplayPosition)
+            self.replayPositionTimer.start(200)
+
 
         mainMenu = self.menuBar().addMenu('&Menu')
         mainMenu.addAction(aboutAction)
@@ -203,15 +334,77 @@ class MainWindow(QMainWindow):
         mainMenu.addAction(exitAction)
 
 
-        if self.app.isOfflineMode:
-            self.statusBar().addWidget(QLabel("<font color='red'>Offline mode</font>"))
+        # replaced by the outcome of the connection check (see MainApplication.connectDone())
+        self.connectingLabel = QLabel("Connecting...")
+        self.statusBar().addWidget(self.connectingLabel)
+        if self.app.replay is not None:
+            self.statusBar().addWidget(QLabel("<font color='blue'>Replay</font>"))
 
         self.centralWidget = CentralWidget(app=app)
         self.setCentralWidget(self.centralWidget)
 
+        # the recording is available right away while the stream layout is known only after the connection check
+        if self.app.replay is not None:
+            self.createGraphs()
+
+        # displayed while requests to the controller are in progress
+        self.ioPendingLabel = QLabel("Waiting for the controller...")
+        self.ioPendingLabel.setVisible(self.app.ioExecutor.pending > 0)
+        self.statusBar().addPermanentWidget(self.ioPendingLabel)
+        self.app.ioExecutor.pendingChanged.connect(lambda pending: self.ioPendingLabel.setVisible(pending > 0))
+
         self.statusBar().show()  # can be not visible in online mode otherwise
 
 
+    def showAboutWindow(self) -> None:
+        """
+        Show the AboutWindow (see about.py) creating it on first use
+
+        :return: None
+        """
+
+        if self.aboutWindow is None:
+            import about
+            self.aboutWindow = about.AboutWindow()
+        self.aboutWindow.show()
+
+
+    def showSettingsWindow(self) -> None:
+        """
+        Show the SettingsWindow (see settings.py) creating it on first use
+
+        :return: None
+        """
+
+        if self.settingsWindow is None:
+            self.settingsWindow = settings.SettingsWindow(app=self.app)
+        self.settingsWindow.show()
+
+
+    def showErrorsSettingsWindow(self) -> None:
+        """
+        Show the ErrorsSettingsWindow (see errorssettings.py) creating it on first use
+
+        :return: None
+        """
+
+        if self.errorsSettingsWindow is None:
+            import errorssettings
+            self.errorsSettingsWindow = errorssettings.ErrorsSettingsWindow(app=self.app)
+        self.errorsSettingsWindow.show()
+
+
+    def createGraphs(self) -> None:
+        """
+        Create live graphs (see CentralWidget.createGraphs()) and allow to control them
+
+        :return: None
+        """
+
+        self.centralWidget.createGraphs()
+        self.playpauseAction.setEnabled(True)
+
+
     def playpauseGraphs(self) -> None:
         """
         Smartly toggles the state of live graphs
@@ -223,20 +416,88 @@ class MainWindow(QMainWindow):
             self.playpauseButton.setChecked(True)
         else:
             self.playpauseButton.setChecked(False)
-        self.app.conn.stream.toggle()
+        if self.app.replay is None:
+            self.app.ioExecutor.submit(self.app.streamSource.toggle)  # stream start/stop are requests
+        else:
+            self.app.streamSource.toggle()
         self.centralWidget.graphs.toggle()
 
 
+    def setReplaySpeed(self, index: int) -> None:
+        """
+        Apply the replay speed chosen in the combo box
+
+        :param index: index of the chosen item
+        :return: None
+        """
+
+        self.app.replay.speed = self.replaySpeedComboBox.itemData(index)
+
+
+    def seekReplay(self) -> None:
+        """
+        Move the replay position to the one chosen by the slider
+
+        :return: None
+        """
+
+        start, end = self.app.replay.time_range
+        fraction = self.replayPositionSlider.value() / self.replayPositionSlider.maximum()
+        self.app.replay.seek(start + (end - start)*fraction)
+
+
+    def updateReplayPosition(self) -> None:
+        """
+        Reflect the current replay position on the slider (unless the user is dragging it right now)
+
+        :return: None
+        """
+
+        if not self.replayPositionSlider.isSliderDown():
+            start, end = self.app.replay.time_range
+            if end > start:
+                self.replayPositionSlider.setValue(
+                    round((self.app.replay.position - start) / (end - start) * self.replayPositionSlider.maximum()))
+
+
+    def updateSnapshotsList(self) -> None:
+        """
+        Fill the snapshots list with the most recent stored snapshots of the controller and select the latest one
+
+        :return: None
+        """
+
+        self.snapshotsComboBox.clear()
+        for snapshotId, snapshot in self.app.snapshotStore.find(self.app.controllerKey, limit=SNAPSHOTS_LIST_LIMIT):
+            self.snapshotsComboBox.addItem(snapshot['date'].strftime('%Y-%m-%d %H:%M:%S'), snapshotId)
+        self.restoreValuesAction.setEnabled(self.snapshotsComboBox.count() > 0)
+
+
     def restoreContValues(self) -> None:
         """
-        Write PID parameters stored at program start to the controller
+        Write PID parameters of the snapshot selected in the list to the controller (only the changed ones are actually
+        written)
 
         :return: None
         """
 
-        date = self.app.conn.restore_values(self.app.conn.snapshots[0])  # currently save and use only one snapshot
-        print(f"Snapshot from {date} is restored")
-        self.centralWidget.updateDisplayingValues()
+        snapshot = self.app.snapshotStore.get(self.snapshotsComboBox.currentData())
+        if snapshot is None:  # removed from the store meanwhile
+            self.updateSnapshotsList()
+            return
+
+        self.restoreValuesAction.setEnabled(False)
+
+        def onResult(date):
+            self.restoreValuesAction.setEnabled(True)
+            print(f"Snapshot from {date} is restored")
+
+        def onError(exception):
+            self.restoreValuesAction.setEnabled(True)
+            miscgraphics.MessageWindow(f"Restoring failed: {exception}", status='Error')
+
+        self.app.ioExecutor.submit(self.app.conn.restore_values, snapshot, onResult=onResult, onError=onError)
+        self.centralWidget.updateDisplayingValues()  # queued after the restore
 
 
     def saveToEEPROM(self) -> None:
@@ -246,7 +507,21 @@ class MainWindow(QMainWindow):
         :return: None
         """
 
-        if self.app.conn.save_to_eeprom() == remotecontroller.result['ok']:
+        self.saveToEEPROMAction.setEnabled(False)
+        self.app.ioExecutor.submit(self.app.conn.save_to_eeprom, onResult=self.saveToEEPROMDone,
+                                   onError=lambda exception: self.saveToEEPROMDone(remotecontroller.result['error']))
+
+
+    def saveToEEPROMDone(self, status: int) -> None:
+        """
+        Report the outcome of saveToEEPROM()
+
+        :param status: result['error'] or result['ok'] (int)
+        :return: None
+        """
+
+        self.saveToEEPROMAction.setEnabled(True)
+        if status == remotecontroller.result['ok']:
             miscgraphics.MessageWindow("Successfully saved", status='Info')
             self.centralWidget.updateDisplayingValues()
         else:
@@ -273,14 +548,15 @@ class MainWindow(QMainWindow):
             self.app.connCheckTimer.stop()
 
         # 2. stop live plots (it stops both the stream and graphs)
-        if self.centralWidget.graphs.isRun:
+        if self.centralWidget.graphs is not None and self.centralWidget.graphs.isRun:
             self.playpauseGraphs()
             self.graphsWereRun = True
         else:
             self.graphsWereRun = False
 
-        # 3. in the end block the listening section of the input thread (to prevent pipes overflows)
-        self.app.conn.pause()
+        # 3. in the end block the listening section of the input thread (to prevent pipes overflows). Do it after
+        # requests submitted above (e.g. the stream stop) have been answered
+        self.app.ioExecutor.submit(self.app.conn.pause)
 
         # finally, call the base class' method
         super(MainWindow, self).hideEvent(*args, **kwargs)
@@ -301,8 +577,8 @@ class MainWindow(QMainWindow):
         :return: None
         """
 
-        # 1. resume the listening section of the input thread first
-        self.app.conn.resume()
+        # 1. resume the listening section of the input thread first (ahead of any following requests)
+        self.app.ioExecutor.submit(self.app.conn.resume)
 
         # 2. start the connection check timer
         if not self.app.isOfflineMode:
@@ -339,22 +615,37 @@ class MainApplication(QApplication):
     connLostSignal = pyqtSignal()  # must be part of the class definition and cannot be dynamically added after
 
 
-    def __init__(self, argv: list):
+    def __init__(self, argv: list, replayPath: str=None, replaySpeed: float=1.0, profiler: util.StartupProfiler=None,
+                 profileStartup: bool=False):
         """
         MainApplication constructor
 
         :param argv: the list of command line arguments passed to a Python script
+        :param replayPath: [optional] path to the recording (see replay.load_recording()) to display in graphs instead
+        of the live stream
+        :param replaySpeed: [optional] initial replay speed (None is as fast as possible)
+        :param profiler: [optional] util.StartupProfiler to record startup phases to (startup time is measured from the
+        constructor call otherwise)
+        :param profileStartup: [optional] print the startup profile and quit once the startup is complete
         """
 
-        super(MainApplication, self).__init__(argv)
+        self.profiler = util.StartupProfiler() if profiler is None else profiler
+        self.profileStartup = profileStartup
+
+        with self.profiler.phase("QApplication"):
+            super(MainApplication, self).__init__(argv)
 
 
         # settings [customized] dictionary
-        self.settings = settings.Settings(defaults=util.resource_path('../defaultSettings.json'))
+        with self.profiler.phase("settings"):
+            self.settings = settings.Settings(defaults=util.resource_path('../defaultSettings.json'))
 
         if self.settings['appearance']['theme'] == 'dark':
-            # TODO: warns itself as a deprecated method though no suitable alternative has been suggested
-            self.setStyleSheet(qdarkstyle.load_stylesheet_pyqt5())
+            with self.profiler.phase("import qdarkstyle"):
+                import qdarkstyle
+            with self.profiler.phase("theme"):
+                # TODO: warns itself as a deprecated method though no suitable alternative has been suggested
+                self.setStyleSheet(qdarkstyle.load_stylesheet_pyqt5())
 
 
         # Create a handler function for connection breaks (for example, when a break is occur during the read of some
@@ -367,33 +658,121 @@ class MainApplication(QApplication):
 
         self.isOfflineMode = False
 
-        self.conn = remotecontroller.RemoteController(
-            self.settings['network']['ip'],
-            self.settings['network']['port'],
-            conn_lost_signal=self.connLostSignal
-        )
+        # all requests of the GUI are performed in the background and their results are delivered through signals so
+        # waiting for the controller never blocks the main thread (and the live graphs)
+        self.ioExecutor = ioexecutor.IOExecutor()
+        self.connCheckPending = False
+
+        # The connection is checked in the background: the window is shown right away and widgets are filled in as
+        # values arrive (see connectDone() and snapshotDone()). Requests are executed in the order of submitting so
+        # all of them are performed after the check
+        with self.profiler.phase("RemoteController"):
+            self.conn = remotecontroller.RemoteController(
+                self.settings['network']['ip'],
+                self.settings['network']['port'],
+                conn_lost_signal=self.connLostSignal,
+                cache_ttl=remotecontroller.CACHE_TTL_DEFAULT,
+                connect=False
+            )
+        self.ioExecutor.submit(self.conn.connect, onResult=self.connectDone)
+
+        # snapshots of all sessions are kept in the application data directory
+        with self.profiler.phase("snapshot store"):
+            dataDir = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
+            os.makedirs(dataDir, exist_ok=True)
+            self.snapshotStore = snapshotstore.SnapshotStore(os.path.join(dataDir, 'snapshots.sqlite3'))
+        self.controllerKey = snapshotstore.controller_key(self.settings['network']['ip'],
+                                                          self.settings['network']['port'])
+        self.ioExecutor.submit(self.conn.save_current_values, onResult=self.snapshotDone,
+                               onError=lambda exception: self.snapshotDone(None))
+
+        # Graphs are fed either by the controller' stream or by the recording replay. Both provide the same interface.
+        # The control pipe of the stream is known after the connection check
+        if replayPath is not None:
+            with self.profiler.phase("import replay"):
+                import replay  # brings numpy
+            with self.profiler.phase("replay loading"):
+                self.replay = replay.ReplaySource.from_file(replayPath, speed=replaySpeed)
+            self.streamSource = self.replay
+            self.streamControlPipe = self.replay.control_pipe
+        else:
+            self.replay = None
+            self.streamSource = self.conn.stream
+            self.streamControlPipe = None
 
-        # RemoteController' self-check determines the state of the connection. Such app state determined during the
-        # startup process will remain during all following activities (i.e. app enters the demo mode) and can be changed
-        # only after the restart
-        if self.conn.is_offline_mode:
+
+        with self.profiler.phase("main window"):
+            self.mainWindow = MainWindow(app=self)
+        with self.profiler.phase("main window show"):
+            self.mainWindow.show()
+        self.reportStartupPhase('window')
+
+
+    def reportStartupPhase(self, phase: str) -> float:
+        """
+        Remember and print the time elapsed since the start of the application till the given startup phase is done
+
+        :param phase: name of the phase (one of STARTUP_PHASES keys)
+        :return: elapsed time in seconds
+        """
+
+        elapsed = self.profiler.mark(STARTUP_PHASES[phase])
+        print(f"Startup: {STARTUP_PHASES[phase]} in {elapsed*1000:.0f} ms")
+        return elapsed
+
+
+    def connectDone(self, status: int) -> None:
+        """
+        Apply the outcome of the initial connection check. Such app state determined during the startup process will
+        remain during all following activities (i.e. app enters the demo mode) and can be changed only after the
+        restart
+
+        :param status: result['error'] or result['ok'] (int)
+        :return: None
+        """
+
+        self.reportStartupPhase('connection')
+        self.mainWindow.statusBar().removeWidget(self.mainWindow.connectingLabel)
+
+        if status == remotecontroller.result['error']:
             self.isOfflineMode = True
             print("Offline mode")
+            self.connCheckTimer.stop()
+            self.mainWindow.statusBar().addWidget(QLabel("<font color='red'>Offline mode</font>"))
+        else:
+            # If connection is present (so no demo mode is needed) then set the timer for connection checking (it is
+            # started on MainWindow' show)
+            self.connCheckTimer.timeout.connect(self.connCheckTimerHandler)
+
+        if self.replay is None:
+            self.streamControlPipe = None if self.isOfflineMode else self.conn.input_thread_control_pipe_main
+            self.mainWindow.createGraphs()
+
+        if self.isOfflineMode and not self.profileStartup:  # no interaction is expected during the profiling
             miscgraphics.MessageWindow("No connection to the remote controller. App goes to the Offline (demo) mode. "
                                 "All values are random. To try to reconnect please restart the app", status='Warning')
 
-        else:
-            # If connection is present (so no demo mode is needed) then create the timer for connection checking. It
-            # will start on MainWindow' show
-            self.connCheckTimer.timeout.connect(self.connCheckTimerHandler)
 
-        self.conn.save_current_values()
+    def snapshotDone(self, snapshot: dict) -> None:
+        """
+        Display values of the startup snapshot and store it. Values of the demo mode are random so they are not stored
+        (stored snapshots of the controller are still offered for restoring)
 
+        :param snapshot: snapshot dictionary (see RemoteController.save_current_values()) or None if reading has failed
+        :return: None
+        """
+
+        self.mainWindow.centralWidget.displayValues(snapshot)
+        if snapshot is not None and not self.isOfflineMode:
+            self.snapshotStore.add(self.controllerKey, snapshot)
+        self.mainWindow.updateSnapshotsList()
 
-        # We can create the MainWindow only after instantiating the RemoteController because it is used for obtaining
-        # values and setting parameters
-        self.mainWindow = MainWindow(app=self)
-        self.mainWindow.show()
+        elapsed = self.reportStartupPhase('values')
+        self.mainWindow.statusBar().showMessage(f"Ready in {elapsed:.2f} s", STARTUP_MESSAGE_TIMEOUT)
+
+        if self.profileStartup:
+            print(self.profiler.report())
+            QTimer.singleShot(0, self.quit)  # leave this callback first
 
 
     def quit(self) -> None:
@@ -406,7 +785,16 @@ class MainApplication(QApplication):
         self.connLostSignal.disconnect(self.connLostHandler)
         self.connCheckTimer.stop()
 
+        # stop plotting from buffers which are going to be closed
+        if self.mainWindow.centralWidget.graphs is not None and self.mainWindow.centralWidget.graphs.isRun:
+            self.mainWindow.centralWidget.graphs.stop()
+
+        # wait for the request in progress: RemoteController cannot be used concurrently
+        self.ioExecutor.shutdown()
         self.conn.close()
+        if self.replay is not None:
+            self.replay.close()
+        self.snapshotStore.close()
 
         super(MainApplication, self).quit()
 
@@ -418,9 +806,27 @@ class MainApplication(QApplication):
         :return: None
         """
 
+        # the previous check is still in progress (e.g. slow link or a lot of queued requests)
+        if self.connCheckPending:
+            return
+
         print("Check connection")
 
-        if self.conn.check_connection() == remotecontroller.result['error']:
+        self.connCheckPending = True
+        self.ioExecutor.submit(self.conn.check_connection, onResult=self.connCheckDone)
+
+
+    def connCheckDone(self, status: int) -> None:
+        """
+        Handle the result of the connection check started by connCheckTimerHandler()
+
+        :param status: result['error'] or result['ok'] (int)
+        :return: None
+        """
+
+        self.connCheckPending = False
+
+        if status == remotecontroller.result['error']:
             self.connLostHandler()
         else:
             # prevent of multiple calls of these instructions by using this flag
@@ -445,7 +851,8 @@ class MainApplication(QApplication):
             self.isOfflineMode = True
             print("Connection lost")
             try:
-                if self.mainWindow.centralWidget.graphs.isRun:
+                graphs = self.mainWindow.centralWidget.graphs
+                if graphs is not None and graphs.isRun and self.replay is None:
                     self.mainWindow.playpauseGraphs()
                 self.mainWindow.statusBar().addWidget(self.connLostStatusBarLabel)
                 miscgraphics.MessageWindow("Connection was lost. The app goes to the Offline mode and will be trying "
@@ -475,6 +882,21 @@ if __name__ == '__main__':
     QCoreApplication.setOrganizationName("Andrey Chufyrev")
     QCoreApplication.setApplicationName("PID controller GUI")
 
-    application = MainApplication(sys.argv)
+    parser = argparse.ArgumentParser(description=QCoreApplication.applicationName())
+    parser.add_argument('--replay', metavar='PATH',
+                        help="display the recording (StreamArchive file or StreamRecorder segments directory) instead "
+                             "of the live stream")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="initial replay speed, 0 means as fast as possible (default: %(default)s)")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="print durations of startup phases (imports, construction of widgets, connection) and "
+                             "exit once the startup is complete")
+    args, qtArgs = parser.parse_known_args(sys.argv[1:])  # remaining arguments are for Qt
+
+    profiler = util.StartupProfiler(start=_IMPORTS_BEGIN)
+    profiler.add("main module imports", _IMPORTS_BEGIN, _IMPORTS_END)
+
+    application = MainApplication(sys.argv[:1] + qtArgs, replayPath=args.replay, replaySpeed=args.speed or None,
+                                  profiler=profiler, profileStartup=args.profile_startup)
 
     sys.exit(application.exec_())
@@ -23,6 +23,7 @@ from PyQt5.QtWidgets import QHBoxLayout, QVBoxLayout, QMessageBox, QAbstractButt
 # local imports
 import util
 import remotecontroller
+import ioexecutor
 
 
 
@@ -138,12 +139,16 @@ class ValueGroupBox(QGroupBox):
     refresh PicButton to explicitly update it and a QLineEdit with an associated QPushButton to set a new value.
     """
 
-    def __init__(self, label: str, float_fmt: str='{:.3f}', conn: remotecontroller.RemoteController=None, parent=None):
+    def __init__(self, label: str, float_fmt: str='{:.3f}', conn: remotecontroller.RemoteController=None,
+                 executor: ioexecutor.IOExecutor=None, refresh: bool=True, parent=None):
         """
         ValueGroupBox constructor
 
         :param label: name of the GroupBox
         :param conn: RemoteController instance to connect to
+        :param executor: [optional] IOExecutor to run requests in (they are performed right in the main thread
+        otherwise)
+        :param refresh: [optional] read the value right away. Pass False if it is going to be displayed by displayVal()
         :param parent: [optional] parent class
         """
 
@@ -153,34 +158,36 @@ class ValueGroupBox(QGroupBox):
 
         self.label = label
         self.conn = conn
+        self.executor = executor
+        self._pending = 0  # number of requests in progress
 
         # prepare a template string using another template string :)
         self.valLabelTemplate = string.Template(f"Current $label: <b>{float_fmt}</b>").safe_substitute(label=label)
+        self.valLabelPendingText = f"Current {label}: <i>reading...</i>"
         self.valLabel = QLabel()
-        self.refreshVal()
 
-        refreshButton = PicButton(util.resource_path('../img/refresh.png'),
-                                  util.resource_path('../img/refresh_hover.png'),
-                                  util.resource_path('../img/refresh_pressed.png'))
-        refreshButton.clicked.connect(self.refreshVal)
+        self.refreshButton = PicButton(util.resource_path('../img/refresh.png'),
+                                       util.resource_path('../img/refresh_hover.png'),
+                                       util.resource_path('../img/refresh_pressed.png'))
+        self.refreshButton.clicked.connect(self.refreshVal)
 
         self.writeLine = QLineEdit()
         self.writeLine.setPlaceholderText(f"Enter new '{label}'")
         self.writeLine.setValidator(QDoubleValidator())  # we can set a Locale() to correctly process floats
         self.writeLine.setToolTip("Float value")
 
-        writeButton = QPushButton(QIcon(self.style().standardIcon(QStyle.SP_DialogApplyButton)), 'Send')
-        writeButton.clicked.connect(self.writeButtonClicked)
+        self.writeButton = QPushButton(QIcon(self.style().standardIcon(QStyle.SP_DialogApplyButton)), 'Send')
+        self.writeButton.clicked.connect(self.writeButtonClicked)
 
         hBox1 = QHBoxLayout()
         hBox1.addWidget(self.valLabel)
         hBox1.addStretch()  # need to not distort the button when resizing
         hBox1.addSpacing(25)
-        hBox1.addWidget(refreshButton)
+        hBox1.addWidget(self.refreshButton)
 
         hBox2 = QHBoxLayout()
         hBox2.addWidget(self.writeLine)
-        hBox2.addWidget(writeButton)
+        hBox2.addWidget(self.writeButton)
 
         vBox1 = QVBoxLayout()
         vBox1.addLayout(hBox1)
@@ -188,18 +195,89 @@ class ValueGroupBox(QGroupBox):
 
         self.setLayout(vBox1)
 
+        if refresh:
+            self.refreshVal()
+
 
     def refreshVal(self) -> None:
         """
-        Read a value from the RemoteController
+        Read a value from the RemoteController (always performs a request, bypassing the cache)
 
         :return: None
         """
 
         if self.conn is not None:
-            self.valLabel.setText(self.valLabelTemplate.format(self.conn.read(self.label)))
+            self._request(self.conn.read, self.label, 0)
         else:
-            self.valLabel.setText(self.valLabelTemplate.format(random.random()))
+            self.displayVal(random.random())
+
+
+    def displayVal(self, value: float) -> None:
+        """
+        Show the given value (e.g. read together with others) without an own request to the RemoteController
+
+        :param value: number to display
+        :return: None
+        """
+
+        self.valLabel.setText(self.valLabelTemplate.format(value))
+
+
+    def setPending(self, pending: bool) -> None:
+        """
+        Reflect the request in progress: controls are disabled and the value is replaced by the 'reading...' note. Calls
+        are counted so the state is left only after the last of overlapping requests is done
+
+        :param pending: True when the request is started, False when it is done
+        :return: None
+        """
+
+        self._pending += 1 if pending else -1
+        isPending = self._pending > 0
+
+        self.refreshButton.setEnabled(not isPending)
+        self.writeButton.setEnabled(not isPending)
+        if isPending:
+            self.valLabel.setText(self.valLabelPendingText)
+
+
+    def _request(self, function, *args) -> None:
+        """
+        Perform the RemoteController request through the executor (if any) and display the resulting value when it
+        arrives
+
+        :param function: callable returning the value to display
+        :param args: positional arguments for the function
+        :return: None
+        """
+
+        if self.executor is None:
+            self.displayVal(function(*args))
+            return
+
+        def onResult(value):
+            self.setPending(False)
+            self.displayVal(value)
+
+        def onError(exception):
+            self.setPending(False)
+            print(f"Request of '{self.label}' failed: {exception}")
+
+        self.setPending(True)
+        self.executor.submit(function, *args, onResult=onResult, onError=onError)
+
+
+    def _writeAndRead(self, value: float) -> float:
+        """
+        Send a new value and get it back (written values are remembered by the RemoteController' cache so there is no
+        need in an additional request). Runs in the executor' thread
+
+        :param value: number to write
+        :return: current value
+        """
+
+        self.conn.write(self.label, value)
+        return self.conn.read(self.label)
 
 
     def writeButtonClicked(self) -> None:
@@ -210,13 +288,18 @@ class ValueGroupBox(QGroupBox):
         """
 
         try:
-            if self.conn is not None:
-                self.conn.write(self.label, float(self.writeLine.text()))
+            value = float(self.writeLine.text())
         except ValueError:  # user enters not valid number or NaN
-            pass
+            value = None
         self.writeLine.clear()
-        # read a value back to make sure that writing was successful (not really necessary to perform)
-        self.refreshVal()
+
+        # show the value back
+        if self.conn is None:
+            self.refreshVal()
+        elif value is None:
+            self._request(self.conn.read, self.label)
+        else:
+            self._request(self._writeAndRead, value)
 
 
 
@@ -0,0 +1,386 @@
+"""
+recorder.py - lossless recording of the stream into memory-mapped segment files (standard library only)
+
+
+const RECORDER_TAP_CAPACITY
+    number of frames the recorder' tap buffer can hold (reserve for the time the recorder thread is not scheduled)
+const RECORDER_SEGMENT_SIZE
+    default size of a single segment file (in bytes)
+const RECORDER_POLL_INTERVAL
+    period of draining the tap buffer (in seconds)
+
+struct SEGMENT_HEADER
+const SEGMENT_MAGIC
+const SEGMENT_VERSION
+    header placed at the beginning of every segment file and its identification
+
+struct CHUNK_HEADER
+    header of every chunk of frames in the segment
+
+class StreamRecorder
+    recorder attached to the Stream writing all incoming frames along with their receive times
+
+function find_segments
+    list segment files of the recording in chronological order
+
+function read_segment
+    load the whole segment file back
+"""
+
+import array
+import glob
+import mmap
+import os
+import struct
+import threading
+import time
+
+import remotecontroller
+
+
+
+#
+# tap buffer size in frames
+#
+RECORDER_TAP_CAPACITY = 65536
+
+#
+# segment file size in bytes
+#
+RECORDER_SEGMENT_SIZE = 64 * 1024 * 1024
+
+#
+# timeouts in seconds
+#
+RECORDER_POLL_INTERVAL = 0.05
+
+
+#
+# Segment file layout (headers are little-endian, timestamps and values are in the native byte order):
+#
+#   header: magic | version (uint16) | channels (uint16) | segment index (uint32) | creation time (float64) |
+#           used size (uint64)
+#   chunks: frames count (uint32) | count * float64 timestamps | count * channels * float32 values
+#
+# Used size is updated after every chunk so a segment is readable even if the recording has been interrupted
+#
+SEGMENT_HEADER = struct.Struct('<8sHHIdQ')
+SEGMENT_MAGIC = b'PIDSTRM\x00'
+SEGMENT_VERSION = 1
+
+CHUNK_HEADER = struct.Struct('<I')
+
+
+
+class StreamRecorder:
+    """
+    Recorder stage attached to the Stream. The input listening thread copies every stream frame along with its
+    receive time into the dedicated tap buffer (see Stream.add_tap()) and never waits for the recorder. The recorder
+    thread periodically drains the tap into fixed-size memory-mapped segment files in column chunks (plain memory
+    copies, no per-frame work) switching to the next file when the current one is full. When the stream layout changes
+    (see Stream.read_layout()) the recorder attaches the new tap and continues in the new segment with the new number of
+    channels in its header.
+
+    Usage example:
+
+        recorder = StreamRecorder(conn.stream, 'recordings')
+        recorder.start()
+        ...
+        recorder.stop()
+
+    """
+
+    def __init__(self, stream: remotecontroller.Stream, directory: str, prefix: str='stream',
+                 segment_size: int=RECORDER_SEGMENT_SIZE, max_segments: int=None):
+        """
+        StreamRecorder constructor. Does not start the recording itself
+
+        :param stream: Stream instance to record
+        :param directory: path to the directory to place segment files in (created if not exists)
+        :param prefix: [optional] beginning of the segment file names
+        :param segment_size: [optional] size of a single segment file in bytes. It should fit the headers and at least
+        one frame (ValueError is raised otherwise)
+        :param max_segments: [optional] keep only this number of the most recent segments deleting older ones
+        """
+
+        self._check_segment_size(segment_size, stream.channels)
+
+        self.stream = stream
+        self.directory = directory
+        self.prefix = prefix
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+
+        self.channels = stream.buffer.channels
+        self.frames_recorded = 0
+        self.segments = []  # paths of created segment files
+
+        self._tap = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()  # the layout change and the recorder thread both drain the tap
+
+        self._file = None
+        self._mmap = None
+        self._offset = 0
+
+
+    @staticmethod
+    def _check_segment_size(segment_size: int, channels: int) -> None:
+        """
+        Make sure the segment of the given size holds at least one frame of the given number of channels
+
+        :param segment_size: size of a single segment file in bytes
+        :param channels: number of channels
+        :return: None
+        """
+
+        minimum = SEGMENT_HEADER.size + CHUNK_HEADER.size + remotecontroller.TIMESTAMP_SIZE + \
+            channels*remotecontroller.FLOAT_SIZE
+        if segment_size < minimum:
+            raise ValueError(f"Segment size {segment_size} is too small for frames of {channels} channels (minimum is "
+                             f"{minimum} bytes)")
+
+
+    def is_recording(self) -> bool:
+        return self._thread is not None
+
+
+    def start(self) -> None:
+        """
+        Attach to the stream and start the recorder thread
+
+        :return: None
+        """
+
+        if self._thread is not None:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.channels = self.stream.channels
+        self._tap = remotecontroller.StreamBuffer(capacity=RECORDER_TAP_CAPACITY, channels=self.channels,
+                                                  timestamps=True)
+        self.stream.add_tap(self._tap, on_layout=self._layout_changed)
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+
+    def stop(self) -> None:
+        """
+        Detach from the stream, write remaining frames and close the current segment
+
+        :return: None
+        """
+
+        if self._thread is None:
+            return
+
+        self.stream.remove_tap(self._tap)  # the listener does not touch the tap after this
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+        self._drain()  # leftovers pushed between the last drain and detaching
+        self._close_segment()
+
+        self._tap.close()
+        self._tap = None
+
+
+    def _run(self) -> None:
+        """
+        Recorder thread routine
+
+        :return: None
+        """
+
+        while not self._stop_event.wait(RECORDER_POLL_INTERVAL):
+            with self._lock:
+                self._drain()
+
+
+    def _layout_changed(self, channels: int) -> None:
+        """
+        Stream.read_layout() callback: the old tap has been detached by the listener. Attach the new one, write
+        remaining frames of the old layout and close the segment so next frames go to the new one. The recording is
+        stopped and ValueError is raised if frames of the new layout do not fit into the segment
+
+        :param channels: new number of channels
+        :return: None
+        """
+
+        try:
+            self._check_segment_size(self.segment_size, channels)
+        except ValueError:
+            self.stop()
+            raise
+
+        tap = remotecontroller.StreamBuffer(capacity=RECORDER_TAP_CAPACITY, channels=channels, timestamps=True)
+        self.stream.add_tap(tap, on_layout=self._layout_changed)
+
+        with self._lock:
+            self._drain()
+            self._close_segment()
+            self._tap.close()
+            self._tap = tap
+            self.channels = channels
+
+
+    def _drain(self) -> None:
+        """
+        Move all pending frames from the tap buffer into segment files
+
+        :return: None
+        """
+
+        while True:
+            frames = self._tap.peek(max_frames=self._chunk_capacity())
+            if frames is None:
+                return
+            num = len(frames)
+            timestamps = self._tap.peek_timestamps(num)
+            self._write_chunk(num, timestamps, frames)
+            timestamps.release()
+            frames.release()
+            self._tap.consume(num)
+
+
+    def _chunk_capacity(self) -> int:
+        """
+        Maximum number of frames fitting into the current segment (or into a new one if there is no current segment or
+        it is already full)
+
+        :return: int
+        """
+
+        frame_size = remotecontroller.TIMESTAMP_SIZE + self.channels*remotecontroller.FLOAT_SIZE
+        if self._mmap is not None:
+            capacity = (self.segment_size - self._offset - CHUNK_HEADER.size) // frame_size
+            if capacity > 0:
+                return capacity
+        return (self.segment_size - SEGMENT_HEADER.size - CHUNK_HEADER.size) // frame_size
+
+
+    def _write_chunk(self, num: int, timestamps: memoryview, frames: memoryview) -> None:
+        """
+        Append the chunk to the current segment (rotating it if needed). 'num' should not exceed _chunk_capacity()
+
+        :param num: number of frames
+        :param timestamps: memoryview of 'num' float64
+        :param frames: memoryview of 'num' * channels float32
+        :return: None
+        """
+
+        size = CHUNK_HEADER.size + timestamps.nbytes + frames.nbytes
+        if self._mmap is None or self._offset + size > self.segment_size:
+            self._close_segment()
+            self._open_segment()
+
+        CHUNK_HEADER.pack_into(self._mmap, self._offset, num)
+        offset = self._offset + CHUNK_HEADER.size
+        self._mmap[offset:offset + timestamps.nbytes] = timestamps.cast('B')
+        offset += timestamps.nbytes
+        self._mmap[offset:offset + frames.nbytes] = frames.cast('B')
+        self._offset = offset + frames.nbytes
+
+        # used size is the last field of the header
+        struct.pack_into('<Q', self._mmap, SEGMENT_HEADER.size - 8, self._offset)
+        self.frames_recorded += num
+
+
+    def _open_segment(self) -> None:
+        """
+        Create the next segment file and map it into the memory
+
+        :return: None
+        """
+
+        index = len(self.segments)
+        path = os.path.join(self.directory, f'{self.prefix}-{time.strftime("%Y%m%d-%H%M%S")}-{index:06d}.seg')
+
+        self._file = open(path, 'w+b')
+        self._file.truncate(self.segment_size)
+        self._mmap = mmap.mmap(self._file.fileno(), self.segment_size)
+
+        self._offset = SEGMENT_HEADER.size
+        SEGMENT_HEADER.pack_into(self._mmap, 0, SEGMENT_MAGIC, SEGMENT_VERSION, self.channels, index, time.time(),
+                                 self._offset)
+
+        self.segments.append(path)
+        if self.max_segments is not None:
+            for old_path in self.segments[:-self.max_segments]:
+                if os.path.exists(old_path):
+                    os.remove(old_path)
+
+
+    def _close_segment(self) -> None:
+        """
+        Unmap the current segment and cut its unused tail
+
+        :return: None
+        """
+
+        if self._mmap is None:
+            return
+
+        self._mmap.flush()
+        self._mmap.close()
+        self._mmap = None
+
+        self._file.truncate(self._offset)
+        self._file.close()
+        self._file = None
+
+
+
+def find_segments(directory: str, prefix: str='stream') -> list:
+    """
+    List segment files in chronological order (file names start with the creation date and end with the index)
+
+    :param directory: path to the directory with segment files
+    :param prefix: [optional] beginning of the segment file names
+    :return: list of paths
+    """
+
+    return sorted(glob.glob(os.path.join(glob.escape(directory), f'{glob.escape(prefix)}-*.seg')))
+
+
+def read_segment(path: str) -> tuple:
+    """
+    Load the whole segment file
+
+    :param path: path to the segment file
+    :return: (header dictionary, array('d') of timestamps, array('f') of flat frames values (channels per frame))
+    """
+
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    magic, version, channels, index, created, used = SEGMENT_HEADER.unpack_from(data, 0)
+    if magic != SEGMENT_MAGIC:
+        raise ValueError(f"'{path}' is not a stream segment file")
+    header = {
+        'version': version,
+        'channels': channels,
+        'index': index,
+        'created': created,
+        'used': used
+    }
+
+    timestamps = array.array('d')
+    values = array.array('f')
+
+    offset = SEGMENT_HEADER.size
+    while offset < used:
+        num = CHUNK_HEADER.unpack_from(data, offset)[0]
+        offset += CHUNK_HEADER.size
+        timestamps.frombytes(data[offset:offset + num*remotecontroller.TIMESTAMP_SIZE])
+        offset += num*remotecontroller.TIMESTAMP_SIZE
+        values.frombytes(data[offset:offset + num*channels*remotecontroller.FLOAT_SIZE])
+        offset += num*channels*remotecontroller.FLOAT_SIZE
+
+    return header, timestamps, values
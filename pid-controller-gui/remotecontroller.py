@@ -3,17 +3,60 @@ remotecontroller.py - standalone interface to the remote PID controller with zer
 
 
 const REMOTECONTROLLER_MSG_SIZE
-    message size (in bytes) to and from the remote controller (same for commands, values, stream messages)
+    message size (in bytes) to and from the remote controller (same for commands and values, stream messages have
+    their own size depending on the number of channels, see stream_message_size())
 const FLOAT_SIZE
     float type representation size (in bytes)
-const THREAD_INPUT_HANDLER_SLEEP_TIME
-    sleep time between incoming messages processing (in seconds)
+const TIMESTAMP_SIZE
+    size of the frame receive time (float64) in stream buffers storing it (in bytes)
+const STREAM_CHANNELS_DEFAULT
+    number of values in stream frames of controllers not supporting the 'stream_layout' command
+const STREAM_MAX_CHANNELS
+    maximum number of values in the stream frame accepted from the controller
+const STREAM_BUFFER_CAPACITY
+    number of stream frames (points) the shared memory ring buffer can hold
+const RECEIVE_BATCH_SIZE
+    maximum number of messages drained from the transport and parsed at once by the input listening thread
+const INLINE_TRANSPORT_BACKLOG
+    maximum number of messages queued by InlineTransport while the input is paused (oldest ones are dropped)
+const LISTENER_BACKENDS
+const LISTENER_DEFAULT
+    available ways to run the input listening thread ('process', 'thread' or 'asyncio') and the default one
 const CHECK_CONNECTION_TIMEOUT_FIRST_CHECK
     timeout for the first check only (in seconds)
 const CHECK_CONNECTION_TIMEOUT_DEFAULT
     timeout for all following checks (in seconds)
+const INPUT_THREAD_EXIT_TIMEOUT
+    time to wait for the input listening thread to exit on close (in seconds)
+const CACHE_TTL_DEFAULT
+    suggested per-variable lifetimes of values in the RemoteController' cache (in seconds)
+const HEARTBEAT_WINDOW_DEFAULT
+    any incoming message proves the link is alive so active connection checks are skipped during this time after the
+    last one (in seconds)
 const READ_WRITE_TIMEOUT_SYNCHRONOUS
     though input listening thread is running asynchronously we retrieve and send non-stream data in a synchronous manner
+    (timeout of the AsyncRemoteController requests and the initial retransmission timeout of the RemoteController)
+const RTO_MIN
+const RTO_MAX
+    bounds of the RTT-adaptive retransmission timeout of requests (in seconds)
+const RTO_ALPHA
+const RTO_BETA
+const RTO_K
+    smoothing gains of the RTT and its variation and the variation multiplier of the retransmission timeout (RFC 6298)
+const REQUEST_RETRIES
+    number of retransmissions of an unanswered request before the link is considered lost
+const SO_TIMESTAMPNS
+    socket option enabling kernel receive timestamps of datagrams (Linux only, None elsewhere)
+const STREAM_DECIMATION_MODES
+const STREAM_DECIMATION_DEFAULT
+    ways to thin out the stream when the consumer falls behind ('minmax', 'pick' or None to never thin out)
+const STREAM_DECIMATION_HIGH_WATERMARK
+const STREAM_DECIMATION_LOW_WATERMARK
+    stream buffer fill levels (fractions of its capacity) to increase and decrease the decimation factor at
+const STREAM_DECIMATION_MAX_FACTOR
+    maximum decimation factor
+const STREAM_DECIMATION_HOLD_TIME
+    period of evaluating the stream buffer backlog to change the decimation factor (in seconds)
 
 
 class _Response
@@ -40,15 +83,67 @@ function _parse_response
     core functions to construct the request and parse the response respectively (additional checks are performed in
     respective RemoteController methods)
 
+function stream_message_size
+    size of the stream message (in bytes) for the given number of channels
+
+function _batch_struct
+    struct of a single message slot of the receive batch buffer for the given number of channels
+
+function _parse_responses
+    parse a whole batch of received messages at once separating stream values from other responses
+
+function interarrival_stats
+    statistics of intervals between receive times of stream frames (jitter, gaps)
+
+class StreamBuffer
+    lock-free single-producer/single-consumer ring buffer of float32 frames placed in the shared memory
+
 class Stream
     class representing the stream from the RemoteController (e.g. plot data)
 
+class Transport
+    base class of the links to the controller exchanging whole messages
+class UDPTransport
+class UnixDatagramTransport
+class SerialTransport
+class LoopbackTransport
+    available links: UDP/IP (default), AF_UNIX datagram socket, byte stream (serial port, pty) and in-process calls of
+    the simulating function
+class InlineTransport
+    base class of non-selectable transports delivering incoming messages by themselves (no listening thread needed)
+class _SocketTransport
+    common part of datagram socket links receiving kernel timestamps of messages
+
 enum InputThreadCommand
     commands to control the input listening thread
 
+class ListenerStatus
+    C-type structure placed in the shared memory where the input listening thread publishes its state (also published
+    by other stream sources, e.g. replay.ReplaySource, for the graphs)
+
+class _StreamDecimator
+    thinning out of the stream by the given factor keeping it continuous between batches
+
+class _RTTEstimator
+    smoothed round trip time and the retransmission timeout derived from it
+
+class _QueueConnection
+function _queue_pipe
+    deque-based replacement of the multiprocessing.Pipe for thread-based listeners (no pickling)
+
+class _InputHandler
+    input listening thread logic independent of the way it is driven
+
 function _thread_input_handler
-    function to run as multiprocessing.Process target that receives all incoming data from the given socket and cast to
-    respective listeners from the main thread via pipes
+    function to run as multiprocessing.Process (or threading.Thread) target that receives all incoming data from the
+    given transport and cast to respective listeners from the main thread via pipes (var/cmd messages) and the shared
+    memory (stream)
+
+class _AsyncioControlConnection
+    control pipe of the 'asyncio' listener backend that runs _InputHandler in its own event loop
+
+class _InlineControlConnection
+    control pipe for non-selectable transports executing commands right away without any listening thread
 
 dict snapshot_template
     PID values snapshot dictionary with attached datetime (template)
@@ -63,19 +158,33 @@ exception RequestKeyException
 
 class RemoteController
     class combining defined earlier instruments in a convenient high-level interface
+
+class AsyncRemoteController
+    asyncio-native counterpart of the RemoteController running in the caller's event loop without any additional
+    processes or pipes
 """
 
+import asyncio
+import collections
 import copy
 import datetime
 import enum
+import functools
+import itertools
+import os
 import sys
 import socket
 import struct
+import tempfile
 import ctypes
 import time
 import multiprocessing
-import select
+import multiprocessing.connection
+import multiprocessing.shared_memory
+import multiprocessing.sharedctypes
+import threading
 import random
+import statistics
 
 
 
@@ -84,17 +193,92 @@ import random
 #
 REMOTECONTROLLER_MSG_SIZE = 9
 FLOAT_SIZE = 4
+TIMESTAMP_SIZE = 8
 
 #
-# timeouts in seconds
+# stream layout: number of float values (channels) in each frame
 #
-THREAD_INPUT_HANDLER_SLEEP_TIME = 0.005
+STREAM_CHANNELS_DEFAULT = 2
+STREAM_MAX_CHANNELS = 16
 
+#
+# stream buffer size in frames (points)
+#
+STREAM_BUFFER_CAPACITY = 8192
+
+#
+# maximum number of messages received at once
+#
+RECEIVE_BATCH_SIZE = 256
+
+#
+# messages kept by non-selectable transports while the input is paused, like the socket receive buffer of UDPTransport
+#
+INLINE_TRANSPORT_BACKLOG = 1024
+
+#
+# input listening thread backends
+#
+LISTENER_BACKENDS = ('process', 'thread', 'asyncio')
+LISTENER_DEFAULT = 'process'
+
+#
+# timeouts in seconds
+#
 CHECK_CONNECTION_TIMEOUT_FIRST_CHECK = 2.0
 CHECK_CONNECTION_TIMEOUT_DEFAULT = 1.0
 
+INPUT_THREAD_EXIT_TIMEOUT = 1.0
+
+HEARTBEAT_WINDOW_DEFAULT = 1.0
+
+#
+# suggested lifetimes of cached values in seconds (PID parameters are changed only by ourselves while the integral
+# error is constantly updating by the controller)
+#
+CACHE_TTL_DEFAULT = {
+    'setpoint': 60.0,
+    'kP': 60.0,
+    'kI': 60.0,
+    'kD': 60.0,
+    'err_I': 0.5,
+    'err_P_limits': 60.0,
+    'err_I_limits': 60.0
+}
+
 READ_WRITE_TIMEOUT_SYNCHRONOUS = 1.0
 
+#
+# retransmission of requests (RFC 6298 estimation of the timeout): the timeout is SRTT + K*RTTVAR clamped to the bounds
+# and doubled on every retransmission. READ_WRITE_TIMEOUT_SYNCHRONOUS is used until the first RTT sample
+#
+RTO_MIN = 0.05
+RTO_MAX = 2.0
+RTO_ALPHA = 1/8
+RTO_BETA = 1/4
+RTO_K = 4
+REQUEST_RETRIES = 3
+
+#
+# kernel receive timestamps (struct timespec in the ancillary data). The option is missing in the socket module though
+# supported by Linux
+#
+SO_TIMESTAMPNS = getattr(socket, 'SO_TIMESTAMPNS', 35 if sys.platform.startswith('linux') else None)
+_TIMESPEC = struct.Struct('ll')
+
+#
+# adaptive stream decimation: when the stream buffer backlog exceeds the high watermark and keeps growing the listener
+# doubles the decimation factor, when it drops below the low one the factor is halved. 'minmax' replaces every bucket of
+# 2*factor frames by 2 frames with minimum and maximum values of each channel (peaks remain visible), 'pick' keeps every
+# factor-th frame
+#
+STREAM_DECIMATION_MODES = ('minmax', 'pick', None)
+STREAM_DECIMATION_DEFAULT = 'minmax'
+STREAM_DECIMATION_HIGH_WATERMARK = 0.5
+STREAM_DECIMATION_LOW_WATERMARK = 0.1
+STREAM_DECIMATION_MAX_FACTOR = 64
+STREAM_DECIMATION_HOLD_TIME = 0.5
+
 
 
 class _Response(ctypes.Structure):
@@ -146,6 +330,7 @@ var_cmd = {
     # commands - send them only in 'read' mode
     'stream_start': 0b0001,
     'stream_stop': 0b0000,
+    'stream_layout': 0b0010,
 
     'save_to_eeprom': 0b1011,
 
@@ -164,6 +349,18 @@ result_swapped = {value: key for key, value in result.items()}
 
 stream_prefix = 0b00000001  # every stream message should be prefaced with such byte
 
+# all possible first bytes of incoming messages (byte stream links use them to find the start of the next message)
+_VALID_HEADERS = frozenset([stream_prefix] + [
+    (opcode_value << 7) | (var_cmd_value << 3) | (result_value << 2)
+    for opcode_value in opcode.values()
+    for var_cmd_value in var_cmd.values() if var_cmd_value != _VAR_CMD_STREAM
+    for result_value in result.values()
+    if not (opcode_value == opcode['write'] and var_cmd_value in (var_cmd['stream_start'], var_cmd['stream_stop'],
+                                                                  var_cmd['stream_layout'], var_cmd['save_to_eeprom']))
+])
+
+_STREAM_PREFIX_MASK = 0b00000011
+
 
 
 def _make_request(operation: str, variable_command: str, *values) -> bytearray:
@@ -213,11 +410,288 @@ def _parse_response(response_buf: bytearray) -> dict:
             'result': result_swapped[response_byte.result]
         }
 
-    response_dict['values'] = list(struct.unpack('ff', response_buf[1:2*FLOAT_SIZE + 1]))
+    num = (len(response_buf) - 1) // FLOAT_SIZE if response_byte.stream else 2
+    response_dict['values'] = list(struct.unpack_from(f'{num}f', response_buf, 1))
 
     return response_dict
 
 
+def stream_message_size(channels: int) -> int:
+    """
+    Size of the stream message: the prefix byte and the float value of each channel
+
+    :param channels: number of channels
+    :return: size in bytes
+    """
+
+    return 1 + channels*FLOAT_SIZE
+
+
+@functools.lru_cache(maxsize=None)
+def _batch_struct(channels: int) -> struct.Struct:
+    """
+    Struct of a single message slot of the receive batch buffer. The slot fits both the stream message of the given
+    number of channels and the response (whichever is longer) plus one spare byte: the datagram filling the whole slot
+    has been truncated and is skipped as malformed. Unpacking gives the first byte and the values of the stream frame
+    (padding yields nothing)
+
+    :param channels: number of channels of stream frames
+    :return: struct.Struct instance which size is the slot size
+    """
+
+    stream_size = stream_message_size(channels)
+    padding = max(stream_size, REMOTECONTROLLER_MSG_SIZE) + 1 - stream_size
+    return struct.Struct(f'=B{channels}f{padding}x')  # no alignment
+
+
+def _parse_responses(batch_buf: memoryview, channels: int=STREAM_CHANNELS_DEFAULT) -> tuple:
+    """
+    Parse a batch of messages placed back-to-back in the buffer (each one in its slot of _batch_struct(channels).size
+    bytes). All messages are unpacked in a single struct.iter_unpack() pass and then split by the stream prefix bits of
+    their first bytes: stream values are left as plain tuples while the rest is converted by _parse_response() to the
+    usual dictionaries. The Python work per message does not depend on the number of channels
+
+    :param batch_buf: bytes-like object which length is a multiple of the slot size
+    :param channels: [optional] number of channels of stream frames
+    :return: (list of stream values tuples, list of response dicts)
+    """
+
+    slot_struct = _batch_struct(channels)
+    slot_size = slot_struct.size
+    records = list(slot_struct.iter_unpack(batch_buf))
+    headers = bytes(batch_buf[::slot_size])
+
+    # fast path for the typical batch consisting of stream messages only
+    if headers.count(stream_prefix) == len(records):
+        return [record[1:] for record in records], []
+
+    stream_mask = [header & _STREAM_PREFIX_MASK for header in headers]
+    stream_values = [record[1:] for record in itertools.compress(records, stream_mask)]
+    responses = [_parse_response(batch_buf[i*slot_size:i*slot_size + REMOTECONTROLLER_MSG_SIZE])
+                 for i, is_stream in enumerate(stream_mask) if not is_stream]
+
+    return stream_values, responses
+
+
+def interarrival_stats(timestamps, period: float=None) -> dict:
+    """
+    Statistics of intervals between consecutive receive times. Intervals longer than twice the period are counted as
+    gaps (lost or delayed frames)
+
+    :param timestamps: sequence of receive times in seconds in ascending order (e.g. StreamBuffer.peek_timestamps())
+    :param period: [optional] expected stream period in seconds (the mean interval by default)
+    :return: dictionary with 'count', 'mean', 'stdev', 'min', 'max' (in seconds) and 'gaps' keys or None if there are
+    less than 2 intervals
+    """
+
+    if len(timestamps) < 3:
+        return None
+
+    intervals = [b - a for a, b in zip(timestamps, timestamps[1:])]
+    mean = statistics.fmean(intervals)
+    threshold = 2 * (period if period is not None else mean)
+    return {
+        'count': len(intervals),
+        'mean': mean,
+        'stdev': statistics.pstdev(intervals, mean),
+        'min': min(intervals),
+        'max': max(intervals),
+        'gaps': sum(interval > threshold for interval in intervals)
+    }
+
+
+
+class StreamBuffer:
+    """
+    Lock-free single-producer/single-consumer ring buffer of float32 frames (points) placed in the shared memory. The
+    input listening thread is the only producer and the plotting code (or the recorder) is the only consumer. Memory
+    layout is:
+
+        head (uint64) | tail (uint64) | capacity * channels * float32 | [capacity * float64 timestamps]
+
+    Producer writes the frame first and then advances the head counter, consumer reads frames and then advances the
+    tail counter. Counters are never wrapped so head - tail is always a number of pending frames. When the buffer is
+    full new frames are rejected (the producer never waits for the consumer)
+
+    Usage example (consumer side):
+
+        frames = stream_buffer.peek()
+        if frames is not None:
+            points = numpy.asarray(frames)  # zero-copy (n, channels) array
+            ...
+            stream_buffer.consume(len(frames))
+            frames.release()
+
+    """
+
+    _COUNTERS = struct.Struct('QQ')
+    _COUNTER = struct.Struct('Q')
+
+    def __init__(self, capacity: int=STREAM_BUFFER_CAPACITY, channels: int=2, name: str=None,
+                 timestamps: bool=False):
+        """
+        Create a new shared memory block or attach to the existing one
+
+        :param capacity: number of frames the buffer can hold
+        :param channels: number of float values in each frame
+        :param name: [optional] name of the existing shared memory block to attach to
+        :param timestamps: [optional] whether to store a receive time (time.time()) along with every frame
+        """
+
+        self.capacity = capacity
+        self.channels = channels
+        self.timestamps = timestamps
+        self.frame_size = channels * FLOAT_SIZE
+        self._frame_format = f'{channels}f'
+        self._timestamps_offset = self._COUNTERS.size + capacity*self.frame_size
+
+        # counters are accessed through the struct module rather than a persistent memoryview so no exported pointers
+        # are left in the producer process and the block can be freely closed there
+        if name is None:
+            self._shm = multiprocessing.shared_memory.SharedMemory(
+                create=True, size=self._timestamps_offset + (capacity*TIMESTAMP_SIZE if timestamps else 0))
+            self._is_owner = True
+            self._COUNTERS.pack_into(self._shm.buf, 0, 0, 0)  # head, tail
+        else:
+            self._shm = multiprocessing.shared_memory.SharedMemory(name=name)
+            self._is_owner = False
+
+    def __reduce__(self):
+        """Pass the buffer to another process by the name of its shared memory block"""
+        return StreamBuffer, (self.capacity, self.channels, self._shm.name, self.timestamps)
+
+    @property
+    def name(self) -> str:
+        """name of the underlying shared memory block"""
+        return self._shm.name
+
+    def __len__(self) -> int:
+        """Number of frames pending for the consumer"""
+        head, tail = self._COUNTERS.unpack_from(self._shm.buf, 0)
+        return head - tail
+
+    def push(self, values) -> bool:
+        """
+        Append the frame to the buffer (producer side)
+
+        :param values: sequence of 'channels' numbers
+        :return: False if the buffer is full and the frame has been rejected, True otherwise
+        """
+
+        head, tail = self._COUNTERS.unpack_from(self._shm.buf, 0)
+        if head - tail >= self.capacity:
+            return False
+
+        struct.pack_into(self._frame_format, self._shm.buf,
+                         self._COUNTERS.size + (head % self.capacity)*self.frame_size, *values)
+        self._COUNTER.pack_into(self._shm.buf, 0, head + 1)
+        return True
+
+    def push_many(self, frames: list, timestamps: list=None) -> int:
+        """
+        Append several frames to the buffer at once (producer side). Frames that do not fit are rejected
+
+        :param frames: list of sequences of 'channels' numbers each
+        :param timestamps: [optional] list of receive times of the frames (stored only if the buffer has been created
+        with timestamps)
+        :return: number of accepted frames
+        """
+
+        head, tail = self._COUNTERS.unpack_from(self._shm.buf, 0)
+        num = min(len(frames), self.capacity - (head - tail))
+        if num <= 0:
+            return 0
+
+        values = list(itertools.chain.from_iterable(frames[:num]))
+
+        # write in up to 2 chunks: till the end of the ring and then wrapped remainder from the beginning
+        start = head % self.capacity
+        first = min(num, self.capacity - start) * self.channels
+        struct.pack_into(f'{first}f', self._shm.buf, self._COUNTERS.size + start*self.frame_size, *values[:first])
+        if first < len(values):
+            struct.pack_into(f'{len(values) - first}f', self._shm.buf, self._COUNTERS.size, *values[first:])
+
+        if self.timestamps and timestamps is not None:
+            first //= self.channels
+            struct.pack_into(f'{first}d', self._shm.buf, self._timestamps_offset + start*TIMESTAMP_SIZE,
+                             *timestamps[:first])
+            if first < num:
+                struct.pack_into(f'{num - first}d', self._shm.buf, self._timestamps_offset, *timestamps[first:num])
+
+        self._COUNTER.pack_into(self._shm.buf, 0, head + num)
+        return num
+
+    def peek(self, max_frames: int=None) -> memoryview:
+        """
+        Get pending frames without copying (consumer side). Only the contiguous part of the ring is returned so call
+        the method again after consume() to get the wrapped remainder
+
+        :param max_frames: [optional] limit a number of returned frames
+        :return: memoryview of float32 shaped as (n, channels) or None if there are no pending frames
+        """
+
+        head, tail = self._COUNTERS.unpack_from(self._shm.buf, 0)
+        start = tail % self.capacity
+        num = min(head - tail, self.capacity - start)
+        if max_frames is not None:
+            num = min(num, max_frames)
+        if num <= 0:
+            return None
+
+        offset = self._COUNTERS.size + start*self.frame_size
+        return self._shm.buf[offset:offset + num*self.frame_size].cast('f', shape=[num, self.channels])
+
+    def peek_timestamps(self, num: int) -> memoryview:
+        """
+        Get receive times of the first 'num' pending frames without copying (consumer side). Use along with peek()
+        passing the length of its result. The buffer should be created with timestamps
+
+        :param num: number of frames (should not exceed the length of the preceding peek() result)
+        :return: memoryview of float64
+        """
+
+        start = self._COUNTER.unpack_from(self._shm.buf, self._COUNTER.size)[0] % self.capacity
+        offset = self._timestamps_offset + start*TIMESTAMP_SIZE
+        return self._shm.buf[offset:offset + num*TIMESTAMP_SIZE].cast('d')
+
+    def consume(self, num: int) -> None:
+        """
+        Release frames previously got by peek() so the producer can reuse their place (consumer side)
+
+        :param num: number of frames to release
+        :return: None
+        """
+
+        tail = self._COUNTER.unpack_from(self._shm.buf, self._COUNTER.size)[0]
+        self._COUNTER.pack_into(self._shm.buf, self._COUNTER.size, tail + num)
+
+    def flush(self) -> None:
+        """
+        Drop all pending frames (consumer side)
+
+        :return: None
+        """
+
+        head = self._COUNTER.unpack_from(self._shm.buf, 0)[0]
+        self._COUNTER.pack_into(self._shm.buf, self._COUNTER.size, head)
+
+    def close(self) -> None:
+        """
+        Detach from the shared memory block and destroy it if we are its creator. All views got by peek() should be
+        released before. Repeated calls are allowed
+
+        :return: None
+        """
+
+        if self._shm is None:  # already closed
+            return
+
+        self._shm.close()
+        if self._is_owner:
+            self._shm.unlink()
+        self._shm = None
+
+
 
 class Stream:
     """Class representing the stream from the RemoteController (e.g. plot data)"""
@@ -228,13 +702,15 @@ class Stream:
 
     def __init__(self, connection: RemoteController=None):
         """
-        Initialize the Stream instance inside a given RemoteController. It does not opening the stream itself. Use
-        pipe_rx and pipe_tx counterparts in outer code to assign source and sink of a stream pipe
+        Initialize the Stream instance inside a given RemoteController. It does not opening the stream itself. Incoming
+        points are placed into the 'buffer' (StreamBuffer) along with their receive times by the input listening thread
+        so use it in outer code as a sink of the stream
 
         :param connection: RemoteController instance to bind with
         """
         self.connection = connection
-        self.pipe_rx, self.pipe_tx = multiprocessing.Pipe(duplex=False)
+        self.buffer = StreamBuffer(timestamps=True)
+        self._taps = {}  # name: (tap, layout change callback), see add_tap()
         self._msg_counter = 0
         self._is_run = False
 
@@ -255,10 +731,477 @@ class Stream:
         else:
             self.start()
 
+    def _is_listener_alive(self) -> bool:
+        """Whether the input listening thread can process commands (always so for non-selectable transports)"""
+        return self.connection.input_thread is None or self.connection.input_thread.is_alive()
+
+    @property
+    def channels(self) -> int:
+        """number of values in each stream frame (see read_layout())"""
+        return self.buffer.channels
+
+    def read_layout(self) -> int:
+        """
+        Ask the controller for the number of channels of stream frames and adapt the stream buffer and the listener to
+        it. Controllers not supporting the 'stream_layout' command respond with the error and are considered to stream
+        STREAM_CHANNELS_DEFAULT values. The 'buffer' is replaced by the new one when the number of channels changes so
+        consumers should take it after this call. Taps of the old layout are detached by the listener and their
+        'on_layout' callbacks are invoked (see add_tap())
+
+        :return: number of channels
+        """
+
+        try:
+            channels = int(self.connection.read('stream_layout'))
+        except ResponseException:
+            channels = STREAM_CHANNELS_DEFAULT
+        if not 1 <= channels <= STREAM_MAX_CHANNELS:
+            raise ValueError(f"Unsupported stream layout of {channels} channels (maximum is {STREAM_MAX_CHANNELS})")
+
+        if channels != self.buffer.channels:
+            buffer = StreamBuffer(channels=channels, timestamps=True)
+            if self._is_listener_alive():
+                self.connection.input_thread_control_pipe_main.send((InputThreadCommand.STREAM_LAYOUT, buffer))
+                self.connection.input_thread_control_pipe_main.recv()
+            self.buffer.close()
+            self.buffer = buffer
+
+            for name, (tap, on_layout) in list(self._taps.items()):
+                if tap.channels != channels:  # already detached by the listener
+                    del self._taps[name]
+                    if on_layout is not None:
+                        on_layout(channels)
+
+        return channels
+
+    def add_tap(self, tap: StreamBuffer, on_layout=None) -> None:
+        """
+        Ask the input listening thread to copy all incoming stream frames into one more buffer. Unlike the main one,
+        taps are fed regardless of the STREAM_ACCEPT/STREAM_REJECT state. The listener never waits for the tap so the
+        consumer should keep up with the stream. The tap is detached when the stream layout changes to other number of
+        channels (see read_layout())
+
+        :param tap: StreamBuffer created with timestamps
+        :param on_layout: [optional] callable accepting the new number of channels, invoked by read_layout() after the
+        tap has been detached due to the layout change (e.g. to attach the new tap)
+        :return: None
+        """
+
+        self._taps[tap.name] = (tap, on_layout)
+        if self._is_listener_alive():
+            self.connection.input_thread_control_pipe_main.send((InputThreadCommand.TAP_ATTACH, tap))
+
+    def remove_tap(self, tap: StreamBuffer) -> None:
+        """
+        Detach the buffer previously added by add_tap(). Returns when the listener has released it so the buffer can
+        be closed right after
+
+        :param tap: StreamBuffer instance
+        :return: None
+        """
+
+        self._taps.pop(tap.name, None)
+        if self._is_listener_alive():
+            self.connection.input_thread_control_pipe_main.send((InputThreadCommand.TAP_DETACH, tap.name))
+            self.connection.input_thread_control_pipe_main.recv()
+
+    @property
+    def decimation(self) -> int:
+        """current decimation factor applied by the listener (1 means the full rate)"""
+        return self.connection.listener_status.decimation or 1
+
+    def counters(self) -> dict:
+        """
+        Listener' statistics read directly from the shared memory (no round trip to the listener): 'bytes', 'received',
+        'forwarded', 'decimated', 'dropped' and 'max_backlog' counters, 'last_packet_time' and 'decimation' (see
+        ListenerStatus). Counters never reset so take differences between snapshots to get values for an interval
+
+        :return: dictionary
+        """
+
+        return self.connection.listener_status.counters()
+
+    def set_decimation(self, mode: str) -> None:
+        """
+        Choose how the listener thins out the stream when the buffer consumer falls behind
+
+        :param mode: one of STREAM_DECIMATION_MODES (None to always pass the full rate dropping frames on overflow)
+        :return: None
+        """
+
+        if mode not in STREAM_DECIMATION_MODES:
+            raise ValueError(f"Unknown decimation mode '{mode}', choose one of {STREAM_DECIMATION_MODES}")
+        if self._is_listener_alive():
+            self.connection.input_thread_control_pipe_main.send((InputThreadCommand.DECIMATION_SET, mode))
+
     def close(self):
         self.stop()
-        self.pipe_rx.close()
-        self.pipe_tx.close()
+        self.buffer.close()
+
+
+
+class Transport:
+    """
+    Base class of links to the remote controller. Transport exchanges whole messages (requests and responses/stream
+    messages) so the rest of the code does not care about the underlying medium. Receiving is non-blocking.
+
+    Selectable transports (default) provide fileno() and are listened by the input listening thread. Non-selectable
+    ones (e.g. LoopbackTransport) have nothing to wait on and notify the listener themselves by calling the function
+    set by set_listener() every time new messages are available
+    """
+
+    selectable = True
+
+    # size of stream messages in the negotiated layout (set by the input listening thread). Datagram transports do not
+    # need it, byte stream ones use it to find message boundaries
+    stream_message_size = stream_message_size(STREAM_CHANNELS_DEFAULT)
+
+    def fileno(self) -> int:
+        """
+        File descriptor (socket handle on Windows) to wait on for incoming messages
+
+        :return: int
+        """
+        raise NotImplementedError
+
+    def send(self, message: bytes) -> None:
+        """
+        Transmit the message (request) to the controller
+
+        :param message: bytes to send
+        :return: None
+        """
+        raise NotImplementedError
+
+    def recv_into(self, buffer) -> int:
+        """
+        Receive a single incoming message into the given buffer. Raises BlockingIOError if there is no message and
+        EOFError if the link has been closed by the other side (the listener stops waiting on such transport)
+
+        :param buffer: writable bytes-like object fitting the longest message
+        :return: message size (the buffer length if the message has been truncated)
+        """
+        raise NotImplementedError
+
+    def recv_into_timestamped(self, buffer) -> tuple:
+        """
+        Same as recv_into() but also returns the receive time of the message. Transports without a better source (e.g.
+        kernel timestamps) report the current time
+
+        :param buffer: writable bytes-like object fitting the longest message
+        :return: (message size, receive time as time.time())
+        """
+        return self.recv_into(buffer), time.time()
+
+    def set_listener(self, listener) -> None:
+        """
+        Set the function to call on new incoming messages (non-selectable transports only)
+
+        :param listener: callable without arguments
+        :return: None
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class _SocketTransport(Transport):
+    """
+    Common part of datagram socket links. Receive times are taken from the kernel (SO_TIMESTAMPNS) so they do not
+    include the delay of the listener wakeup and batch draining. Where the option is not available the time of the
+    recv call is used instead
+    """
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.sock.settimeout(0)  # explicitly set the non-blocking mode
+
+        self.kernel_timestamps = False
+        if SO_TIMESTAMPNS is not None:
+            try:
+                self.sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+                self.kernel_timestamps = True
+            except OSError:
+                pass
+        self._ancbufsize = socket.CMSG_SPACE(_TIMESPEC.size) if self.kernel_timestamps else 0
+
+    def fileno(self) -> int:
+        return self.sock.fileno()
+
+    def send(self, message: bytes) -> None:
+        self.sock.sendto(message, self.address)
+
+    def recv_into(self, buffer) -> int:
+        return self.sock.recv_into(buffer)
+
+    def recv_into_timestamped(self, buffer) -> tuple:
+        if not self.kernel_timestamps:
+            return self.sock.recv_into(buffer), time.time()
+
+        nbytes, ancdata, _, _ = self.sock.recvmsg_into([buffer], self._ancbufsize)
+        for level, kind, data in ancdata:
+            if level == socket.SOL_SOCKET and kind == SO_TIMESTAMPNS:
+                seconds, nanoseconds = _TIMESPEC.unpack_from(data)
+                return nbytes, seconds + nanoseconds*1e-9
+        return nbytes, time.time()
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+class UDPTransport(_SocketTransport):
+    """UDP/IP link (default one)"""
+
+    def __init__(self, ip_addr: str, udp_port: int):
+        """
+        UDPTransport constructor
+
+        :param ip_addr: string representing IP-address of the controller' network interface
+        :param udp_port: integer representing UDP port of the controller' network interface
+        """
+
+        self.address = (ip_addr, udp_port)
+        super(UDPTransport, self).__init__(socket.socket(socket.AF_INET, socket.SOCK_DGRAM))
+
+
+class UnixDatagramTransport(_SocketTransport):
+    """AF_UNIX datagram socket link (e.g. to a controller simulator running on the same machine). UNIX only"""
+
+    def __init__(self, server_path: str, client_path: str=None):
+        """
+        UnixDatagramTransport constructor. Unlike UDP, the socket should be bound to be able to receive responses
+
+        :param server_path: path of the controller' socket
+        :param client_path: [optional] path to bind our socket to (temporary one is created by default)
+        """
+
+        self.address = server_path
+        if client_path is None:
+            self._tmp_dir = tempfile.mkdtemp(prefix='pid-controller-')
+            client_path = os.path.join(self._tmp_dir, 'client.sock')
+        else:
+            self._tmp_dir = None
+        self.client_path = client_path
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(client_path)
+        super(UnixDatagramTransport, self).__init__(sock)
+
+    def close(self) -> None:
+        self.sock.close()
+        if os.path.exists(self.client_path):
+            os.unlink(self.client_path)
+        if self._tmp_dir is not None:
+            os.rmdir(self._tmp_dir)
+            self._tmp_dir = None
+
+
+class SerialTransport(Transport):
+    """
+    Byte stream link (serial UART, pty and so on). As there are no datagram boundaries, requests and responses are
+    framed to REMOTECONTROLLER_MSG_SIZE bytes (requests are padded with zeros) while stream messages are recognized by
+    their first byte and take stream_message_size bytes. Bytes which cannot start a message (e.g. after a lost or
+    corrupted byte) are dropped until the valid first byte and counted in 'dropped_bytes'. Since the file descriptor
+    cannot be passed to another process use it with 'thread' or 'asyncio' listener backends (see LISTENER_BACKENDS)
+    """
+
+    def __init__(self, port, baudrate: int=None):
+        """
+        SerialTransport constructor
+
+        :param port: either a path to the device (it is opened in raw non-blocking mode, UNIX only) or a pyserial-like
+        object opened in non-blocking mode (timeout=0) providing read(), write() and fileno()
+        :param baudrate: [optional] speed to set up (for the device path only)
+        """
+
+        self._rx = bytearray()
+        self.dropped_bytes = 0
+
+        if isinstance(port, str):
+            import termios
+            import tty
+
+            self._port = None
+            self._fd = os.open(port, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+            tty.setraw(self._fd)
+            if baudrate is not None:
+                attributes = termios.tcgetattr(self._fd)
+                attributes[4] = attributes[5] = getattr(termios, f'B{baudrate}')  # input and output speeds
+                termios.tcsetattr(self._fd, termios.TCSANOW, attributes)
+        else:
+            self._port = port
+            self._fd = port.fileno()
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def send(self, message: bytes) -> None:
+        message = bytes(message).ljust(REMOTECONTROLLER_MSG_SIZE, b'\x00')
+        if self._port is not None:
+            self._port.write(message)
+        else:
+            os.write(self._fd, message)
+
+    def _resync(self) -> None:
+        """
+        Drop leading bytes which cannot start a message
+
+        :return: None
+        """
+
+        start = 0
+        while start < len(self._rx) and self._rx[start] not in _VALID_HEADERS:
+            start += 1
+        if start:
+            del self._rx[:start]
+            self.dropped_bytes += start
+
+    def _read(self) -> bytes:
+        """
+        Read all available bytes
+
+        :return: non-empty bytes
+        """
+
+        try:
+            if self._port is not None:
+                chunk = self._port.read(RECEIVE_BATCH_SIZE * REMOTECONTROLLER_MSG_SIZE)
+                if not chunk:  # pyserial returns nothing when there is no data
+                    raise BlockingIOError
+            else:
+                chunk = os.read(self._fd, RECEIVE_BATCH_SIZE * REMOTECONTROLLER_MSG_SIZE)
+                if not chunk:  # end of file, e.g. the other end of the pty has been closed
+                    raise EOFError("Serial link has been closed")
+        except BlockingIOError:
+            raise
+        except OSError as e:  # e.g. EIO on hangup or the unplugged USB adapter
+            raise EOFError("Serial link has been closed") from e
+        return chunk
+
+    def recv_into(self, buffer) -> int:
+        while True:
+            self._resync()
+            if self._rx:
+                size = self.stream_message_size if self._rx[0] & _STREAM_PREFIX_MASK else REMOTECONTROLLER_MSG_SIZE
+                if len(self._rx) >= size:
+                    break
+            self._rx += self._read()
+
+        nbytes = min(size, len(buffer))
+        buffer[:nbytes] = self._rx[:nbytes]
+        del self._rx[:size]
+        return nbytes
+
+    def close(self) -> None:
+        if self._port is not None:
+            self._port.close()
+        elif self._fd != -1:
+            os.close(self._fd)
+            self._fd = -1  # following I/O will fail with OSError like on the closed socket
+
+
+class InlineTransport(Transport):
+    """
+    Base class of non-selectable transports: incoming messages are put to the internal queue by deliver() (from any
+    thread) and are consumed by the listener right in the delivering thread. While the input is paused the queue keeps
+    only the last INLINE_TRANSPORT_BACKLOG messages. Subclasses should implement send()
+    """
+
+    selectable = False
+
+    def __init__(self):
+        self._rx = collections.deque(maxlen=INLINE_TRANSPORT_BACKLOG)
+        self._lock = threading.RLock()
+        self._listener = None
+
+    def set_listener(self, listener) -> None:
+        self._listener = listener
+
+    def execute(self, function, *args):
+        """
+        Run the function exclusively with deliveries: the listener is driven by deliver() under the same lock, so the
+        function never interleaves with receiving (e.g. to change the listener state from another thread)
+
+        :param function: callable to run
+        :param args: positional arguments for the function
+        :return: the value returned by the function
+        """
+
+        with self._lock:
+            return function(*args)
+
+    def deliver(self, *messages) -> None:
+        """
+        Put incoming messages to the queue and notify the listener. Messages are dropped if there is no listener (like
+        the closed socket does)
+
+        :param messages: messages (bytes) to deliver
+        :return: None
+        """
+
+        with self._lock:
+            if self._listener is not None:
+                self._rx.extend(messages)
+                self._listener()
+
+    def pending(self) -> int:
+        """
+        Number of messages waiting to be received
+
+        :return: int
+        """
+
+        return len(self._rx)
+
+    def recv_into(self, buffer) -> int:
+        try:
+            message = self._rx.popleft()
+        except IndexError:
+            raise BlockingIOError
+        nbytes = min(len(message), len(buffer))
+        buffer[:nbytes] = message[:nbytes]
+        return nbytes
+
+
+class LoopbackTransport(InlineTransport):
+    """
+    In-process link to a simulated controller without any system calls. Requests are passed directly to the given
+    responder function and its responses are delivered to the listener right away. Unsolicited messages (e.g. stream
+    ones) can be injected at any time from any thread by inject()
+
+    Usage example:
+
+        def responder(request: bytes) -> list:
+            ...
+            return [response]
+
+        conn = RemoteController(transport=LoopbackTransport(responder))
+
+    """
+
+    def __init__(self, responder):
+        """
+        LoopbackTransport constructor
+
+        :param responder: function accepting the request (bytes) and returning an iterable of response messages
+        """
+
+        super(LoopbackTransport, self).__init__()
+        self.responder = responder
+
+    def send(self, message: bytes) -> None:
+        self.deliver(*self.responder(bytes(message)))
+
+    def inject(self, *messages) -> None:
+        """
+        Deliver unsolicited messages to the listener
+
+        :param messages: messages (bytes) to deliver
+        :return: None
+        """
+
+        self.deliver(*messages)
 
 
 
@@ -276,86 +1219,545 @@ class InputThreadCommand(enum.Enum):
     somehow [gracefully] share or pass the Stream object (or its part) to the thread
     """
 
-    MSG_CNT_GET = enum.auto()
-    MSG_CNT_RST = enum.auto()
+    MSG_CNT_GET = enum.auto()
+    MSG_CNT_RST = enum.auto()
+
+    STREAM_ACCEPT = enum.auto()
+    STREAM_REJECT = enum.auto()
+
+    INPUT_ACCEPT = enum.auto()
+    INPUT_REJECT = enum.auto()
+
+    # commands with an argument are sent as (command, argument) tuples
+    TAP_ATTACH = enum.auto()  # argument: StreamBuffer to copy all stream frames into (with timestamps)
+    TAP_DETACH = enum.auto()  # argument: name of the StreamBuffer, listener replies with True when it is released
+    DECIMATION_SET = enum.auto()  # argument: one of STREAM_DECIMATION_MODES
+    STREAM_LAYOUT = enum.auto()  # argument: new StreamBuffer for frames of its number of channels, listener detaches
+                                 # taps of other sizes and replies with True when the old buffer is released
+
+    EXIT = enum.auto()
+
+
+class ListenerStatus(ctypes.Structure):
+    """
+    State of the input listening thread published in the shared memory (multiprocessing.sharedctypes.RawValue) so it
+    can be read at any time without the round trip over the control pipe and without any locking. The listener is the
+    only writer and every field is an aligned machine word so readers never see a torn value. Other stream sources
+    (e.g. replay.ReplaySource) publish their state in the same structure so consumers do not depend on the source
+    """
+    _fields_ = [
+        ('last_packet_time', ctypes.c_double),  # time.monotonic() of the last received datagram of any type
+        ('decimation', ctypes.c_uint32),  # current decimation factor of the stream (1 means the full rate)
+        ('link_closed', ctypes.c_uint32),  # non-zero when the transport has been closed by the other side
+
+        # monotonic counters (never reset, take differences to get values for an interval)
+        ('bytes', ctypes.c_uint64),  # all received bytes
+        ('received', ctypes.c_uint64),  # stream frames
+        ('forwarded', ctypes.c_uint64),  # stream frames put into the stream buffer
+        ('decimated', ctypes.c_uint64),  # stream frames thinned out by the decimation
+        ('dropped', ctypes.c_uint64),  # stream frames rejected by the full stream buffer
+        ('max_backlog', ctypes.c_uint64)  # maximum number of frames pending in the stream buffer
+    ]
+
+    def counters(self) -> dict:
+        """
+        Snapshot of all fields. Fields are read without any locking (each one is consistent by itself)
+
+        :return: dictionary
+        """
+        return {name: getattr(self, name) for name, *_ in self._fields_}
+
+
+class _StreamDecimator:
+    """
+    Thins out the stream by the given factor (see STREAM_DECIMATION_MODES). Incomplete buckets are carried over to the
+    next batch so the result does not depend on how frames are split into batches
+    """
+
+    def __init__(self, mode: str=STREAM_DECIMATION_DEFAULT):
+        self.mode = mode
+        self.factor = 1
+        self._frames = []
+        self._timestamps = []
+
+    def set_factor(self, factor: int) -> None:
+        self.factor = factor
+
+    def process(self, frames: list, timestamps: list) -> tuple:
+        """
+        Decimate the next portion of the stream
+
+        :param frames: list of stream values tuples
+        :param timestamps: list of their receive times
+        :return: (list of frames, list of timestamps) to pass further
+        """
+
+        if self.factor == 1 and not self._frames:
+            return frames, timestamps
+
+        self._frames.extend(frames)
+        self._timestamps.extend(timestamps)
+
+        if self.factor == 1:  # back to the full rate, release leftovers as is
+            bucket = 1
+        else:
+            bucket = 2*self.factor if self.mode == 'minmax' else self.factor
+        num = len(self._frames) // bucket * bucket
+
+        if bucket == 1 or self.mode == 'pick':
+            frames = self._frames[bucket - 1:num:bucket]  # the newest frame of every bucket
+            timestamps = self._timestamps[bucket - 1:num:bucket]
+        else:
+            frames, timestamps = [], []
+            for start in range(0, num, bucket):
+                channels = list(zip(*self._frames[start:start + bucket]))
+                frames.append(tuple(map(min, channels)))
+                frames.append(tuple(map(max, channels)))
+                timestamps.append(self._timestamps[start])
+                timestamps.append(self._timestamps[start + bucket - 1])
+
+        del self._frames[:num]
+        del self._timestamps[:num]
+        return frames, timestamps
+
+
+class _RTTEstimator:
+    """
+    Round trip time estimation of RFC 6298: smoothed RTT and its variation are updated by every sample and give the
+    retransmission timeout 'rto'. Timeouts (backoff()) double it until the next sample
+    """
+
+    def __init__(self, initial_rto: float=READ_WRITE_TIMEOUT_SYNCHRONOUS):
+        self.srtt = None
+        self.rttvar = None
+        self.rto = initial_rto
+
+    def update(self, sample: float) -> None:
+        """
+        :param sample: measured round trip time in seconds (of a request which has not been retransmitted)
+        :return: None
+        """
+
+        if self.srtt is None:
+            self.srtt = sample
+            self.rttvar = sample / 2
+        else:
+            self.rttvar = (1 - RTO_BETA)*self.rttvar + RTO_BETA*abs(self.srtt - sample)
+            self.srtt = (1 - RTO_ALPHA)*self.srtt + RTO_ALPHA*sample
+        self.rto = min(max(self.srtt + RTO_K*self.rttvar, RTO_MIN), RTO_MAX)
+
+    def backoff(self) -> None:
+        self.rto = min(self.rto * 2, RTO_MAX)
+
+
+class _QueueConnection:
+    """
+    Minimal in-process counterpart of multiprocessing.connection.Connection (send(), recv(), poll() and close()) built
+    on top of collections.deque. Objects are handed over by reference without any pickling so it is suitable only when
+    both ends live in the same process (thread-based input listeners)
+    """
+
+    def __init__(self, queue: collections.deque, condition: threading.Condition):
+        self._queue = queue
+        self._condition = condition
+
+    def send(self, obj) -> None:
+        with self._condition:
+            self._queue.append(obj)
+            self._condition.notify()
+
+    def recv(self):
+        with self._condition:
+            self._condition.wait_for(lambda: self._queue)
+            return self._queue.popleft()
+
+    def poll(self, timeout: float=0.0) -> bool:
+        with self._condition:
+            return bool(self._condition.wait_for(lambda: self._queue, timeout))
+
+    def close(self) -> None:
+        pass
+
+
+def _queue_pipe() -> tuple:
+    """
+    Create a simplex pipe of 2 _QueueConnection objects (same as multiprocessing.Pipe(duplex=False) does)
+
+    :return: (receiving end, transmitting end)
+    """
+
+    queue = collections.deque()
+    condition = threading.Condition()
+    return _QueueConnection(queue, condition), _QueueConnection(queue, condition)
+
+
+class _InputHandler:
+    """
+    All the logic of the input listening thread: draining of the socket, routing of messages and processing of
+    InputThreadCommand's. It does not depend on a way it is driven so the same class is used by all listener backends
+    (see LISTENER_BACKENDS)
+    """
+
+    def __init__(self, transport: Transport, control_pipe, var_cmd_pipe_tx, stream_buffer: StreamBuffer,
+                 status: ListenerStatus):
+        """
+        _InputHandler constructor
+
+        :param transport: Transport instance to listen
+        :param control_pipe: send/receive service messages over this
+        :param var_cmd_pipe_tx: transmission part of the pipe for delivering messages like 'setpoint' and
+        'err_I_limits'
+        :param stream_buffer: shared memory ring buffer for delivering streaming values (e.g. for plotting)
+        :param status: shared memory structure to publish the listener state
+        """
+
+        self.transport = transport
+        self.control_pipe = control_pipe
+        self.var_cmd_pipe_tx = var_cmd_pipe_tx
+        self.stream_buffer = stream_buffer
+        self.status = status
+
+        self.input_accept = True
+
+        self.stream_accept = True
+        self.stream_msg_cnt = 0
+
+        self.taps = []  # additional consumers of the stream (e.g. recorders)
+
+        self.decimator = _StreamDecimator()
+        self._decimation_check_time = 0.0
+        self._decimation_fill = 0.0
+        self.status.decimation = 1
+
+        self._set_layout(stream_buffer.channels)
+
+
+    def _set_layout(self, channels: int) -> None:
+        """
+        Prepare the receiving of stream frames of the given number of channels
+
+        :param channels: number of channels
+        :return: None
+        """
+
+        self.channels = channels
+        self.transport.stream_message_size = stream_message_size(channels)
+
+        # expected sizes of messages indexed by the stream prefix bits of their first bytes
+        self._message_sizes = (REMOTECONTROLLER_MSG_SIZE,) + (stream_message_size(channels),) * _STREAM_PREFIX_MASK
+
+        # preallocated receive buffer for RECEIVE_BATCH_SIZE messages (see _batch_struct())
+        self._slot_size = _batch_struct(channels).size
+        self._batch_view = memoryview(bytearray(RECEIVE_BATCH_SIZE * self._slot_size))
+
+
+    def receive(self) -> bool:
+        """
+        Drain all pending messages (up to RECEIVE_BATCH_SIZE) from the transport, parse them at once and route to the
+        corresponding pipe or the stream buffer
+
+        :return: False if the transport has been broken and the listener should exit, True otherwise
+        """
+
+        num = 0
+        total_bytes = 0
+        timestamps = []
+        slot_size = self._slot_size
+        while num < RECEIVE_BATCH_SIZE:
+            offset = num * slot_size
+            try:
+                nbytes, timestamp = self.transport.recv_into_timestamped(self._batch_view[offset:offset + slot_size])
+            except BlockingIOError:  # no more data
+                break
+            except ConnectionResetError:  # meet on Windows
+                return False
+            except EOFError:  # nothing will come anymore, stop waiting on the transport (see run())
+                self.status.link_closed = 1
+                break
+            total_bytes += nbytes
+            if nbytes == self._message_sizes[self._batch_view[offset] & _STREAM_PREFIX_MASK]:  # skip malformed ones
+                num += 1
+                timestamps.append(timestamp)
+
+        if total_bytes:
+            self.status.last_packet_time = time.monotonic()
+            self.status.bytes += total_bytes
+
+        if num:
+            batch = self._batch_view[:num * slot_size]
+            stream_values, responses = _parse_responses(batch, self.channels)
+            if responses:  # keep receive times of stream messages only
+                timestamps = list(itertools.compress(
+                    timestamps, [header & _STREAM_PREFIX_MASK for header in bytes(batch[::slot_size])]))
+            if stream_values and self.taps:  # taps get all frames regardless of the graphs' acceptance
+                for tap in self.taps:
+                    tap.push_many(stream_values, timestamps)
+            self.status.received += len(stream_values)
+            if stream_values and self.stream_accept:
+                self._adapt_decimation()
+                decimated_values, timestamps = self.decimator.process(stream_values, timestamps)
+                forwarded = self.stream_buffer.push_many(decimated_values, timestamps)
+                self.stream_msg_cnt += len(decimated_values)
+
+                self.status.forwarded += forwarded
+                self.status.decimated += len(stream_values) - len(decimated_values)
+                self.status.dropped += len(decimated_values) - forwarded
+                backlog = len(self.stream_buffer)
+                if backlog > self.status.max_backlog:
+                    self.status.max_backlog = backlog
+            for response in responses:
+                self.var_cmd_pipe_tx.send(response)
+
+        return True
+
+
+    def _adapt_decimation(self) -> None:
+        """
+        Graceful backpressure: every STREAM_DECIMATION_HOLD_TIME the stream buffer backlog is evaluated. The decimation
+        factor is increased while the consumer falls behind (the backlog is above STREAM_DECIMATION_HIGH_WATERMARK and
+        is still growing) and decreased when the consumer has caught up (below STREAM_DECIMATION_LOW_WATERMARK)
+
+        :return: None
+        """
+
+        if self.decimator.mode is None:
+            return
+
+        now = time.monotonic()
+        if now - self._decimation_check_time < STREAM_DECIMATION_HOLD_TIME:
+            return
+        self._decimation_check_time = now
+
+        fill = len(self.stream_buffer) / self.stream_buffer.capacity
+        is_growing = fill >= self._decimation_fill
+        self._decimation_fill = fill
+
+        factor = self.decimator.factor
+        if fill > STREAM_DECIMATION_HIGH_WATERMARK and is_growing and factor < STREAM_DECIMATION_MAX_FACTOR:
+            factor *= 2
+        elif fill < STREAM_DECIMATION_LOW_WATERMARK and factor > 1:
+            factor //= 2
+        else:
+            return
+
+        self.decimator.set_factor(factor)
+        self.status.decimation = factor
+
+
+    def command(self, command: 'InputThreadCommand') -> bool:
+        """
+        Process a single service message
+
+        :param command: InputThreadCommand instance or (InputThreadCommand, argument) tuple
+        :return: False if the listener should exit, True otherwise
+        """
+
+        if isinstance(command, tuple):
+            command, argument = command
+
+        if command == InputThreadCommand.MSG_CNT_GET:
+            self.control_pipe.send(self.stream_msg_cnt)
+        elif command == InputThreadCommand.MSG_CNT_RST:
+            self.stream_msg_cnt = 0
+        elif command == InputThreadCommand.STREAM_REJECT:
+            self.stream_accept = False
+        elif command == InputThreadCommand.STREAM_ACCEPT:
+            self.stream_accept = True
+            self.decimator.set_factor(1)  # the consumer starts with the empty buffer
+            self.status.decimation = 1
+        elif command == InputThreadCommand.INPUT_REJECT:
+            self.input_accept = False
+        elif command == InputThreadCommand.INPUT_ACCEPT:
+            self.input_accept = True
+        elif command == InputThreadCommand.TAP_ATTACH:
+            self.taps.append(argument)
+        elif command == InputThreadCommand.TAP_DETACH:
+            self._detach_taps(lambda tap: tap.name == argument)
+            self.control_pipe.send(True)
+        elif command == InputThreadCommand.DECIMATION_SET:
+            self.decimator = _StreamDecimator(argument)
+            self.status.decimation = 1
+        elif command == InputThreadCommand.STREAM_LAYOUT:
+            if not self.stream_buffer._is_owner:  # our own attachment made by the 'process' backend
+                self.stream_buffer.close()
+            self.stream_buffer = argument
+            self._detach_taps(lambda tap: tap.channels != argument.channels)  # frames do not fit them anymore
+            self._set_layout(argument.channels)
+            self.decimator = _StreamDecimator(self.decimator.mode)  # drop incomplete buckets of the old layout
+            self.status.decimation = 1
+            self.control_pipe.send(True)
+        elif command == InputThreadCommand.EXIT:
+            return False
+
+        return True
+
+
+    def _detach_taps(self, predicate) -> None:
+        """
+        Stop feeding taps matching the predicate
+
+        :param predicate: callable accepting the StreamBuffer and returning bool
+        :return: None
+        """
+
+        for tap in [tap for tap in self.taps if predicate(tap)]:
+            self.taps.remove(tap)
+            if not tap._is_owner:  # our own attachment made by the 'process' backend
+                tap.close()
+
+
+    def poke(self) -> None:
+        """
+        Entry point for non-selectable transports (see InlineTransport) notifying about new incoming messages by
+        themselves
+
+        :return: None
+        """
+
+        while self.input_accept and self.transport.pending():
+            self.receive()
+
+
+    def run(self) -> None:
+        """
+        Blocking loop for 'process' and 'thread' backends. It waits on both the transport and the control pipe at once
+        so it wakes up immediately on any of them and consumes no CPU time when the link is idle.
+        multiprocessing.connection.wait() is backed by selectors on UNIX and by WaitForMultipleObjects on Windows (where
+        selectors cannot handle pipes)
+
+        :return: None
+        """
+
+        while True:
+            if self.input_accept and not self.status.link_closed:
+                ready = multiprocessing.connection.wait([self.transport, self.control_pipe])
+            else:
+                ready = multiprocessing.connection.wait([self.control_pipe])
+
+            if self.transport in ready:
+                if not self.receive():
+                    return
+
+            # process all pending service messages
+            while self.control_pipe.poll():
+                if not self.command(self.control_pipe.recv()):
+                    return
+
+
+def _thread_input_handler(
+    transport:         Transport,
+    control_pipe:      multiprocessing.Pipe,
+    var_cmd_pipe_tx:   multiprocessing.Pipe,
+    stream_buffer:     StreamBuffer,
+    status:            ListenerStatus
+) -> None:
+
+    """
+    Routine is intended to be running in the background as a thread (or a process) and listening to all incoming
+    messages. It blocks in a single wait on both the transport and the control pipe so it wakes up immediately on any of
+    them and consumes no CPU time when the link is idle. On each wakeup all pending messages (up to RECEIVE_BATCH_SIZE)
+    are drained from the transport, parsed at once and routed to the corresponding pipe or the stream buffer.
+    No other thread should listen to the given transport at the same time. Use 'stream_accept' flag to block the
+    execution.
+    Listening to pipes threads are responsible for overflow detection and correction (stream points are counted even
+    if the buffer is full and they have been dropped). Use 'control_pipe' to send/receive service messages and control
+    thread execution.
+    Thread is normally terminated by InputThreadCommand.EXIT command or SIGTERM signal
+
+    :param transport: Transport instance to listen
+    :param control_pipe: send/receive service messages over this
+    :param var_cmd_pipe_tx: transmission part of the pipe for delivering messages like 'setpoint' and 'err_I_limits'
+    :param stream_buffer: shared memory ring buffer for delivering streaming values (e.g. for plotting). Take care to
+    not overflow it!
+    :param status: shared memory structure to publish the listener state (e.g. time of the last received packet)
+    :return: None
+    """
+
+    _InputHandler(transport, control_pipe, var_cmd_pipe_tx, stream_buffer, status).run()
+
+
+class _AsyncioControlConnection:
+    """
+    Main thread' end of the control pipe of the 'asyncio' listener backend. Commands are scheduled directly into the
+    listener's event loop (no pickling, the loop is woken up by its own self-pipe) and replies are returned through the
+    _QueueConnection
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, handler: _InputHandler, replies_rx: _QueueConnection):
+        self._loop = loop
+        self._handler = handler
+        self._replies_rx = replies_rx
+
+    def _command(self, command: 'InputThreadCommand') -> None:
+        """Executes in the listener's event loop"""
+
+        if not self._handler.command(command):
+            self._loop.stop()
+        elif self._handler.input_accept and not self._handler.status.link_closed:
+            self._loop.add_reader(self._handler.transport, self._receive)
+        else:
+            self._loop.remove_reader(self._handler.transport)
+
+    def _receive(self) -> None:
+        """Executes in the listener's event loop"""
+
+        if not self._handler.receive():
+            self._loop.stop()
+        elif self._handler.status.link_closed:
+            self._loop.remove_reader(self._handler.transport)
+
+    def run(self) -> None:
+        """Target of the listener thread"""
+
+        asyncio.set_event_loop(self._loop)
+        self._loop.add_reader(self._handler.transport, self._receive)
+        self._loop.run_forever()
+        self._loop.close()
 
-    STREAM_ACCEPT = enum.auto()
-    STREAM_REJECT = enum.auto()
+    def send(self, command: 'InputThreadCommand') -> None:
+        if not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._command, command)
 
-    INPUT_ACCEPT = enum.auto()
-    INPUT_REJECT = enum.auto()
+    def recv(self):
+        return self._replies_rx.recv()
 
-    EXIT = enum.auto()
+    def poll(self, timeout: float=0.0) -> bool:
+        return self._replies_rx.poll(timeout)
 
+    def close(self) -> None:
+        pass
 
-def _thread_input_handler(
-    sock:              socket.socket,
-    control_pipe:      multiprocessing.Pipe,
-    var_cmd_pipe_tx:   multiprocessing.Pipe,
-    stream_pipe_tx:    multiprocessing.Pipe
-) -> None:
 
-    """
-    Routine is intended to be running in the background as a thread and listening to all incoming messages. Maximum
-    receive time is determined by THREAD_INPUT_HANDLER_SLEEP_TIME variable. The function then performs a basic parsing
-    to determine a type of the message and route it to the corresponding pipe.
-    No other thread should listen to the given socket at the same time. Use 'stream_accept' flag to block the execution.
-    Listening to pipes threads are responsible for overflow detection and correction. Use 'control_pipe' to send/receive
-    service messages and control thread execution.
-    Thread is normally terminated by SIGTERM signal
 
-    :param sock: socket instance to listen
-    :param control_pipe: send/receive service messages over this
-    :param var_cmd_pipe_tx: transmission part of the pipe for delivering messages like 'setpoint' and 'err_I_limits'
-    :param stream_pipe_tx: transmission part of the pipe for delivering streaming values (e.g. for plotting). Take care
-    to not overflow it!
-    :return: None
+class _InlineControlConnection:
+    """
+    Main thread' end of the control pipe for non-selectable transports (see InlineTransport). There is no listening
+    thread at all: commands are executed right away and the handler is driven by the transport itself. Commands are
+    run by InlineTransport.execute() so they never interleave with receiving in the delivering thread
     """
 
-    input_accept = True
+    def __init__(self, handler: _InputHandler, replies_rx: _QueueConnection):
+        self._handler = handler
+        self._replies_rx = replies_rx
 
-    stream_accept = True
-    stream_msg_cnt = 0
+    def _command(self, command: 'InputThreadCommand') -> None:
+        """Executes exclusively with deliveries"""
 
-    while True:
-        if input_accept:
+        self._handler.command(command)
+        if command == InputThreadCommand.INPUT_ACCEPT:
+            self._handler.transport.deliver()  # process messages accumulated during the pause
 
-            # poll a socket for available data and return immediately (last argument is a timeout)
-            available = select.select([sock], [], [], 0)
-            if available[0] == [sock]:
-                try:
-                    payload = sock.recv(REMOTECONTROLLER_MSG_SIZE)
-                except ConnectionResetError:  # meet on Windows
-                    sys.exit()
-
-                response = _parse_response(payload)
-                if response['var_cmd'] == var_cmd['stream']:
-                    if stream_accept:
-                        stream_pipe_tx.send(response['values'])
-                        stream_msg_cnt += 1
-                else:
-                    var_cmd_pipe_tx.send(response)
-
-        # check whether there are any service messages (non-blocking mode)
-        if control_pipe.poll():
-            command = control_pipe.recv()
-            if command == InputThreadCommand.MSG_CNT_GET:
-                control_pipe.send(stream_msg_cnt)
-            elif command == InputThreadCommand.MSG_CNT_RST:
-                stream_msg_cnt = 0
-            elif command == InputThreadCommand.STREAM_REJECT:
-                stream_accept = False
-            elif command == InputThreadCommand.STREAM_ACCEPT:
-                stream_accept = True
-            elif command == InputThreadCommand.INPUT_REJECT:
-                input_accept = False
-            elif command == InputThreadCommand.INPUT_ACCEPT:
-                input_accept = True
-            elif command == InputThreadCommand.EXIT:
-                sys.exit()
-
-        # sleep all remaining time and repeat
-        time.sleep(THREAD_INPUT_HANDLER_SLEEP_TIME)
+    def send(self, command: 'InputThreadCommand') -> None:
+        self._handler.transport.execute(self._command, command)
+
+    def recv(self):
+        return self._replies_rx.recv()
+
+    def poll(self, timeout: float=0.0) -> bool:
+        return self._replies_rx.poll(timeout)
+
+    def close(self) -> None:
+        pass
 
 
 
@@ -442,7 +1844,9 @@ class RemoteController:
     and 'offline' (replacing real values by fake random data) mode
     """
 
-    def __init__(self, ip_addr: str, udp_port: int, conn_lost_signal=None):
+    def __init__(self, ip_addr: str=None, udp_port: int=None, conn_lost_signal=None, listener: str=LISTENER_DEFAULT,
+                 cache_ttl: dict=None, heartbeat_window: float=HEARTBEAT_WINDOW_DEFAULT, transport: Transport=None,
+                 retries: int=REQUEST_RETRIES, connect: bool=True):
         """
         Initialization of the RemoteController class
 
@@ -455,7 +1859,7 @@ class RemoteController:
         For example, RemoteController.read(what) function in this case will looks like:
 
             try:
-                self.sock.sendto(request, self.cont_ip_port)
+                self.transport.send(request)
                 response = self.var_cmd_queue.get(timeout=READ_WRITE_TIMEOUT_SYNCHRONOUS)
             except (queue.Empty, OSError):
                 self.conn_lost.signal.emit()
@@ -471,43 +1875,139 @@ class RemoteController:
         :param udp_port: integer representing UDP port of the controller' network interface
         :param conn_lost_signal: [optional] PyQt signal to emit when the connection is lost during the read/write
         operations. Otherwise the disconnect could only be revealed by an explicit call to check_connection() method
+        :param listener: [optional] backend of the input listening thread (one of LISTENER_BACKENDS): 'process' runs
+        it in the separate process, 'thread' and 'asyncio' run it in the thread of the current process (fast startup,
+        no pickling of var/cmd messages; 'asyncio' one drives the socket by its own event loop)
+        :param cache_ttl: [optional] dictionary of variables and lifetimes (in seconds) of their last known values. Such
+        fresh values are returned by read() without any requests (see CACHE_TTL_DEFAULT). Caching is disabled by
+        default but callers still can explicitly allow stale values by 'max_age' argument of read()
+        :param heartbeat_window: [optional] time in seconds after the last incoming message (e.g. stream one) during
+        which check_connection() considers the link alive without sending any requests
+        :param transport: [optional] Transport instance to communicate over (UDPTransport(ip_addr, udp_port) by
+        default, 'ip_addr' and 'udp_port' are ignored otherwise). Non-selectable transports (see InlineTransport)
+        need no listening thread at all so 'listener' is ignored for them
+        :param retries: [optional] number of retransmissions of unanswered requests before the connection is considered
+        lost (timeouts adapt to the measured round trip time, see _request_many())
+        :param connect: [optional] check the connection and negotiate the stream layout right away (see connect()). Pass
+        False to construct the instance without waiting for the controller and call connect() later (e.g. from the
+        background thread). The instance is not usable till then
         """
 
+        if listener not in LISTENER_BACKENDS:
+            raise ValueError(f"Unknown listener backend '{listener}', choose one of {LISTENER_BACKENDS}")
+
         self.snapshots = []  # currently only one snapshot is created and used
 
-        self._is_offline_mode = False
-        self.cont_ip_port = (ip_addr, udp_port)
+        self.cache_ttl = cache_ttl if cache_ttl is not None else {}
+        self._cache = {}  # variable: (value, time.monotonic() of the update)
 
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.sock.settimeout(0)  # explicitly set the non-blocking mode
+        self.rtt = _RTTEstimator()
+        self.retries = retries
+        self.retransmissions = 0  # requests sent again after the timeout
+        self.stale_responses = 0  # dropped duplicates and late responses
 
-        self.input_thread_control_pipe_main,\
-        self.input_thread_control_pipe_thread = multiprocessing.Pipe(duplex=True)
+        self._is_offline_mode = False
 
-        self.var_cmd_pipe_rx,\
-        self.var_cmd_pipe_tx = multiprocessing.Pipe(duplex=False)
+        if transport is None:
+            transport = UDPTransport(ip_addr, udp_port)
+        self.transport = transport
 
         self.stream = Stream(connection=self)
 
-        self.input_thread = multiprocessing.Process(
-            target=_thread_input_handler,
-            args=(
-                self.sock,
-                self.input_thread_control_pipe_thread,
-                self.var_cmd_pipe_tx,
-                self.stream.pipe_tx
+        self.heartbeat_window = heartbeat_window
+        self.listener_status = multiprocessing.sharedctypes.RawValue(ListenerStatus)
+
+        if not transport.selectable:
+            # nothing to wait on: the transport itself delivers incoming messages right in the sender' thread
+            self.var_cmd_pipe_rx,\
+            self.var_cmd_pipe_tx = _queue_pipe()
+
+            replies_rx, self.input_thread_control_pipe_thread = _queue_pipe()
+            handler = _InputHandler(transport, self.input_thread_control_pipe_thread, self.var_cmd_pipe_tx,
+                                    self.stream.buffer, self.listener_status)
+            self.input_thread_control_pipe_main = _InlineControlConnection(handler, replies_rx)
+            transport.set_listener(handler.poke)
+
+            self.input_thread = None
+
+        elif listener == 'process':
+            self.input_thread_control_pipe_main,\
+            self.input_thread_control_pipe_thread = multiprocessing.Pipe(duplex=True)
+
+            self.var_cmd_pipe_rx,\
+            self.var_cmd_pipe_tx = multiprocessing.Pipe(duplex=False)
+
+            self.input_thread = multiprocessing.Process(
+                target=_thread_input_handler,
+                args=(
+                    transport,
+                    self.input_thread_control_pipe_thread,
+                    self.var_cmd_pipe_tx,
+                    self.stream.buffer,
+                    self.listener_status
+                )
+            )
+
+        elif listener == 'thread':
+            # control messages are rare and the pipe should be waitable along with the socket so leave it as is
+            self.input_thread_control_pipe_main,\
+            self.input_thread_control_pipe_thread = multiprocessing.Pipe(duplex=True)
+
+            self.var_cmd_pipe_rx,\
+            self.var_cmd_pipe_tx = _queue_pipe()
+
+            self.input_thread = threading.Thread(
+                target=_thread_input_handler,
+                args=(
+                    transport,
+                    self.input_thread_control_pipe_thread,
+                    self.var_cmd_pipe_tx,
+                    self.stream.buffer,
+                    self.listener_status
+                ),
+                daemon=True
             )
-        )
-        self.input_thread.start()
+
+        else:  # 'asyncio'
+            self.var_cmd_pipe_rx,\
+            self.var_cmd_pipe_tx = _queue_pipe()
+
+            replies_rx, self.input_thread_control_pipe_thread = _queue_pipe()
+            handler = _InputHandler(transport, self.input_thread_control_pipe_thread, self.var_cmd_pipe_tx,
+                                    self.stream.buffer, self.listener_status)
+            # SelectorEventLoop explicitly as Windows' default ProactorEventLoop does not support add_reader()
+            self.input_thread_control_pipe_main = _AsyncioControlConnection(asyncio.SelectorEventLoop(), handler,
+                                                                            replies_rx)
+
+            self.input_thread = threading.Thread(target=self.input_thread_control_pipe_main.run, daemon=True)
+
+        if self.input_thread is not None:
+            self.input_thread.start()
 
         self.conn_lost_signal = conn_lost_signal
 
-        # use recently started thread to check an actual connection and if it is not present close all the related stuff
-        if self.check_connection(timeout=CHECK_CONNECTION_TIMEOUT_FIRST_CHECK) == result['error']:
+        if connect:
+            self.connect()
+
+
+    def connect(self, timeout: float=CHECK_CONNECTION_TIMEOUT_FIRST_CHECK) -> int:
+        """
+        Initial connection check performed once after the construction. Use recently started input listening thread to
+        check an actual connection and if it is not present close all the related stuff (so the instance enters the
+        'offline' mode). Otherwise stop the stream and read its layout
+
+        :param timeout: [optional] time to wait for the controller' response in seconds
+        :return: result['error'] or result['ok'] (int)
+        """
+
+        if self.check_connection(timeout=timeout) == result['error']:
             self._is_offline_mode = True
             self.close()
-        else:
-            self.stream.stop()  # explicitly stop the stream in case it somehow was active
+            return result['error']
+
+        self.stream.stop()  # explicitly stop the stream in case it somehow was active
+        self.stream.read_layout()
+        return result['ok']
 
 
     @property
@@ -516,6 +2016,12 @@ class RemoteController:
         return self._is_offline_mode
 
 
+    @property
+    def last_packet_time(self) -> float:
+        """time.monotonic() of the last message received by the input listening thread (0.0 if there were none)"""
+        return self.listener_status.last_packet_time
+
+
     @staticmethod
     def _parse_response(operation: str, what: str, response: dict=None):
         """
@@ -547,6 +2053,8 @@ class RemoteController:
                     return response['values']
                 elif response['var_cmd'] in ['save_to_eeprom', 'stream_start', 'stream_stop']:
                     return result[response['result']]  # 'ok'
+                elif response['var_cmd'] == 'stream_layout':
+                    return int(response['values'][0])  # number of channels
             else:
                 return result[response['result']]  # 'ok'
 
@@ -559,6 +2067,8 @@ class RemoteController:
                 return random.random(), random.random()
             elif what in ['save_to_eeprom', 'stream_start', 'stream_stop']:
                 return result['error']
+            elif what == 'stream_layout':
+                return STREAM_CHANNELS_DEFAULT
 
 
     @staticmethod
@@ -582,7 +2092,7 @@ class RemoteController:
 
         # for reading all keys are allowed so we check only writing
         if operation == 'write':
-            if what in ['stream_start', 'stream_stop', 'save_to_eeprom']:
+            if what in ['stream_start', 'stream_stop', 'stream_layout', 'save_to_eeprom']:
                 raise RequestKeyException(operation, what)
             elif what == 'err_I' and values[0] != 0.0:
                 raise ValueError("'err_I' allows only reading and reset (writing 0.0), got " + str(values))
@@ -590,59 +2100,240 @@ class RemoteController:
         return _make_request(operation, what, *values)
 
 
-    def read(self, what: str) -> int:
+    def _cache_get(self, what: str, max_age: float=None):
         """
-        Read a variable from the controller. Synchronous function, waits for the reply from the controller via the
-        'var_cmd_pipe' (waiting timeout is READ_WRITE_TIMEOUT_SYNCHRONOUS)
+        Get the last known value of the variable if it is fresh enough
 
-        :param what: string representing the variable to be read
-        :return: result['error'] or result['ok'] (int)
+        :param what: string representing the variable
+        :param max_age: [optional] maximum acceptable age in seconds (lifetime from 'cache_ttl' is used by default)
+        :return: cached value or None
         """
 
-        if not self._is_offline_mode:
+        if max_age is None:
+            max_age = self.cache_ttl.get(what, 0.0)
 
-            request = self._make_request('read', what)
+        if what in self._cache:
+            value, timestamp = self._cache[what]
+            if time.monotonic() - timestamp < max_age:
+                return copy.copy(value)
+
+        return None
+
+
+    def _cache_put(self, what: str, value) -> None:
+        """
+        Remember the value of the variable got from (or successfully written to) the controller
+
+        :param what: string representing the variable
+        :param value: number or list of numbers
+        :return: None
+        """
+
+        if what in CACHE_TTL_DEFAULT:  # variables only, not commands
+            self._cache[what] = (copy.copy(value), time.monotonic())
 
-            self.sock.sendto(request, self.cont_ip_port)
-            if self.var_cmd_pipe_rx.poll(timeout=READ_WRITE_TIMEOUT_SYNCHRONOUS):
-                response = self.var_cmd_pipe_rx.recv()
-            else:
-                self._is_offline_mode = True
-                if self.conn_lost_signal is not None:
-                    self.conn_lost_signal.emit()
-                return self._parse_response('read', what)
-            return self._parse_response('read', what, response=response)
 
+    def invalidate_cache(self, *what) -> None:
+        """
+        Forget last known values so following reads will be performed over the network
+
+        :param what: strings representing variables to forget (all of them if nothing is given)
+        :return: None
+        """
+
+        if what:
+            for item in what:
+                self._cache.pop(item, None)
         else:
-            return self._parse_response('read', what)
+            self._cache.clear()
+
+
+    def read(self, what: str, max_age: float=None) -> int:
+        """
+        Read a variable from the controller. Synchronous function, waits for the reply from the controller via the
+        'var_cmd_pipe' retransmitting the request on RTT-adaptive timeouts (see _request_many()). A value from the cache
+        is returned instead if it is fresh enough
+
+        :param what: string representing the variable to be read
+        :param max_age: [optional] maximum acceptable age of the cached value in seconds (default is the lifetime from
+        'cache_ttl', pass 0 to force the request)
+        :return: result['error'] or result['ok'] (int)
+        """
+
+        cached = self._cache_get(what, max_age)
+        if cached is not None:
+            return cached
+
+        return self._request_many('read', {what: ()})[what]
 
 
     def write(self, what: str, *values) -> int:
         """
         Write a variable to the controller. Synchronous function, waits for the reply from the controller via the
-        'var_cmd_pipe' (waiting timeout is READ_WRITE_TIMEOUT_SYNCHRONOUS)
+        'var_cmd_pipe' retransmitting the request on RTT-adaptive timeouts (see _request_many())
 
         :param what: string representing the variable to be written
         :param values: (optional) numbers supplied with a request
         :return: result['error'] or result['ok'] (int)
         """
 
-        if not self._is_offline_mode:
+        return self._request_many('write', {what: values})[what]
 
-            request = self._make_request('write', what, *values)
 
-            self.sock.sendto(request, self.cont_ip_port)
-            if self.var_cmd_pipe_rx.poll(timeout=READ_WRITE_TIMEOUT_SYNCHRONOUS):
+    def _drain_var_cmd_pipe(self) -> None:
+        """
+        Drop responses left in the 'var_cmd_pipe' (late answers to retransmitted or expired requests) so they are not
+        taken for responses to new requests
+
+        :return: None
+        """
+
+        while self.var_cmd_pipe_rx.poll():
+            self.var_cmd_pipe_rx.recv()
+            self.stale_responses += 1
+
+
+    def _exchange(self, operation: str, requests_bufs: dict, timeout: float=None) -> dict:
+        """
+        Send requests and collect matching responses from the 'var_cmd_pipe'. Requests still unanswered after the
+        retransmission timeout ('rtt.rto') are sent again, up to 'retries' times, and the timeout is doubled every time.
+        Round trip times are sampled from exchanges without retransmissions (Karn's rule). Responses not matching any
+        pending request (duplicates and late answers to previous requests) are dropped and counted in 'stale_responses'
+
+        :param operation: string representing an operation ('read' or 'write')
+        :param requests_bufs: dictionary of variables/commands and their request messages
+        :param timeout: [optional] limit of the total time of the exchange including all retransmissions (in seconds).
+        Until the first RTT sample the initial retransmission timeout is chosen so all retransmissions fit into it
+        :return: dictionary of variables/commands and their responses (unanswered ones are missing)
+        """
+
+        if self.listener_status.link_closed:  # no response can arrive, do not wait for retransmissions
+            return {}
+
+        self._drain_var_cmd_pipe()
+
+        pending = dict(requests_bufs)
+        responses = {}
+        attempt = 0
+        rto = self.rtt.rto
+        end = None
+        if timeout is not None:
+            end = time.monotonic() + timeout
+            if self.rtt.srtt is None:
+                rto = timeout / (2**(self.retries + 1) - 1)
+        sent_time = time.monotonic()
+        for request in pending.values():
+            self.transport.send(request)
+        deadline = sent_time + rto
+
+        while pending:
+            if end is not None:
+                deadline = min(deadline, end)
+            if self.var_cmd_pipe_rx.poll(timeout=max(deadline - time.monotonic(), 0)):
                 response = self.var_cmd_pipe_rx.recv()
+                if response['opcode'] == operation and response['var_cmd'] in pending:
+                    del pending[response['var_cmd']]
+                    responses[response['var_cmd']] = response
+                    if attempt == 0 and len(responses) == 1:  # a single sample per round trip
+                        self.rtt.update(time.monotonic() - sent_time)
+                else:
+                    self.stale_responses += 1
+            elif attempt < self.retries and (end is None or time.monotonic() < end):
+                attempt += 1
+                self.retransmissions += len(pending)
+                self.rtt.backoff()
+                rto = min(rto * 2, RTO_MAX)
+                for request in pending.values():
+                    self.transport.send(request)
+                deadline = time.monotonic() + rto
             else:
-                self._is_offline_mode = True
-                if self.conn_lost_signal is not None:
-                    self.conn_lost_signal.emit()
-                return result['error']
-            return self._parse_response('write', what, response)
+                break
 
-        else:
-            return result['ok']
+        return responses
+
+
+    def _request_many(self, operation: str, requests: dict) -> dict:
+        """
+        Pipelined exchange used by read()/write() and their *_many() counterparts. All requests are sent up front and
+        then responses are collected from the 'var_cmd_pipe' and matched with requests by their operation and
+        variable/command so the whole batch costs about one round trip.
+
+        Unanswered requests are retransmitted on RTT-adaptive timeouts (see _exchange()) and only when retransmissions
+        are exhausted the link is considered lost
+
+        :param operation: string representing an operation ('read' or 'write')
+        :param requests: dictionary of variables/commands and tuples of values supplied with them
+        :return: dictionary of variables/commands and respective results (same as of read()/write())
+        """
+
+        # construct all requests first so invalid ones are rejected before anything is sent
+        requests_bufs = {what: self._make_request(operation, what, *values) for what, values in requests.items()}
+
+        if self._is_offline_mode:
+            if operation == 'read':
+                return {what: self._parse_response('read', what) for what in requests_bufs}
+            else:
+                return {what: result['ok'] for what in requests_bufs}
+
+        responses = self._exchange(operation, requests_bufs)
+        if len(responses) < len(requests_bufs):
+            self._is_offline_mode = True
+            if self.conn_lost_signal is not None:
+                self.conn_lost_signal.emit()
+
+        results = {}
+        for what in requests_bufs:
+            if what in responses:
+                results[what] = self._parse_response(operation, what, response=responses[what])
+                if operation == 'read':
+                    self._cache_put(what, results[what])
+                else:
+                    values = requests[what]
+                    self._cache_put(what, list(values) if len(values) > 1 else values[0])  # write-through
+            elif operation == 'read':
+                results[what] = self._parse_response('read', what)
+            else:
+                results[what] = result['error']
+
+        return results
+
+
+    def read_many(self, keys, max_age: float=None) -> dict:
+        """
+        Read several variables from the controller at once. Requests are pipelined so the whole set costs about one
+        round trip instead of one per variable (see _request_many()). Fresh enough cached values are not requested
+
+        :param keys: iterable of strings representing variables to be read
+        :param max_age: [optional] maximum acceptable age of cached values in seconds (see read())
+        :return: dictionary of variables and their values
+        """
+
+        values = {}
+        requests = {}
+        for key in keys:
+            cached = self._cache_get(key, max_age)
+            if cached is not None:
+                values[key] = cached
+            else:
+                requests[key] = ()
+
+        if requests:
+            values.update(self._request_many('read', requests))
+
+        return values
+
+
+    def write_many(self, values: dict) -> dict:
+        """
+        Write several variables to the controller at once. Requests are pipelined so the whole set costs about one
+        round trip instead of one per variable (see _request_many())
+
+        :param values: dictionary of variables and values to write (single number or list of numbers)
+        :return: dictionary of variables and result['error'] or result['ok'] (int) for each of them
+        """
+
+        return self._request_many('write', {key: tuple(value) if isinstance(value, (list, tuple)) else (value,)
+                                            for key, value in values.items()})
 
 
     def reset_i_err(self) -> int:
@@ -655,74 +2346,109 @@ class RemoteController:
         return self.write('err_I', 0.0)
 
 
-    def save_current_values(self) -> None:
+    def save_current_values(self) -> dict:
         """
         Saves current PID parameters in the snapshot dictionary, supplies it with a current date and store the result
-        in the 'snapshots' list (instance attribute)
+        in the 'snapshots' list (instance attribute). Use snapshotstore.SnapshotStore to keep snapshots persistently
 
-        :return: None
+        :return: snapshot dictionary
         """
 
         snapshot = copy.deepcopy(snapshot_template)
-        for key in snapshot.keys():
-            if key != 'date':
-                snapshot[key] = self.read(key)
+        snapshot.update(self.read_many(key for key in snapshot.keys() if key != 'date'))
         snapshot['date'] = datetime.datetime.now()
         self.snapshots.append(snapshot)
+        return snapshot
+
 
+    @staticmethod
+    def _is_same_value(a, b) -> bool:
+        """
+        Compare values as the controller stores them (float32) so values read back equal the written ones
+
+        :param a: number or list of numbers
+        :param b: number or list of numbers
+        :return: bool
+        """
 
-    def restore_values(self, snapshot: dict) -> datetime.datetime:
+        a = a if isinstance(a, (list, tuple)) else [a]
+        b = b if isinstance(b, (list, tuple)) else [b]
+        return len(a) == len(b) and struct.pack(f'{len(a)}f', *a) == struct.pack(f'{len(b)}f', *b)
+
+
+    def restore_values(self, snapshot: dict, delta: bool=True, max_age: float=None) -> datetime.datetime:
         """
         Gets PID values from the given snapshot dictionary and writes them into the controller. This does not writes
-        values to the EEPROM
+        values to the EEPROM. Only values differing from the cached current ones (or unknown) are written, all at once
+        (see write_many())
 
         :param snapshot: special dictionary representing a single snapshot
+        :param delta: [optional] skip variables which cached values are equal to the snapshot ones. Pass False to write
+        everything
+        :param max_age: [optional] maximum acceptable age of cached values in seconds (see read())
         :return: datetime.datetime object of the restored snapshot
         """
 
-        for key, value in snapshot.items():
-            if key != 'date':  # snapshot has an accessory 'date' key
-                if isinstance(value, list):
-                    self.write(key, *value)
-                else:
-                    self.write(key, value)
+        # snapshot has an accessory 'date' key
+        values = {key: value for key, value in snapshot.items() if key != 'date'}
+        if delta:
+            current = {key: self._cache_get(key, max_age) for key in values}
+            values = {key: value for key, value in values.items()
+                      if current[key] is None or not self._is_same_value(value, current[key])}
+        if values:
+            self.write_many(values)
 
         return snapshot['date']
 
 
     def save_to_eeprom(self) -> int:
         """
-        Saves current PID-related values to controller's EEPROM
+        Saves current PID-related values to controller's EEPROM. The cache is invalidated so values will be read back
+        from the controller
 
         :return: result['error'] or result['ok'] (int)
         """
 
+        self.invalidate_cache()
         return self.read('save_to_eeprom')
 
 
     def check_connection(self, timeout=CHECK_CONNECTION_TIMEOUT_DEFAULT) -> int:
         """
         Check the connection. The function sends the request to read a 'setpoint' and waits for the response from the
-        input listening thread. Therefore a usage is possible only in 'online' mode
-
-        :param timeout: timeout (default is CHECK_CONNECTION_TIMEOUT_DEFAULT)
+        input listening thread. Therefore a usage is possible only in 'online' mode. The cache is invalidated on
+        reconnection as values could be changed during the break. The request is not sent at all if any message has
+        been received during the last 'heartbeat_window' seconds (e.g. when the stream is running). The unanswered
+        request is retransmitted like read()/write() ones (see _exchange()) so a single lost datagram does not break
+        the connection
+
+        :param timeout: limit of the total time of the check including retransmissions (default is
+        CHECK_CONNECTION_TIMEOUT_DEFAULT)
         :return: result['error'] or result['ok'] (int)
         """
 
+        # passive check: any incoming traffic proves the link is alive
+        if time.monotonic() - self.last_packet_time < self.heartbeat_window:
+            if self._is_offline_mode:
+                self.invalidate_cache()
+                self._is_offline_mode = False
+            return result['ok']
+
         request = _make_request('read', 'setpoint')  # use setpoint as a test request
 
         try:
-            self.sock.sendto(request, self.cont_ip_port)
+            responses = self._exchange('read', {'setpoint': request}, timeout=timeout)
         except OSError:  # probably PC has no network
             self._is_offline_mode = True
             return result['error']
 
-        if self.var_cmd_pipe_rx.poll(timeout=timeout):
-            self.var_cmd_pipe_rx.recv()  # receive the message to keep the pipe clean
-        else:
+        if not responses:
             self._is_offline_mode = True
             return result['error']
 
+        if self._is_offline_mode:
+            self.invalidate_cache()
+
         self._is_offline_mode = False
         return result['ok']
 
@@ -751,7 +2477,7 @@ class RemoteController:
 
     def close(self) -> None:
         """
-        "Close" the entire connection in a sense of the "online" communication: socket, input thread, pipes etc.
+        "Close" the entire connection in a sense of the "online" communication: transport, input thread, pipes etc.
         RemoteController though will still be able to provide fake (random) data to simulate the behavior of a real
         connection
 
@@ -759,18 +2485,285 @@ class RemoteController:
         """
 
         if not self._is_offline_mode:
-            self.stream.close()
+            self.stream.stop()
+
+        # thread-based listeners share objects with us so wait for the exit before closing anything
+        if self.input_thread is None:
+            self.transport.set_listener(None)
+        elif self.input_thread.is_alive():
+            self.input_thread_control_pipe_main.send(InputThreadCommand.EXIT)
+            self.input_thread.join(timeout=INPUT_THREAD_EXIT_TIMEOUT)
+
+        self.stream.buffer.close()
 
         self.var_cmd_pipe_rx.close()
         self.var_cmd_pipe_tx.close()
 
-        if self.input_thread.is_alive():
-            self.input_thread_control_pipe_main.send(InputThreadCommand.EXIT)
-
         self.input_thread_control_pipe_main.close()
         self.input_thread_control_pipe_thread.close()
 
-        self.sock.close()
+        self.transport.close()
+
+
+
+class _AsyncRemoteControllerProtocol(asyncio.DatagramProtocol):
+    """asyncio datagram protocol passing all incoming messages to the owning AsyncRemoteController"""
+
+    def __init__(self, controller):
+        self.controller = controller
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.controller._datagram_received(data)
+
+    def error_received(self, exc: Exception) -> None:
+        pass  # e.g. ICMP 'port unreachable', pending requests will be timed out anyway
+
+
+
+class AsyncRemoteController:
+    """
+    asyncio-native interface to the remote PID controller. All the work is done by the datagram protocol in the
+    caller's event loop so a single loop can drive any number of controllers without additional processes, threads or
+    pipes. Responses are matched with requests by their operation and variable/command. Unlike the RemoteController
+    there is no 'offline' mode: the expired timeout is reported by the asyncio.TimeoutError exception
+
+    Usage example:
+
+        async def main():
+            async with AsyncRemoteController('127.0.0.1', 1200) as conn:
+                print(await conn.read('setpoint'))
+                await conn.stream_start()
+                async for values in conn.frames():
+                    print(values)
+
+        asyncio.run(main())
+
+    """
+
+    def __init__(self, ip_addr: str, udp_port: int, stream_queue_size: int=STREAM_BUFFER_CAPACITY):
+        """
+        Initialization of the AsyncRemoteController class. Call open() (or use 'async with' statement) to actually
+        create the connection
+
+        :param ip_addr: string representing IP-address of the controller' network interface
+        :param udp_port: integer representing UDP port of the controller' network interface
+        :param stream_queue_size: number of stream frames to hold for the frames() consumer. The oldest ones are
+        dropped on overflow
+        """
+
+        self.cont_ip_port = (ip_addr, udp_port)
+        self._transport = None
+        self._waiters = collections.defaultdict(collections.deque)  # (operation, var/cmd): futures in sending order
+        self._stream_queue = asyncio.Queue(maxsize=stream_queue_size)
+        self.stream_dropped_cnt = 0
+        self.stream_channels = STREAM_CHANNELS_DEFAULT  # see read_layout()
+        self._stream_struct = struct.Struct(f'={self.stream_channels}f')
+
+
+    async def open(self) -> 'AsyncRemoteController':
+        """
+        Create the datagram endpoint in the running event loop
+
+        :return: self
+        """
+
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(lambda: _AsyncRemoteControllerProtocol(self),
+                                                                 remote_addr=self.cont_ip_port)
+        return self
+
+
+    async def __aenter__(self) -> 'AsyncRemoteController':
+        return await self.open()
+
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+    def _datagram_received(self, data: bytes) -> None:
+        """
+        Route an incoming message either to the stream queue or to the future of the oldest matching request
+
+        :param data: received datagram
+        :return: None
+        """
+
+        if not data:
+            return
+
+        if data[0] & _STREAM_PREFIX_MASK:
+            if len(data) != self._stream_struct.size + 1:  # skip malformed messages
+                return
+            if self._stream_queue.full():
+                self._stream_queue.get_nowait()
+                self.stream_dropped_cnt += 1
+            self._stream_queue.put_nowait(self._stream_struct.unpack_from(data, 1))
+        elif len(data) != REMOTECONTROLLER_MSG_SIZE:  # skip malformed messages
+            return
+        else:
+            response = _parse_response(data)
+            waiters = self._waiters.get((response['opcode'], response['var_cmd']))
+            while waiters:
+                future = waiters.popleft()
+                if not future.done():
+                    future.set_result(response)
+                    break
+            # otherwise it is a late response to the already expired request, drop it
+
+
+    async def _request(self, operation: str, what: str, *values, timeout: float, retries: int=0) -> int:
+        """
+        Send the request and wait for the matching response
+
+        :param operation: string representing an operation ('read' or 'write')
+        :param what: string representing RemoteController' variable or command
+        :param values: (optional) supplied values (for 'write' operation)
+        :param timeout: timeout in seconds (including all retransmissions)
+        :param retries: [optional] number of retransmissions of the unanswered request. The timeout is split so every
+        next attempt waits twice as long as the previous one
+        :return: same as RemoteController.read()/write()
+        """
+
+        request = RemoteController._make_request(operation, what, *values)
+
+        future = asyncio.get_running_loop().create_future()
+        waiters = self._waiters[(operation, what)]
+        waiters.append(future)
+        self._transport.sendto(request)
+        attempt_timeout = timeout / (2**(retries + 1) - 1)
+        try:
+            for attempt in range(retries + 1):
+                try:
+                    # shielded so the timeout does not cancel the future and a late response is still accepted
+                    response = await asyncio.wait_for(asyncio.shield(future), attempt_timeout)
+                    break
+                except asyncio.TimeoutError:
+                    if attempt == retries:
+                        raise
+                    attempt_timeout *= 2
+                    self._transport.sendto(request)
+        finally:
+            if future in waiters:
+                waiters.remove(future)
+
+        return RemoteController._parse_response(operation, what, response=response)
+
+
+    async def read(self, what: str, timeout: float=READ_WRITE_TIMEOUT_SYNCHRONOUS) -> int:
+        """
+        Read a variable from the controller
+
+        :param what: string representing the variable to be read
+        :param timeout: timeout in seconds (default is READ_WRITE_TIMEOUT_SYNCHRONOUS)
+        :return: same as RemoteController.read()
+        """
+
+        return await self._request('read', what, timeout=timeout)
+
+
+    async def write(self, what: str, *values, timeout: float=READ_WRITE_TIMEOUT_SYNCHRONOUS) -> int:
+        """
+        Write a variable to the controller
+
+        :param what: string representing the variable to be written
+        :param values: (optional) numbers supplied with a request
+        :param timeout: timeout in seconds (default is READ_WRITE_TIMEOUT_SYNCHRONOUS)
+        :return: result['error'] or result['ok'] (int)
+        """
+
+        return await self._request('write', what, *values, timeout=timeout)
+
+
+    async def read_many(self, keys, timeout: float=READ_WRITE_TIMEOUT_SYNCHRONOUS) -> dict:
+        """
+        Read several variables concurrently
+
+        :param keys: iterable of strings representing variables to be read
+        :param timeout: timeout in seconds for each request
+        :return: dictionary of variables and their values
+        """
+
+        keys = list(dict.fromkeys(keys))
+        values = await asyncio.gather(*(self.read(key, timeout=timeout) for key in keys))
+        return dict(zip(keys, values))
+
+
+    async def check_connection(self, timeout: float=CHECK_CONNECTION_TIMEOUT_DEFAULT) -> int:
+        """
+        Check the connection by reading a 'setpoint'. The unanswered request is retransmitted REQUEST_RETRIES times
+        within the timeout
+
+        :param timeout: timeout in seconds including retransmissions (default is CHECK_CONNECTION_TIMEOUT_DEFAULT)
+        :return: result['error'] or result['ok'] (int)
+        """
+
+        try:
+            await self._request('read', 'setpoint', timeout=timeout, retries=REQUEST_RETRIES)
+        except (asyncio.TimeoutError, OSError):
+            return result['error']
+        return result['ok']
+
+
+    async def read_layout(self, timeout: float=READ_WRITE_TIMEOUT_SYNCHRONOUS) -> int:
+        """
+        Ask the controller for the number of channels of stream frames (see Stream.read_layout()). Frames of other sizes
+        are skipped so it is called by stream_start() automatically
+
+        :param timeout: timeout in seconds (default is READ_WRITE_TIMEOUT_SYNCHRONOUS)
+        :return: number of channels
+        """
+
+        try:
+            channels = int(await self.read('stream_layout', timeout=timeout))
+        except ResponseException:
+            channels = STREAM_CHANNELS_DEFAULT
+        if not 1 <= channels <= STREAM_MAX_CHANNELS:
+            raise ValueError(f"Unsupported stream layout of {channels} channels (maximum is {STREAM_MAX_CHANNELS})")
+
+        self.stream_channels = channels
+        self._stream_struct = struct.Struct(f'={channels}f')
+        return channels
+
+
+    async def stream_start(self, timeout: float=READ_WRITE_TIMEOUT_SYNCHRONOUS) -> int:
+        await self.read_layout(timeout=timeout)
+        return await self.read('stream_start', timeout=timeout)
+
+
+    async def stream_stop(self, timeout: float=READ_WRITE_TIMEOUT_SYNCHRONOUS) -> int:
+        stop_result = await self.read('stream_stop', timeout=timeout)
+        while not self._stream_queue.empty():  # drop the rest of frames
+            self._stream_queue.get_nowait()
+        return stop_result
+
+
+    async def frames(self):
+        """
+        Asynchronous iterator over incoming stream frames (tuples of values). Start the stream first
+
+        :return: async generator
+        """
+
+        while True:
+            yield await self._stream_queue.get()
+
+
+    def close(self) -> None:
+        """
+        Close the datagram endpoint and cancel all pending requests
+
+        :return: None
+        """
+
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+        for waiters in self._waiters.values():
+            for future in waiters:
+                future.cancel()
+        self._waiters.clear()
 
 
 
@@ -787,9 +2780,11 @@ if __name__ == '__main__':
     print('some stream values:')
     conn.stream.start()
     for i in range(50):
-        if conn.stream.pipe_rx.poll():
-            point = conn.stream.pipe_rx.recv()
-            print(point)
+        points = conn.stream.buffer.peek()
+        if points is not None:
+            print(points.tolist())
+            conn.stream.buffer.consume(len(points))
+            points.release()
         else:
             time.sleep(0.005)
 
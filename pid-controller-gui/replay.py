@@ -0,0 +1,348 @@
+"""
+replay.py - playback of recorded streams through the same path the live stream takes to the graphs
+
+
+REPLAY_TICK
+    period of pushing frames into the stream buffer (in seconds)
+REPLAY_MAX_OUTPUT_RATE
+    maximum number of frames per second handed to the graphs (decimated views are used to satisfy it)
+REPLAY_SPEEDS
+    suggested playback speeds (None means as fast as the consumer allows)
+
+function load_recording
+    read the whole recording (StreamArchive file or StreamRecorder segments directory) into numpy arrays
+
+function build_pyramid
+    precompute min/max decimated views of the recording
+
+class _ReplayControlConnection
+    replacement of the input thread control pipe understanding graphs' InputThreadCommand's
+
+class ReplaySource
+    stream source feeding recorded frames into the StreamBuffer at the given speed with pause and seek (publishes the
+    same status counters as the live listener)
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+# local imports
+import recorder
+import remotecontroller
+import streamarchive
+
+
+
+#
+# timeouts in seconds
+#
+REPLAY_TICK = 0.01
+
+#
+# frames per second
+#
+REPLAY_MAX_OUTPUT_RATE = 1000
+
+REPLAY_SPEEDS = (1.0, 10.0, 100.0, None)
+
+
+
+def load_recording(path: str) -> tuple:
+    """
+    Read the whole recording
+
+    :param path: path to the StreamArchive file or to the directory with StreamRecorder segment files
+    :return: (float64 array of timestamps, float32 array of frames shaped as (n, channels))
+    """
+
+    if os.path.isdir(path):
+        timestamps, values, channels = [], [], 2
+        for index, segment in enumerate(recorder.find_segments(path)):
+            header, segment_timestamps, segment_values = recorder.read_segment(segment)
+            if index and header['channels'] != channels:
+                raise ValueError(f"'{segment}' starts other stream layout ({header['channels']} channels instead of "
+                                 f"{channels}), replay segments of each layout separately")
+            channels = header['channels']
+            timestamps.append(np.frombuffer(segment_timestamps, dtype=np.float64))
+            values.append(np.frombuffer(segment_values, dtype=np.float32))
+        if not timestamps:
+            raise ValueError(f"No segment files in '{path}'")
+        return np.concatenate(timestamps), np.concatenate(values).reshape(-1, channels)
+
+    with streamarchive.StreamArchive(path) as archive:
+        timestamps, values = archive.read()
+        return np.frombuffer(timestamps, dtype=np.float64), np.frombuffer(values, dtype=np.float32).reshape(
+            -1, archive.channels)
+
+
+def build_pyramid(timestamps: np.ndarray, frames: np.ndarray) -> list:
+    """
+    Precompute decimated views of the recording. Level with the factor F replaces every F consecutive frames by 2
+    frames holding minimum and maximum values of each channel so peaks remain visible. Factors are 1 (original
+    frames), 4, 8, 16 and so on till there are only a few buckets left. Each level is computed from the previous one
+
+    :param timestamps: float64 array of timestamps
+    :param frames: float32 array of frames shaped as (n, channels)
+    :return: list of (factor, timestamps, frames) tuples in ascending order of factors
+    """
+
+    levels = [(1, timestamps, frames)]
+
+    # factor 2 is the base for following levels but is not a level itself (2 frames per 2 frames give nothing)
+    factor = 2
+    num = len(frames) // factor
+    mins = frames[:num*factor].reshape(num, factor, -1).min(axis=1)
+    maxs = frames[:num*factor].reshape(num, factor, -1).max(axis=1)
+    while num >= 4:
+        factor *= 2
+        num //= 2
+        mins = np.minimum(mins[0:2*num:2], mins[1:2*num:2])
+        maxs = np.maximum(maxs[0:2*num:2], maxs[1:2*num:2])
+
+        level_frames = np.empty((2*num, frames.shape[1]), dtype=frames.dtype)
+        level_frames[0::2] = mins
+        level_frames[1::2] = maxs
+        level_timestamps = np.repeat(timestamps[0:num*factor:factor], 2)
+        levels.append((factor, level_timestamps, level_frames))
+
+    return levels
+
+
+
+class _ReplayControlConnection:
+    """
+    Stands for the input thread control pipe (RemoteController.input_thread_control_pipe_main) so graphs can control
+    the replay the same way they control the live stream. Commands are executed right away
+    """
+
+    def __init__(self, source: 'ReplaySource'):
+        self._source = source
+        self._replies = []
+
+    def send(self, command: remotecontroller.InputThreadCommand) -> None:
+        if command == remotecontroller.InputThreadCommand.MSG_CNT_GET:
+            self._replies.append(self._source.frames_pushed)
+        elif command == remotecontroller.InputThreadCommand.MSG_CNT_RST:
+            self._source.frames_pushed = 0
+        elif command == remotecontroller.InputThreadCommand.STREAM_ACCEPT:
+            self._source.stream_accept = True
+        elif command == remotecontroller.InputThreadCommand.STREAM_REJECT:
+            self._source.stream_accept = False
+
+    def recv(self):
+        return self._replies.pop(0)
+
+    def poll(self, timeout: float=0.0) -> bool:
+        return bool(self._replies)
+
+    def close(self) -> None:
+        pass
+
+
+
+class ReplaySource:
+    """
+    Stream source playing the recording back. To the graphs it looks exactly like the RemoteController' stream: frames
+    arrive into the StreamBuffer ('buffer') and commands are accepted through the 'control_pipe'. The playback thread
+    advances the position by the wall-clock time multiplied by the speed and pushes frames of the passed interval. When
+    this would exceed REPLAY_MAX_OUTPUT_RATE the coarsest sufficient decimated view is used instead of original frames.
+
+    Usage example:
+
+        source = ReplaySource.from_file('session.pidarch', speed=10.0)
+        graphs = CustomGraphicsLayoutWidget(controlPipe=source.control_pipe, streamBuffer=source.buffer)
+        source.start()
+        graphs.start()
+
+    """
+
+    def __init__(self, timestamps: np.ndarray, frames: np.ndarray, speed: float=1.0,
+                 max_rate: float=REPLAY_MAX_OUTPUT_RATE):
+        """
+        ReplaySource constructor. Precomputes decimated views and starts the (paused) playback thread
+
+        :param timestamps: float64 array of timestamps
+        :param frames: float32 array of frames shaped as (n, channels)
+        :param speed: [optional] playback speed (1.0 is the real time, None is as fast as the graphs can consume)
+        :param max_rate: [optional] maximum number of frames per second to hand to the graphs
+        """
+
+        if not len(timestamps):
+            raise ValueError("Recording is empty")
+
+        self.levels = build_pyramid(timestamps, frames)
+        self.time_range = (float(timestamps[0]), float(timestamps[-1]))
+        duration = self.time_range[1] - self.time_range[0]
+        self.sample_rate = (len(timestamps) - 1) / duration if duration > 0 else float('inf')
+        self.max_rate = max_rate
+
+        self.buffer = remotecontroller.StreamBuffer(channels=frames.shape[1], timestamps=True)
+        self.control_pipe = _ReplayControlConnection(self)
+        self.status = remotecontroller.ListenerStatus()  # same counters as the live listener publishes
+        self.frames_pushed = 0
+        self.stream_accept = True
+
+        self._speed = speed
+        self._position = self.time_range[0]
+        self._lock = threading.Lock()
+        self._run_event = threading.Event()
+        self._is_closed = False
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'ReplaySource':
+        """
+        Create the source from the recording on the disk (see load_recording())
+
+        :param path: path to the StreamArchive file or to the directory with StreamRecorder segment files
+        :param kwargs: [optional] other ReplaySource arguments
+        :return: ReplaySource instance
+        """
+
+        return cls(*load_recording(path), **kwargs)
+
+
+    @property
+    def position(self) -> float:
+        """timestamp of the current playback position"""
+        return self._position
+
+    @property
+    def speed(self) -> float:
+        """playback speed (None is as fast as possible)"""
+        return self._speed
+
+    @speed.setter
+    def speed(self, speed: float) -> None:
+        with self._lock:
+            self._speed = speed
+
+
+    def is_run(self) -> bool:
+        return self._run_event.is_set()
+
+    def start(self) -> None:
+        """Resume the playback (rewinds to the beginning if the end has been reached)"""
+        with self._lock:
+            if self._position >= self.time_range[1]:
+                self._position = self.time_range[0]
+        self._run_event.set()
+
+    def stop(self) -> None:
+        """Pause the playback"""
+        self._run_event.clear()
+
+    def toggle(self) -> None:
+        if self.is_run():
+            self.stop()
+        else:
+            self.start()
+
+
+    def seek(self, position: float) -> None:
+        """
+        Jump to the given moment of the recording. Frames of the old position which have not been plotted yet are
+        dropped. Call from the consumer' (graphs) thread
+
+        :param position: timestamp (clamped to the recording time range)
+        :return: None
+        """
+
+        with self._lock:
+            self._position = min(max(position, self.time_range[0]), self.time_range[1])
+            self.buffer.flush()
+
+
+    def _select_level(self) -> tuple:
+        """
+        Choose the least decimated view keeping the output rate within max_rate at the current speed. When playing as
+        fast as possible the entire recording is handed over in the least decimated view fitting into the buffer, so
+        it passes through the graphs as fast as they can draw
+
+        :return: (factor, timestamps, frames) tuple
+        """
+
+        if self._speed is None:
+            for level in self.levels:
+                if len(level[1]) <= self.buffer.capacity:
+                    return level
+            return self.levels[-1]
+
+        for level in self.levels:
+            factor = level[0]
+            output_rate = self.sample_rate * self._speed * (2 / factor if factor > 1 else 1)
+            if output_rate <= self.max_rate:
+                return level
+        return self.levels[-1]
+
+
+    def _tick(self, elapsed: float) -> None:
+        """
+        Advance the position and push frames of the passed interval
+
+        :param elapsed: wall-clock time since the previous tick in seconds
+        :return: None
+        """
+
+        with self._lock:
+            factor, timestamps, frames = self._select_level()
+
+            start = np.searchsorted(timestamps, self._position, side='left')
+            if self._speed is None:  # as many as fit into the buffer
+                end = min(start + self.buffer.capacity - len(self.buffer), len(timestamps))
+                position = timestamps[end] if end < len(timestamps) else self.time_range[1]
+            else:
+                position = min(self._position + elapsed*self._speed, self.time_range[1])
+                end = len(timestamps) if position >= self.time_range[1] else \
+                    np.searchsorted(timestamps, position, side='left')
+
+            # a min/max level gives 2 frames per 'factor' frames, publish the ratio as the live listener does
+            self.status.decimation = max(factor // 2, 1)
+            if self.stream_accept and end > start:
+                pushed = self.buffer.push_many(frames[start:end].tolist(), timestamps[start:end].tolist())
+                self.frames_pushed += pushed
+                self.status.received += end - start
+                self.status.forwarded += pushed
+                self.status.dropped += end - start - pushed
+
+            self._position = position
+            if position >= self.time_range[1]:
+                self._run_event.clear()  # end of the recording
+
+
+    def _run(self) -> None:
+        """
+        Playback thread routine
+
+        :return: None
+        """
+
+        while not self._is_closed:
+            if not self._run_event.wait(timeout=0.1):
+                continue
+
+            last = time.monotonic()
+            while self._run_event.is_set() and not self._is_closed:
+                time.sleep(REPLAY_TICK)
+                now = time.monotonic()
+                self._tick(now - last)
+                last = now
+
+
+    def close(self) -> None:
+        """
+        Stop the playback thread and release the buffer
+
+        :return: None
+        """
+
+        self._is_closed = True
+        self._run_event.clear()
+        self._thread.join()
+        self.buffer.close()
@@ -87,6 +87,31 @@ class Settings(dict):
         self.persistentStorage.endGroup()
 
 
+    def streamChannels(self, num: int) -> list:
+        """
+        Descriptions of stream channels to build graphs for. Settings saved by older versions have only
+        'processVariable' and 'controllerOutput' entries, channels not described at all are named by their numbers
+
+        :param num: number of channels in the stream layout
+        :return: list of 'num' dictionaries with 'name', 'limits' ('min' and 'max') and 'unit' keys
+        """
+
+        if 'channels' in self['pid']:
+            described = self['pid']['channels']
+        else:
+            described = [self['pid'][key] for key in ('processVariable', 'controllerOutput') if key in self['pid']]
+            described += self.defaults['pid']['channels'][len(described):]
+
+        channels = list(described[:num])
+        for index in range(len(channels), num):
+            channels.append({
+                'name': f"Channel {index + 1}",
+                'limits': copy.deepcopy(channels[-1]['limits']) if channels else {'min': -1.0, 'max': 1.0},
+                'unit': ''
+            })
+        return channels
+
+
     def __deepcopy__(self, memodict={}) -> dict:
         """
         As this class contains additional properties such as QSettings that we don't want to be copied we need to
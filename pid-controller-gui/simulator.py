@@ -0,0 +1,471 @@
+"""
+simulator.py - load-generating remote PID controller simulator speaking the INSTRUCTIONSET protocol (standard library
+only). Run as a script to serve UDP clients (see --help) or use ControllerModel.respond() as a LoopbackTransport
+responder
+
+
+const SIMULATOR_TICK
+    period of the stream generation (frames due during the tick are sent at once)
+const SIMULATOR_NO_MSG_TIMEOUT
+    the stream is stopped if there were no requests during this time (like the C server does)
+const SIMULATOR_PLANT_CHANNELS
+    names of the values streamed by the closed loop simulation (in the order of channels)
+
+class ControllerModel
+    state of the simulated controller: variables, request processing and generation of stream frames (optionally by
+    the PID loop closed around the first-order plant)
+
+class SimulatedController
+    single UDP endpoint serving the ControllerModel with configurable stream rate, packet loss and reordering
+
+class Simulator
+    selector loop driving several endpoints in one thread
+
+function main
+    command line entry point
+"""
+
+import argparse
+import math
+import random
+import selectors
+import socket
+import struct
+import threading
+import time
+
+# local imports
+import remotecontroller
+
+
+
+#
+# timeouts in seconds
+#
+SIMULATOR_TICK = 0.001
+SIMULATOR_NO_MSG_TIMEOUT = 15.0
+
+SIMULATOR_PLANT_CHANNELS = ('Process Variable', 'Controller Output', 'Setpoint', 'Error', 'P term', 'I term', 'D term')
+
+
+
+class ControllerModel:
+    """
+    Simulated controller. Without the plant the stream carries sine and cosine waves (and harmonics in further
+    channels) like the C server does. With the plant every stream frame is one step of the discrete PID loop
+    closed around the first-order plant (tau * dPV/dt = gain * CO - PV), so written setpoint and coefficients visibly
+    affect the stream. Its channels are listed in SIMULATOR_PLANT_CHANNELS
+    """
+
+    def __init__(self, plant: bool=False, plant_gain: float=0.1, plant_tau: float=1.0,
+                 channels: int=remotecontroller.STREAM_CHANNELS_DEFAULT, stream_layout: bool=True):
+        """
+        ControllerModel constructor
+
+        :param plant: [optional] simulate the closed loop instead of plain waves
+        :param plant_gain: [optional] static gain of the plant
+        :param plant_tau: [optional] time constant of the plant in seconds
+        :param channels: [optional] number of values in each stream frame
+        :param stream_layout: [optional] support the 'stream_layout' command (legacy controllers respond with the error
+        and always stream 2 channels)
+        """
+
+        max_channels = len(SIMULATOR_PLANT_CHANNELS) if plant else remotecontroller.STREAM_MAX_CHANNELS
+        if not 1 <= channels <= max_channels:
+            raise ValueError(f"Number of channels should be from 1 to {max_channels}, got {channels}")
+        if not stream_layout and channels != remotecontroller.STREAM_CHANNELS_DEFAULT:
+            raise ValueError("Legacy controllers stream only the default number of channels")
+
+        # same initial values as in the C server
+        self.values = {
+            remotecontroller.var_cmd['setpoint']: [1238.0, 0.0],
+            remotecontroller.var_cmd['kP']: [19.4, 0.0],
+            remotecontroller.var_cmd['kI']: [8.7, 0.0],
+            remotecontroller.var_cmd['kD']: [1.6, 0.0],
+            remotecontroller.var_cmd['err_I']: [2055.0, 0.0],
+            remotecontroller.var_cmd['err_P_limits']: [-3500.0, 3500.0],
+            remotecontroller.var_cmd['err_I_limits']: [-6500.0, 6500.0]
+        }
+        self.stream_run = False
+
+        self.plant = plant
+        self.plant_gain = plant_gain
+        self.plant_tau = plant_tau
+        self.channels = channels
+        self.stream_layout = stream_layout
+        self._pv = 0.0
+        self._prev_error = 0.0
+        self._x = 0.0
+
+
+    def respond(self, request: bytes) -> list:
+        """
+        Process the request. Suitable as the LoopbackTransport responder
+
+        :param request: request message (1, 5 or 9 bytes)
+        :return: list with a single response message
+        """
+
+        opcode = request[0] >> 7
+        var_cmd = (request[0] >> 3) & 0b1111
+        values = [0.0, 0.0]
+        result = remotecontroller.result['ok']
+
+        if opcode == remotecontroller.opcode['read']:
+            if var_cmd == remotecontroller.var_cmd['stream_start']:
+                self.stream_run = True
+            elif var_cmd == remotecontroller.var_cmd['stream_stop']:
+                self.stream_run = False
+            elif var_cmd == remotecontroller.var_cmd['stream_layout'] and self.stream_layout:
+                values = [float(self.channels), 0.0]
+            elif var_cmd in self.values:
+                values = self.values[var_cmd]
+            elif var_cmd != remotecontroller.var_cmd['save_to_eeprom']:
+                result = remotecontroller.result['error']
+        else:
+            supplied = list(struct.unpack_from(f'{(len(request) - 1)//remotecontroller.FLOAT_SIZE}f', request, 1))
+            if var_cmd == remotecontroller.var_cmd['err_I']:
+                # only reset is allowed
+                if supplied and supplied[0] == 0.0:
+                    self.values[var_cmd] = [0.0, 0.0]
+                else:
+                    result = remotecontroller.result['error']
+            elif var_cmd in self.values and supplied:
+                self.values[var_cmd] = (supplied + [0.0])[:2]
+            else:
+                result = remotecontroller.result['error']
+
+        return [bytes([(opcode << 7) | (var_cmd << 3) | (result << 2)]) + struct.pack('2f', *values)]
+
+
+    def frames(self, num: int, dt: float) -> list:
+        """
+        Generate next stream frames
+
+        :param num: number of frames
+        :param dt: time step between frames in seconds
+        :return: list of tuples of 'channels' values
+        """
+
+        channels = self.channels
+
+        if not self.plant:
+            harmonics = range(2, channels)
+            frames = []
+            for _ in range(num):
+                if self._x > 2.0*math.pi:
+                    self._x = 0.0
+                frame = (math.sin(self._x), math.cos(self._x)) + tuple(math.sin(i*self._x) for i in harmonics)
+                frames.append(frame[:channels])
+                self._x += 0.1
+            return frames
+
+        setpoint = self.values[remotecontroller.var_cmd['setpoint']][0]
+        kP = self.values[remotecontroller.var_cmd['kP']][0]
+        kI = self.values[remotecontroller.var_cmd['kI']][0]
+        kD = self.values[remotecontroller.var_cmd['kD']][0]
+        err_P_min, err_P_max = self.values[remotecontroller.var_cmd['err_P_limits']]
+        err_I_min, err_I_max = self.values[remotecontroller.var_cmd['err_I_limits']]
+        err_I = self.values[remotecontroller.var_cmd['err_I']]
+
+        frames = []
+        for _ in range(num):
+            error = setpoint - self._pv
+            err_I[0] = min(max(err_I[0] + error*dt, err_I_min), err_I_max)
+            p_term = kP*min(max(error, err_P_min), err_P_max)
+            i_term = kI*err_I[0]
+            d_term = kD*(error - self._prev_error)/dt
+            output = p_term + i_term + d_term
+            self._prev_error = error
+            self._pv += dt * (self.plant_gain*output - self._pv) / self.plant_tau
+            frames.append((self._pv, output, setpoint, error, p_term, i_term, d_term)[:channels])
+        return frames
+
+
+
+class SimulatedController:
+    """
+    Single UDP endpoint of the simulator. Replies to requests from any client and streams to every client requested
+    the 'stream_start'. Frames due since the last tick are generated at once so rates of tens of kHz are reachable.
+    Outgoing datagrams can be dropped (loss) or swapped with the next one (reordering) with the given probabilities
+    """
+
+    def __init__(self, port: int=0, host: str='127.0.0.1', rate: float=50.0, loss: float=0.0, reorder: float=0.0,
+                 model: ControllerModel=None, seed: int=None, verbose: bool=False):
+        """
+        SimulatedController constructor. Binds the socket
+
+        :param port: [optional] UDP port to listen on (any free one by default, see 'address' attribute)
+        :param host: [optional] interface to listen on
+        :param rate: [optional] stream rate in frames per second
+        :param loss: [optional] probability to drop an outgoing datagram
+        :param reorder: [optional] probability to delay an outgoing datagram after the next one
+        :param model: [optional] ControllerModel instance (new plain one by default)
+        :param seed: [optional] seed of the loss/reorder random generator
+        :param verbose: [optional] print every request
+        """
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+        self.address = self.sock.getsockname()
+
+        self.rate = rate
+        self.loss = loss
+        self.reorder = reorder
+        self.model = model if model is not None else ControllerModel()
+        self.verbose = verbose
+
+        self.stats = {
+            'requests': 0,
+            'frames': 0,  # generated stream frames
+            'sent': 0,  # actually transmitted datagrams
+            'dropped': 0,
+            'reordered': 0
+        }
+
+        self._random = random.Random(seed)
+        self._clients = set()  # stream receivers
+        self._held = []  # datagrams delayed for reordering
+        self._stream_origin = 0.0
+        self._last_request_time = time.monotonic()
+
+
+    def _send(self, datagram: bytes, address: tuple) -> None:
+        """
+        Transmit the datagram applying the loss and the reordering
+
+        :param datagram: bytes to send
+        :param address: destination
+        :return: None
+        """
+
+        if self.loss and self._random.random() < self.loss:
+            self.stats['dropped'] += 1
+            return
+        if self.reorder and self._random.random() < self.reorder:
+            self.stats['reordered'] += 1
+            self._held.append((datagram, address))
+            return
+
+        self._transmit(datagram, address)
+        self._release_held()
+
+
+    def _transmit(self, datagram: bytes, address: tuple) -> None:
+        try:
+            self.sock.sendto(datagram, address)
+            self.stats['sent'] += 1
+        except BlockingIOError:  # socket send buffer is full, behave like a lossy link
+            self.stats['dropped'] += 1
+        except ConnectionError:  # meet on Windows when the client has gone
+            self._clients.discard(address)
+
+    def _release_held(self) -> None:
+        while self._held:
+            self._transmit(*self._held.pop(0))
+
+
+    def handle_requests(self) -> None:
+        """
+        Reply to all pending requests
+
+        :return: None
+        """
+
+        while True:
+            try:
+                request, address = self.sock.recvfrom(64)
+            except BlockingIOError:
+                return
+            except ConnectionError:  # meet on Windows
+                continue
+
+            if not request:
+                continue
+
+            self.stats['requests'] += 1
+            self._last_request_time = time.monotonic()
+
+            was_run = self.model.stream_run
+            responses = self.model.respond(request)
+            if self.model.stream_run and not was_run:
+                self._stream_origin = time.monotonic()
+                self.stats['frames'] = 0
+            if request[0] == remotecontroller.var_cmd['stream_start'] << 3:
+                self._clients.add(address)
+            elif request[0] == remotecontroller.var_cmd['stream_stop'] << 3:
+                self._clients.discard(address)
+                self.model.stream_run = bool(self._clients)
+
+            if self.verbose:
+                print(f"{self.address[1]}: {address} {request.hex()} -> {responses[0].hex()}")
+
+            for response in responses:
+                self._send(response, address)
+
+
+    def tick(self, now: float) -> None:
+        """
+        Send all stream frames due by the given moment
+
+        :param now: time.monotonic() value
+        :return: None
+        """
+
+        if self.model.stream_run and now - self._last_request_time > SIMULATOR_NO_MSG_TIMEOUT:
+            print(f"{self.address[1]}: no incoming messages within a timeout, stop the stream")
+            self.model.stream_run = False
+            self._clients.clear()
+
+        if self.model.stream_run:
+            num = int((now - self._stream_origin) * self.rate) - self.stats['frames']
+            if num > 0:
+                self.stats['frames'] += num
+                frame_struct = struct.Struct(f'={self.model.channels}f')
+                for frame in self.model.frames(num, 1.0/self.rate):
+                    datagram = bytes([remotecontroller.stream_prefix]) + frame_struct.pack(*frame)
+                    for client in self._clients:
+                        self._send(datagram, client)
+
+        self._release_held()  # do not keep delayed datagrams longer than a tick
+
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+
+class Simulator:
+    """
+    Drives several SimulatedController endpoints in a single thread: waits for requests on all sockets at once and
+    generates stream frames every SIMULATOR_TICK.
+
+    Usage example:
+
+        with Simulator([SimulatedController(rate=20000) for _ in range(4)]) as simulator:
+            ports = [endpoint.address[1] for endpoint in simulator.endpoints]
+            ...
+
+    """
+
+    def __init__(self, endpoints: list):
+        """
+        Simulator constructor
+
+        :param endpoints: list of SimulatedController instances
+        """
+
+        self.endpoints = endpoints
+        self._selector = selectors.DefaultSelector()
+        for endpoint in endpoints:
+            self._selector.register(endpoint.sock, selectors.EVENT_READ, endpoint)
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+        self.close()
+
+
+    def run(self) -> None:
+        """
+        Blocking loop (till stop())
+
+        :return: None
+        """
+
+        next_tick = time.monotonic()
+        while not self._stop_event.is_set():
+            for key, _ in self._selector.select(timeout=max(next_tick - time.monotonic(), 0)):
+                key.data.handle_requests()
+
+            now = time.monotonic()
+            if now >= next_tick:
+                for endpoint in self.endpoints:
+                    endpoint.tick(now)
+                next_tick = now + SIMULATOR_TICK
+
+
+    def start(self) -> None:
+        """
+        Run the loop in the background thread
+
+        :return: None
+        """
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+    def close(self) -> None:
+        self._selector.close()
+        for endpoint in self.endpoints:
+            endpoint.close()
+
+
+
+def main() -> None:
+    """
+    Command line entry point
+
+    :return: None
+    """
+
+    parser = argparse.ArgumentParser(description="Remote PID controller simulator (see INSTRUCTIONSET)")
+    parser.add_argument('--host', default='127.0.0.1', help="interface to listen on (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=1200, help="UDP port of the first endpoint (default: %(default)s)")
+    parser.add_argument('--endpoints', type=int, default=1,
+                        help="number of controllers listening on consecutive ports (default: %(default)s)")
+    parser.add_argument('--rate', type=float, default=50.0,
+                        help="stream rate in frames per second (default: %(default)s)")
+    parser.add_argument('--loss', type=float, default=0.0,
+                        help="probability to drop an outgoing datagram (default: %(default)s)")
+    parser.add_argument('--reorder', type=float, default=0.0,
+                        help="probability to swap an outgoing datagram with the next one (default: %(default)s)")
+    parser.add_argument('--plant', action='store_true',
+                        help="stream the PID loop closed around the first-order plant instead of plain waves")
+    parser.add_argument('--channels', type=int, default=remotecontroller.STREAM_CHANNELS_DEFAULT,
+                        help="number of values in each stream frame (default: %(default)s; with --plant they are: "
+                             f"{', '.join(SIMULATOR_PLANT_CHANNELS)})")
+    parser.add_argument('--legacy', action='store_true',
+                        help="do not support the 'stream_layout' command (always stream 2 channels)")
+    parser.add_argument('--seed', type=int, help="seed of the loss/reorder random generator")
+    parser.add_argument('--verbose', action='store_true', help="print every request")
+    args = parser.parse_args()
+
+    endpoints = [SimulatedController(port=args.port + i, host=args.host, rate=args.rate, loss=args.loss,
+                                     reorder=args.reorder,
+                                     model=ControllerModel(plant=args.plant, channels=args.channels,
+                                                           stream_layout=not args.legacy),
+                                     seed=None if args.seed is None else args.seed + i, verbose=args.verbose)
+                 for i in range(args.endpoints)]
+    simulator = Simulator(endpoints)
+
+    print(f"Simulator listening on {args.host}, ports {args.port}-{args.port + args.endpoints - 1}")
+    try:
+        simulator.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.close()
+        for endpoint in endpoints:
+            print(f"{endpoint.address[1]}: {endpoint.stats}")
+
+
+
+if __name__ == '__main__':
+    main()
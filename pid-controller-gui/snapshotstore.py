@@ -0,0 +1,188 @@
+"""
+snapshotstore.py - persistent storage of PID parameters snapshots indexed by the controller and the time (standard
+library only, no Qt)
+
+
+const SNAPSHOT_STORE_SCHEMA
+    SQL statements creating the table and the index (applied on every opening, existing ones are kept)
+
+function controller_key
+    string identifying the controller by its network address
+
+class SnapshotStore
+    SQLite database of snapshots (see remotecontroller.snapshot_template) of any number of controllers
+"""
+
+import datetime
+import json
+import sqlite3
+
+# local imports
+import remotecontroller
+
+
+
+#
+# table of snapshots: values are stored as a JSON object (snapshot without the 'date' key), the date as a POSIX
+# timestamp. Lookups are always made for the particular controller in the time order
+#
+SNAPSHOT_STORE_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS snapshots (
+        id INTEGER PRIMARY KEY,
+        controller TEXT NOT NULL,
+        date REAL NOT NULL,
+        data TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS snapshots_controller_date ON snapshots (controller, date)"
+)
+
+
+
+def controller_key(ip_addr: str, udp_port: int) -> str:
+    """
+    :param ip_addr: string representing IP-address of the controller' network interface
+    :param udp_port: integer representing UDP port of the controller' network interface
+    :return: 'address:port' string
+    """
+
+    return f'{ip_addr}:{udp_port}'
+
+
+
+class SnapshotStore:
+    """
+    Snapshots of PID parameters kept in the SQLite database. Every snapshot belongs to the controller (any string, e.g.
+    controller_key()) and is retrieved as the usual snapshot dictionary (see RemoteController.save_current_values())
+    so it can be passed to RemoteController.restore_values() right away.
+
+    Usage example:
+
+        with SnapshotStore('snapshots.sqlite3') as store:
+            key = controller_key('127.0.0.1', 1200)
+            store.add(key, conn.save_current_values())
+            ...
+            snapshot_id, snapshot = store.find(key, start=datetime.datetime(2019, 3, 1))[0]
+            conn.restore_values(snapshot)
+
+    """
+
+    def __init__(self, path: str):
+        """
+        SnapshotStore constructor. Opens (creates if necessary) the database
+
+        :param path: path to the database file (':memory:' for the temporary in-memory one)
+        """
+
+        self.path = path
+        self._db = sqlite3.connect(path)
+        with self._db:
+            for statement in SNAPSHOT_STORE_SCHEMA:
+                self._db.execute(statement)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        """Total number of snapshots of all controllers"""
+        return self._db.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+
+
+    @staticmethod
+    def _to_snapshot(date: float, data: str) -> dict:
+        """
+        :param date: POSIX timestamp
+        :param data: JSON object of values
+        :return: snapshot dictionary
+        """
+
+        snapshot = json.loads(data)
+        snapshot['date'] = datetime.datetime.fromtimestamp(date)
+        return snapshot
+
+
+    def add(self, controller: str, snapshot: dict) -> int:
+        """
+        Store the snapshot
+
+        :param controller: string identifying the controller
+        :param snapshot: snapshot dictionary with the 'date' key (datetime.datetime, naive ones are considered local)
+        :return: id of the stored snapshot
+        """
+
+        data = json.dumps({key: value for key, value in snapshot.items()
+                           if key in remotecontroller.snapshot_template and key != 'date'})
+        with self._db:
+            cursor = self._db.execute("INSERT INTO snapshots (controller, date, data) VALUES (?, ?, ?)",
+                                      (controller, snapshot['date'].timestamp(), data))
+        return cursor.lastrowid
+
+
+    def get(self, snapshot_id: int) -> dict:
+        """
+        :param snapshot_id: id returned by add() or find()
+        :return: snapshot dictionary or None if there is no such snapshot
+        """
+
+        row = self._db.execute("SELECT date, data FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+        return None if row is None else self._to_snapshot(*row)
+
+
+    def latest(self, controller: str) -> dict:
+        """
+        :param controller: string identifying the controller
+        :return: the most recent snapshot dictionary of the controller or None if there are no snapshots
+        """
+
+        found = self.find(controller, limit=1)
+        return found[0][1] if found else None
+
+
+    def find(self, controller: str, start: datetime.datetime=None, end: datetime.datetime=None,
+             limit: int=None) -> list:
+        """
+        Snapshots of the controller taken within the time interval [start, end], the most recent first
+
+        :param controller: string identifying the controller
+        :param start: [optional] beginning of the interval (from the very first snapshot by default)
+        :param end: [optional] end of the interval (till now by default)
+        :param limit: [optional] maximum number of snapshots to return
+        :return: list of (id, snapshot dictionary) tuples
+        """
+
+        rows = self._db.execute(
+            "SELECT id, date, data FROM snapshots WHERE controller = ? AND date BETWEEN ? AND ? "
+            "ORDER BY date DESC, id DESC LIMIT ?",
+            (controller,
+             -float('inf') if start is None else start.timestamp(),
+             float('inf') if end is None else end.timestamp(),
+             -1 if limit is None else limit))
+        return [(snapshot_id, self._to_snapshot(date, data)) for snapshot_id, date, data in rows]
+
+
+    def controllers(self) -> list:
+        """
+        :return: list of strings identifying controllers having snapshots
+        """
+
+        return [row[0] for row in self._db.execute("SELECT DISTINCT controller FROM snapshots ORDER BY controller")]
+
+
+    def delete(self, snapshot_id: int) -> None:
+        """
+        Remove the snapshot
+
+        :param snapshot_id: id returned by add() or find()
+        :return: None
+        """
+
+        with self._db:
+            self._db.execute("DELETE FROM snapshots WHERE id = ?", (snapshot_id,))
+
+
+    def close(self) -> None:
+        self._db.close()
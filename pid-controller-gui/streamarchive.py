@@ -0,0 +1,480 @@
+"""
+streamarchive.py - compact time-indexed storage of recorded streams (standard library only, no Qt)
+
+
+const ARCHIVE_BLOCK_FRAMES
+    default number of frames in one compressed block
+const ARCHIVE_CODECS
+    available compression methods of blocks
+
+struct ARCHIVE_HEADER
+struct BLOCK_HEADER
+struct INDEX_ENTRY
+struct ARCHIVE_TRAILER
+    binary layout of the archive file (see below)
+
+function _encode_block
+function _decode_block
+    lossless delta encoding of timestamps and values and the compression of the result
+
+class StreamArchiveWriter
+    append frames to the archive packing them into compressed blocks
+
+class StreamArchive
+    read frames of an arbitrary time interval decompressing only the touched blocks
+
+function convert_segments
+    pack segment files of the StreamRecorder into the archive
+"""
+
+import array
+import bisect
+import datetime
+import os
+import struct
+import sys
+import zlib
+
+try:
+    import lzma
+except ImportError:  # Python can be built without it
+    lzma = None
+
+import recorder
+
+
+
+#
+# block size in frames
+#
+ARCHIVE_BLOCK_FRAMES = 4096
+
+#
+# codec name: id stored in the block header
+#
+ARCHIVE_CODECS = {
+    'none': 0,
+    'zlib': 1,
+    'lzma': 2
+}
+
+
+#
+# Archive file layout (little-endian):
+#
+#   header:  magic | version (uint16) | channels (uint16)
+#   blocks:  block header | compressed payload
+#   index:   one entry per block: first timestamp | last timestamp | block offset | frames count
+#   trailer: index offset | number of entries | magic
+#
+# Index and trailer are written on close. If they are missing (e.g. the writer has been interrupted) the reader
+# rebuilds the index by walking through block headers
+#
+ARCHIVE_HEADER = struct.Struct('<8sHH')
+ARCHIVE_MAGIC = b'PIDARCH\x00'
+ARCHIVE_VERSION = 1
+
+# magic | codec | frames count | first timestamp | last timestamp | payload size | payload CRC32
+BLOCK_HEADER = struct.Struct('<4sBIddII')
+BLOCK_MAGIC = b'BLK\x00'
+
+INDEX_ENTRY = struct.Struct('<ddQI')
+
+ARCHIVE_TRAILER = struct.Struct('<QI8s')
+TRAILER_MAGIC = b'PIDINDEX'
+
+
+
+def _shuffle(data: bytes, item_size: int) -> bytes:
+    """
+    Group bytes of the same significance together (first bytes of all items, then second ones and so on). Small deltas
+    have mostly zero high bytes so the result compresses much better
+
+    :param data: bytes of the items array
+    :param item_size: size of a single item in bytes
+    :return: shuffled bytes
+    """
+
+    return b''.join(data[i::item_size] for i in range(item_size))
+
+
+def _unshuffle(data: bytes, item_size: int) -> bytes:
+    """
+    Inverse of the _shuffle()
+
+    :param data: shuffled bytes
+    :param item_size: size of a single item in bytes
+    :return: bytes of the items array
+    """
+
+    num = len(data) // item_size
+    result = bytearray(len(data))
+    for i in range(item_size):
+        result[i::item_size] = data[i*num:(i + 1)*num]
+    return bytes(result)
+
+
+def _encode_block(timestamps, values, channels: int, codec: str) -> bytes:
+    """
+    Encode and compress frames of the block. Encoding is lossless: timestamps are replaced by differences of their
+    binary (int64) representations and every value is XOR-ed with the previous value of the same channel so slowly
+    changing signals turn into mostly zero bits
+
+    :param timestamps: array('d') of frames' timestamps
+    :param values: array('f') of frames' values (channels per frame)
+    :param channels: number of values in each frame
+    :param codec: one of ARCHIVE_CODECS
+    :return: compressed payload
+    """
+
+    times = array.array('q', timestamps.tobytes())
+    time_deltas = array.array('q', [times[0]]) + array.array('q', [b - a for a, b in zip(times, times[1:])])
+
+    words = array.array('I', values.tobytes())
+    words_xored = words[:channels] + array.array('I', [b ^ a for a, b in zip(words, words[channels:])])
+
+    if sys.byteorder == 'big':  # store in the little-endian order
+        time_deltas.byteswap()
+        words_xored.byteswap()
+
+    payload = _shuffle(time_deltas.tobytes(), time_deltas.itemsize) + _shuffle(words_xored.tobytes(),
+                                                                              words_xored.itemsize)
+    if codec == 'zlib':
+        return zlib.compress(payload)
+    elif codec == 'lzma':
+        return lzma.compress(payload)
+    return payload
+
+
+def _decode_block(payload: bytes, num: int, channels: int, codec: int) -> tuple:
+    """
+    Inverse of the _encode_block()
+
+    :param payload: compressed payload
+    :param num: number of frames in the block
+    :param channels: number of values in each frame
+    :param codec: codec id (one of ARCHIVE_CODECS values)
+    :return: (array('d') of timestamps, array('f') of values)
+    """
+
+    if codec == ARCHIVE_CODECS['zlib']:
+        payload = zlib.decompress(payload)
+    elif codec == ARCHIVE_CODECS['lzma']:
+        payload = lzma.decompress(payload)
+
+    split = num * 8
+    time_deltas = array.array('q', _unshuffle(payload[:split], 8))
+    words_xored = array.array('I', _unshuffle(payload[split:], 4))
+    if sys.byteorder == 'big':
+        time_deltas.byteswap()
+        words_xored.byteswap()
+
+    times = array.array('q', time_deltas)
+    for i in range(1, num):
+        times[i] += times[i - 1]
+
+    words = array.array('I', words_xored)
+    for i in range(channels, len(words)):
+        words[i] ^= words[i - channels]
+
+    return array.array('d', times.tobytes()), array.array('f', words.tobytes())
+
+
+def _to_timestamp(moment) -> float:
+    """
+    :param moment: time.time()-like float or datetime.datetime (naive ones are considered local)
+    :return: float
+    """
+
+    if isinstance(moment, datetime.datetime):
+        return moment.timestamp()
+    return float(moment)
+
+
+
+class StreamArchiveWriter:
+    """
+    Append-only writer of the archive. Frames are accumulated until the block is full and then encoded and compressed
+    at once. Timestamps should not decrease.
+
+    Usage example:
+
+        with StreamArchiveWriter('session.pidarch', channels=2) as archive:
+            archive.append(timestamps, values)
+
+    """
+
+    def __init__(self, path: str, channels: int=2, block_frames: int=ARCHIVE_BLOCK_FRAMES, codec: str='zlib'):
+        """
+        StreamArchiveWriter constructor. Creates (overwrites) the file
+
+        :param path: path to the archive file
+        :param channels: number of values in each frame
+        :param block_frames: [optional] number of frames in one block (bigger blocks are compressed better while
+        smaller ones are faster to seek)
+        :param codec: [optional] one of ARCHIVE_CODECS
+        """
+
+        if codec not in ARCHIVE_CODECS:
+            raise ValueError(f"Unknown codec '{codec}', choose one of {list(ARCHIVE_CODECS)}")
+        if codec == 'lzma' and lzma is None:
+            raise ValueError("lzma codec is not available in this Python build")
+
+        self.path = path
+        self.channels = channels
+        self.block_frames = block_frames
+        self.codec = codec
+
+        self.index = []  # INDEX_ENTRY tuples
+        self._timestamps = array.array('d')
+        self._values = array.array('f')
+
+        self._file = open(path, 'wb')
+        self._file.write(ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, channels))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+    def append(self, timestamps, values) -> None:
+        """
+        Add frames to the archive
+
+        :param timestamps: sequence of float timestamps (e.g. array('d'))
+        :param values: flat sequence of float values, 'channels' per frame (e.g. array('f'))
+        :return: None
+        """
+
+        self._timestamps.extend(timestamps)
+        self._values.extend(values)
+
+        while len(self._timestamps) >= self.block_frames:
+            self._write_block(self.block_frames)
+
+
+    def _write_block(self, num: int) -> None:
+        """
+        Encode and write first 'num' accumulated frames
+
+        :param num: number of frames
+        :return: None
+        """
+
+        timestamps = self._timestamps[:num]
+        values = self._values[:num*self.channels]
+        del self._timestamps[:num]
+        del self._values[:num*self.channels]
+
+        payload = _encode_block(timestamps, values, self.channels, self.codec)
+
+        offset = self._file.tell()
+        self._file.write(BLOCK_HEADER.pack(BLOCK_MAGIC, ARCHIVE_CODECS[self.codec], num, timestamps[0], timestamps[-1],
+                                           len(payload), zlib.crc32(payload)))
+        self._file.write(payload)
+        self.index.append((timestamps[0], timestamps[-1], offset, num))
+
+
+    def flush(self) -> None:
+        """
+        Write all accumulated frames as a (probably incomplete) block
+
+        :return: None
+        """
+
+        if self._timestamps:
+            self._write_block(len(self._timestamps))
+        self._file.flush()
+
+
+    def close(self) -> None:
+        """
+        Flush remaining frames and write the index
+
+        :return: None
+        """
+
+        if self._file.closed:
+            return
+
+        self.flush()
+
+        index_offset = self._file.tell()
+        for entry in self.index:
+            self._file.write(INDEX_ENTRY.pack(*entry))
+        self._file.write(ARCHIVE_TRAILER.pack(index_offset, len(self.index), TRAILER_MAGIC))
+        self._file.close()
+
+
+
+class StreamArchive:
+    """
+    Reader of the archive. Only the index is loaded on opening, blocks are read and decompressed on demand.
+
+    Usage example:
+
+        with StreamArchive('session.pidarch') as archive:
+            day = datetime.date.today()
+            timestamps, values = archive.read(datetime.datetime.combine(day, datetime.time(10, 32)),
+                                              datetime.datetime.combine(day, datetime.time(10, 35)))
+
+    """
+
+    def __init__(self, path: str):
+        """
+        StreamArchive constructor. Opens the file and loads (or rebuilds) its index
+
+        :param path: path to the archive file
+        """
+
+        self.path = path
+        self._file = open(path, 'rb')
+
+        magic, self.version, self.channels = ARCHIVE_HEADER.unpack(self._file.read(ARCHIVE_HEADER.size))
+        if magic != ARCHIVE_MAGIC:
+            self._file.close()
+            raise ValueError(f"'{path}' is not a stream archive")
+
+        self.index = self._load_index()
+        if self.index is None:
+            self.index = self._scan_index()
+
+        self._first_times = [entry[0] for entry in self.index]
+        self._last_times = [entry[1] for entry in self.index]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        """Total number of frames"""
+        return sum(entry[3] for entry in self.index)
+
+
+    @property
+    def time_range(self) -> tuple:
+        """(first timestamp, last timestamp) of the archive or None if it is empty"""
+        if not self.index:
+            return None
+        return self._first_times[0], self._last_times[-1]
+
+
+    def _load_index(self) -> list:
+        """
+        Read the index written by StreamArchiveWriter.close()
+
+        :return: list of INDEX_ENTRY tuples or None if the index is absent
+        """
+
+        file_size = os.fstat(self._file.fileno()).st_size
+        if file_size < ARCHIVE_HEADER.size + ARCHIVE_TRAILER.size:
+            return None
+
+        self._file.seek(file_size - ARCHIVE_TRAILER.size)
+        index_offset, count, magic = ARCHIVE_TRAILER.unpack(self._file.read(ARCHIVE_TRAILER.size))
+        if magic != TRAILER_MAGIC or index_offset + count*INDEX_ENTRY.size + ARCHIVE_TRAILER.size != file_size:
+            return None
+
+        self._file.seek(index_offset)
+        data = self._file.read(count * INDEX_ENTRY.size)
+        return list(INDEX_ENTRY.iter_unpack(data))
+
+
+    def _scan_index(self) -> list:
+        """
+        Rebuild the index walking through block headers. A truncated last block is ignored
+
+        :return: list of INDEX_ENTRY tuples
+        """
+
+        index = []
+        file_size = os.fstat(self._file.fileno()).st_size
+        offset = ARCHIVE_HEADER.size
+        while offset + BLOCK_HEADER.size <= file_size:
+            self._file.seek(offset)
+            magic, codec, num, first, last, size, crc = BLOCK_HEADER.unpack(self._file.read(BLOCK_HEADER.size))
+            if magic != BLOCK_MAGIC or offset + BLOCK_HEADER.size + size > file_size:
+                break
+            index.append((first, last, offset, num))
+            offset += BLOCK_HEADER.size + size
+        return index
+
+
+    def _read_block(self, offset: int) -> tuple:
+        """
+        Read and decode the block
+
+        :param offset: position of the block in the file
+        :return: (array('d') of timestamps, array('f') of values)
+        """
+
+        self._file.seek(offset)
+        magic, codec, num, first, last, size, crc = BLOCK_HEADER.unpack(self._file.read(BLOCK_HEADER.size))
+        payload = self._file.read(size)
+        if magic != BLOCK_MAGIC or zlib.crc32(payload) != crc:
+            raise ValueError(f"Corrupted block at {offset} in '{self.path}'")
+        return _decode_block(payload, num, self.channels, codec)
+
+
+    def read(self, start=None, end=None) -> tuple:
+        """
+        Get frames of the time interval [start, end]. Only blocks overlapping the interval are decompressed
+
+        :param start: [optional] beginning of the interval (float timestamp or datetime.datetime), from the
+        beginning of the archive by default
+        :param end: [optional] end of the interval (float timestamp or datetime.datetime), till the end of the archive
+        by default
+        :return: (array('d') of timestamps, array('f') of values, 'channels' per frame)
+        """
+
+        start = -float('inf') if start is None else _to_timestamp(start)
+        end = float('inf') if end is None else _to_timestamp(end)
+
+        timestamps = array.array('d')
+        values = array.array('f')
+
+        # blocks are ordered in time so the first relevant one is the first ending not before the start
+        first = bisect.bisect_left(self._last_times, start)
+        last = bisect.bisect_right(self._first_times, end)
+        for block in range(first, last):
+            block_timestamps, block_values = self._read_block(self.index[block][2])
+            lo = bisect.bisect_left(block_timestamps, start)
+            hi = bisect.bisect_right(block_timestamps, end)
+            timestamps.extend(block_timestamps[lo:hi])
+            values.extend(block_values[lo*self.channels:hi*self.channels])
+
+        return timestamps, values
+
+
+    def close(self) -> None:
+        self._file.close()
+
+
+
+def convert_segments(segment_paths: list, archive_path: str, **kwargs) -> None:
+    """
+    Pack segment files written by the StreamRecorder into the single archive
+
+    :param segment_paths: paths of segment files in chronological order (see recorder.find_segments())
+    :param archive_path: path to the archive file to create
+    :param kwargs: [optional] other StreamArchiveWriter arguments ('block_frames', 'codec')
+    :return: None
+    """
+
+    writer = None
+    for path in segment_paths:
+        header, timestamps, values = recorder.read_segment(path)
+        if writer is None:
+            writer = StreamArchiveWriter(archive_path, channels=header['channels'], **kwargs)
+        elif header['channels'] != writer.channels:
+            writer.close()
+            raise ValueError(f"'{path}' starts other stream layout ({header['channels']} channels instead of "
+                             f"{writer.channels}), pack segments of each layout separately")
+        writer.append(timestamps, values)
+
+    if writer is not None:
+        writer.close()
@@ -0,0 +1,8 @@
+"""
+conftest.py - make modules of the application importable by the tests (they import each other as top-level ones)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,70 @@
+"""
+test_recorder.py - StreamRecorder segment files and the stream layout changes
+
+Run from the repository root: python -m pytest -q pid-controller-gui/tests
+"""
+
+import struct
+
+import pytest
+
+import recorder
+import remotecontroller
+import simulator
+
+
+
+def stream_message(*values) -> bytes:
+    return bytes([remotecontroller.stream_prefix]) + struct.pack(f'{len(values)}f', *values)
+
+
+@pytest.fixture
+def model_and_conn():
+    model = simulator.ControllerModel()
+    conn = remotecontroller.RemoteController(transport=remotecontroller.LoopbackTransport(model.respond))
+    yield model, conn
+    conn.close()
+
+
+def test_segment_size_too_small(model_and_conn, tmp_path):
+    _, conn = model_and_conn
+    with pytest.raises(ValueError):
+        recorder.StreamRecorder(conn.stream, str(tmp_path), segment_size=30)
+
+
+def test_recording_across_layout_change(model_and_conn, tmp_path):
+    model, conn = model_and_conn
+    frame_size = remotecontroller.TIMESTAMP_SIZE + 2*remotecontroller.FLOAT_SIZE
+    rec = recorder.StreamRecorder(conn.stream, str(tmp_path),
+                                  segment_size=recorder.SEGMENT_HEADER.size + recorder.CHUNK_HEADER.size + 10*frame_size)
+    rec.start()
+    try:
+        conn.transport.inject(*(stream_message(i, -i) for i in range(25)))  # rotates segments of 10 frames
+
+        model.channels = 3
+        assert conn.stream.read_layout() == 3
+        assert rec.channels == 3
+        conn.transport.inject(*(stream_message(i, i, i) for i in range(5)))
+    finally:
+        rec.stop()
+
+    assert rec.frames_recorded == 30
+    segments = [recorder.read_segment(path) for path in recorder.find_segments(str(tmp_path))]
+    assert [header['channels'] for header, *_ in segments] == [2, 2, 2, 3]
+    assert list(segments[2][2]) == [20, -20, 21, -21, 22, -22, 23, -23, 24, -24]
+    assert list(segments[3][2]) == [float(i) for i in range(5) for _ in range(3)]
+
+
+def test_layout_too_wide_for_segment(model_and_conn, tmp_path):
+    model, conn = model_and_conn
+    frame_size = remotecontroller.TIMESTAMP_SIZE + 2*remotecontroller.FLOAT_SIZE
+    rec = recorder.StreamRecorder(conn.stream, str(tmp_path),
+                                  segment_size=recorder.SEGMENT_HEADER.size + recorder.CHUNK_HEADER.size + frame_size)
+    rec.start()
+    conn.transport.inject(stream_message(1.0, 2.0))
+
+    model.channels = 4
+    with pytest.raises(ValueError):
+        conn.stream.read_layout()
+    assert not rec.is_recording()
+    assert rec.frames_recorded == 1
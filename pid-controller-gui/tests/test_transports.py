@@ -0,0 +1,151 @@
+"""
+test_transports.py - RemoteController over the serial (pty) and the loopback transports
+
+Run from the repository root: python -m pytest -q pid-controller-gui/tests
+"""
+
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+import pytest
+
+import remotecontroller
+import simulator
+
+
+
+@pytest.fixture
+def pty_controller():
+    """
+    Simulated controller on the master end of the pty answering requests (padded to the full message size by
+    SerialTransport). Yields (master fd, slave path, ControllerModel); close the master fd to hang up
+    """
+
+    import pty
+    import tty
+
+    master, slave = pty.openpty()
+    tty.setraw(master)
+    model = simulator.ControllerModel()
+    stop = threading.Event()
+
+    def serve():
+        pending = b''
+        while not stop.is_set():
+            if not select.select([master], [], [], 0.05)[0]:
+                continue
+            try:
+                pending += os.read(master, 1024)
+            except OSError:  # hung up by the test
+                return
+            while len(pending) >= remotecontroller.REMOTECONTROLLER_MSG_SIZE:
+                request = pending[:remotecontroller.REMOTECONTROLLER_MSG_SIZE]
+                pending = pending[remotecontroller.REMOTECONTROLLER_MSG_SIZE:]
+                if not request[0] & 0x80:  # read requests carry no values
+                    request = request[:1]
+                for response in model.respond(request):
+                    os.write(master, response)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    hangup = {'master': master}
+    yield hangup, os.ttyname(slave), model
+
+    stop.set()
+    thread.join()
+    if hangup['master'] is not None:
+        os.close(master)
+    os.close(slave)
+
+
+def hang_up(hangup: dict) -> None:
+    os.close(hangup['master'])
+    hangup['master'] = None
+
+
+def stream_message(*values) -> bytes:
+    return bytes([remotecontroller.stream_prefix]) + struct.pack(f'{len(values)}f', *values)
+
+
+def value(model: simulator.ControllerModel, what: str) -> float:
+    return model.values[remotecontroller.var_cmd[what]][0]
+
+
+def wait_for(condition, timeout: float=2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="pty is UNIX only")
+@pytest.mark.parametrize('listener', ['thread', 'asyncio'])
+def test_serial_roundtrip_and_hangup(pty_controller, listener):
+    hangup, path, model = pty_controller
+    conn = remotecontroller.RemoteController(transport=remotecontroller.SerialTransport(path), listener=listener,
+                                             heartbeat_window=0)
+    try:
+        assert not conn.is_offline_mode
+        assert conn.read('kP', max_age=0) == pytest.approx(value(model, 'kP'))
+
+        os.write(hangup['master'], stream_message(1.5, -2.5))
+        assert wait_for(lambda: len(conn.stream.buffer) == 1)
+        frames = conn.stream.buffer.peek()
+        assert frames.tolist() == [[1.5, -2.5]]
+        frames.release()
+
+        hang_up(hangup)
+        assert wait_for(lambda: conn.listener_status.link_closed)
+
+        # the listener must not spin on the readable descriptor of the closed link
+        cpu_time = time.process_time()
+        time.sleep(0.5)
+        assert time.process_time() - cpu_time < 0.1
+
+        assert conn.check_connection() == remotecontroller.result['error']
+        assert conn.is_offline_mode
+    finally:
+        conn.close()
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="pty is UNIX only")
+def test_serial_resynchronization(pty_controller):
+    hangup, path, model = pty_controller
+    conn = remotecontroller.RemoteController(transport=remotecontroller.SerialTransport(path), listener='thread')
+    try:
+        os.write(hangup['master'], b'\xff\xfe' + stream_message(3.0, 4.0))  # bytes which cannot start a message
+        assert wait_for(lambda: len(conn.stream.buffer) == 1)
+        assert conn.transport.dropped_bytes == 2
+        assert conn.read('kI', max_age=0) == pytest.approx(value(model, 'kI'))
+    finally:
+        conn.close()
+
+
+def test_loopback_pause_resume_backlog():
+    model = simulator.ControllerModel()
+    conn = remotecontroller.RemoteController(transport=remotecontroller.LoopbackTransport(model.respond))
+    try:
+        assert conn.read('setpoint', max_age=0) == pytest.approx(value(model, 'setpoint'))
+
+        conn.pause()
+        num = remotecontroller.INLINE_TRANSPORT_BACKLOG + 100
+        conn.transport.inject(*(stream_message(i, -i) for i in range(num)))
+        assert conn.transport.pending() == remotecontroller.INLINE_TRANSPORT_BACKLOG  # bounded while paused
+        assert len(conn.stream.buffer) == 0
+
+        conn.resume()
+        assert conn.transport.pending() == 0
+        assert len(conn.stream.buffer) == remotecontroller.INLINE_TRANSPORT_BACKLOG
+        frames = conn.stream.buffer.peek()
+        assert frames.tolist()[0] == [100.0, -100.0]  # the oldest messages have been dropped
+        assert frames.tolist()[-1] == [num - 1, -(num - 1)]
+        frames.release()
+    finally:
+        conn.close()
@@ -5,10 +5,15 @@ util.py - utility things for all other modules
 function resource_path
     routine to correct a given path to some resource in accordance to whether the program is running in frozen mode or
     not (see https://stackoverflow.com/questions/7674790/bundling-data-files-with-pyinstaller-onefile)
+
+class StartupProfiler
+    durations of named startup phases (imports, construction of widgets and so on) and moments of milestones
 """
 
+import contextlib
 import os
 import sys
+import time
 
 
 def resource_path(relative_path: str) -> str:
@@ -29,3 +34,87 @@ def resource_path(relative_path: str) -> str:
             return os.path.join(sys._MEIPASS, relative_path)
 
     return relative_path
+
+
+
+class StartupProfiler:
+    """
+    Collects durations of named startup phases and moments of milestones (e.g. 'main window shown') relative to the
+    start of the application. Recording is cheap so it is always on, the report is printed on demand.
+
+    Usage example:
+
+        profiler = StartupProfiler()
+        with profiler.phase("import graphs"):
+            import graphs
+        ...
+        profiler.mark("main window shown")
+        print(profiler.report())
+
+    """
+
+    def __init__(self, start: float=None):
+        """
+        StartupProfiler constructor
+
+        :param start: [optional] time.perf_counter() of the application start (now by default)
+        """
+
+        self.start = time.perf_counter() if start is None else start
+        self.phases = []  # (name, offset from the start, duration) in seconds
+        self.milestones = []  # (name, offset from the start) in seconds
+
+
+    def add(self, name: str, begin: float, end: float) -> None:
+        """
+        Record the phase measured elsewhere
+
+        :param name: phase name
+        :param begin: time.perf_counter() of the phase beginning
+        :param end: time.perf_counter() of the phase end
+        :return: None
+        """
+
+        self.phases.append((name, begin - self.start, end - begin))
+
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """
+        Context manager measuring the enclosed code as the phase
+
+        :param name: phase name
+        """
+
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, begin, time.perf_counter())
+
+
+    def mark(self, name: str) -> float:
+        """
+        Record the milestone
+
+        :param name: milestone name
+        :return: time since the start in seconds
+        """
+
+        elapsed = time.perf_counter() - self.start
+        self.milestones.append((name, elapsed))
+        return elapsed
+
+
+    def report(self) -> str:
+        """
+        :return: table of phases and milestones in the chronological order (times are in milliseconds)
+        """
+
+        rows = [(offset, name, f"{duration*1000:10.1f}") for name, offset, duration in self.phases] + \
+               [(offset, f"* {name}", "") for name, offset in self.milestones]
+        width = max(len(row[1]) for row in rows) if rows else 0
+
+        lines = [f"{'phase':<{width}} {'duration':>10} {'at':>10}"]
+        lines += [f"{name:<{width}} {duration:>10} {offset*1000:10.1f}" for offset, name, duration in sorted(rows)]
+        return '\n'.join(lines)
@@ -24,10 +24,10 @@
 
 // simulate a real system when streaming data will be stored in a separate array and probably will be collected in
 // another thread. Therefore in this case there should be some locking mechanism (mutex)
-static float stream_values[2];
+static float stream_values[STREAM_CHANNELS];
 
 
-#define STREAM_BUF_SIZE (sizeof(char)+2*sizeof(float))
+#define STREAM_BUF_SIZE (sizeof(char)+STREAM_CHANNELS*sizeof(float))
 #define STREAM_THREAD_SLEEP_TIME_MS 20
 
 pthread_t stream_thread_id;
@@ -62,9 +62,11 @@ void *_stream_thread(void *data) {
                 x = 0.0;
             stream_values[0] = (float)sin(x);  // Process Variable
             stream_values[1] = (float)cos(x);  // Controller Output
+            for (int i=2; i<STREAM_CHANNELS; i++)  // extra channels are harmonics
+                stream_values[i] = (float)sin(i*x);
             x = x + dx;
 
-            memcpy(&stream_buf[1], stream_values, 2*sizeof(float));
+            memcpy(&stream_buf[1], stream_values, STREAM_CHANNELS*sizeof(float));
             
             // datagram sockets support multiple readers/writers even simultaneously so we do not need any mutex in
             // this simple case
@@ -152,6 +154,13 @@ int process_request(unsigned char *request_response_buf) {
                 stream_start();
                 result = RESULT_ok;
                 break;
+            case CMD_stream_layout: {
+                printf("CMD_stream_layout\n");
+                float channels = (float)STREAM_CHANNELS;
+                memcpy(&request_response_buf[1], &channels, sizeof(float));
+                result = RESULT_ok;
+                break;
+            }
 
             case VAR_setpoint:
                 printf("VAR_setpoint\n");
@@ -56,6 +56,7 @@ enum {
     // special
     CMD_stream_start = 0b0001,
     CMD_stream_stop = 0b0000,
+    CMD_stream_layout = 0b0010,
 
     CMD_save_to_eeprom = 0b1011
 };
@@ -67,6 +68,12 @@ enum {
 
 #define STREAM_PREFIX 0b00000001
 
+// number of float values in each stream message (reported to clients by the CMD_stream_layout command). Override it at
+// build time (e.g. add "-D STREAM_CHANNELS=4" to the compiler flags in the Makefile)
+#ifndef STREAM_CHANNELS
+#define STREAM_CHANNELS 2
+#endif
+
 
 typedef struct request {
     unsigned char _reserved: 3;